@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 from streamlit_folium import st_folium
 import folium
@@ -16,11 +17,19 @@ local_css("assets/style.css")
 
 # 2. CARGAR MÓDULOS
 try:
-    from src.data_loader import load_historical_data, get_weather_data, get_real_infrastructure, get_nasa_firms_data
+    from src.data_loader import load_historical_data, get_weather_data, get_real_infrastructure, get_nasa_firms_data, iter_historical_chunks, archive_version
     from src.components import inject_tailwind, render_left_alert_card, render_factors_card, render_right_metrics, render_log_card, render_forecast_section, render_footer
     from src.fwi_calculator import calculate_fwi
-    from src.ml_engine import get_risk_clusters
-    from src.report_generator import generate_pdf_report
+    from src.ml_engine import get_risk_clusters, get_risk_clusters_from_cells
+    from src.model_store import get_or_train
+    from src.storage import file_hash
+    from src.http_client import fetch_concurrently
+    from src.snapshots import read_snapshot
+    from src.report_generator import get_pdf_report
+    from src.aggregations import DEFAULT_CELL_SIZE, heatmap_cells, get_rollup_cube, summarize_chunks
+    from src.incident_index import IncidentIndex
+    from src.forecast import get_forecast_timeline
+    from src.correlation import HotspotCorrelator, hotspot_alerts
     # IMPORTAMOS EL NUEVO TABLERO TÁCTICO
     from src.analytics import render_3d_density_map, render_tactical_dashboard
 except ImportError as e:
@@ -32,16 +41,96 @@ inject_tailwind()
 # 3. DATOS
 if 'sim_coords' not in st.session_state: st.session_state['sim_coords'] = None
 JUAREZ_LAT, JUAREZ_LON = 31.7389, -106.4856 
+# Un snapshot más viejo que ~3 ciclos del worker (--interval 300) indica que el worker se detuvo
+SNAPSHOT_MAX_AGE = 900
+# Archivo multianual opcional (CSV o carpeta de exportaciones) más grande que la RAM: el mapa
+# de calor, las zonas IA y la analítica salen de agregados leídos por bloques; incendios.csv
+# sigue alimentando las vistas por fila (tabla, cruce con FIRMS)
+ARCHIVE_PATH = os.environ.get("SAPRIA_ARCHIVE")
 
 @st.cache_data(ttl=600)
 def get_data_bundle():
-    df = load_historical_data("incendios.csv")
-    weather = get_weather_data(JUAREZ_LAT, JUAREZ_LON)
-    df_nasa = get_nasa_firms_data()
-    return df, weather, df_nasa
-
-df, weather, df_nasa = get_data_bundle()
-epicentros_ia = get_risk_clusters(df, num_clusters=5)
+    # Fuentes independientes en paralelo: la espera es la de la más lenta.
+    # El historial no va aquí: se lee con get_history(data_version) para que
+    # coincida con el índice y el correlador de esa misma versión.
+    bundle = fetch_concurrently({
+        "weather": lambda: get_weather_data(JUAREZ_LAT, JUAREZ_LON),
+        "nasa": get_nasa_firms_data,
+    })
+    df_nasa = bundle["nasa"] if bundle["nasa"] is not None else pd.DataFrame()
+    return bundle["weather"], df_nasa
+
+@st.cache_data(ttl=1800)
+def get_forecast():
+    # Un solo pronóstico por ventana de 30 min, compartido por todas las sesiones
+    return get_forecast_timeline()
+
+@st.cache_data
+def get_history(data_version):
+    return load_historical_data("incendios.csv")
+
+@st.cache_resource(max_entries=2)
+def get_archive(archive_key):
+    # Una sola pasada por bloques, guardada en el almacén de modelos por versión del archivo
+    return get_or_train('archive_summary', archive_key, {'cell_size': DEFAULT_CELL_SIZE},
+                        lambda: summarize_chunks(iter_historical_chunks(ARCHIVE_PATH)))
+
+@st.cache_data(max_entries=2)
+def get_archive_zones(archive_key):
+    return get_risk_clusters_from_cells(get_archive(archive_key)[0].cell_counts())
+
+@st.cache_data(max_entries=32)
+def get_heat_cells(data_version, zoom, archive_key=None):
+    # Celdas ponderadas por versión de datos y zoom: el mapa nunca recibe los puntos crudos
+    if archive_key:
+        return heatmap_cells(get_archive(archive_key)[0].cell_counts(), zoom)
+    return heatmap_cells(get_history(data_version), zoom)
+
+@st.cache_resource(max_entries=4)
+def get_incident_index(data_version):
+    # Índice día x geohash: los filtros de la analítica suman cubetas en lugar de recorrer filas
+    return IncidentIndex(get_history(data_version))
+
+@st.cache_resource(max_entries=4)
+def get_cube(data_version):
+    # Cubo de conteos persistente; con filas nuevas solo se suman esas
+    return get_rollup_cube(get_history(data_version), "incendios.csv")
+
+@st.cache_resource(max_entries=4)
+def get_correlator(data_version):
+    # Índice espacio-temporal del historial para cruzar las detecciones satelitales
+    return HotspotCorrelator(get_history(data_version))
+
+# Si worker.py está corriendo, solo se leen sus snapshots (sin APIs ni entrenamiento);
+# si el snapshot venció se vuelve a consultar en vivo
+snapshot = read_snapshot("dashboard", max_age=SNAPSHOT_MAX_AGE)
+if snapshot:
+    snap = snapshot["payload"]
+    data_status = f"Datos del worker: {pd.Timestamp(snapshot['generated_at'], unit='s', tz='UTC').tz_convert('America/Ciudad_Juarez'):%d/%m/%Y %H:%M}"
+    data_version = snap["data_version"]
+    df = get_history(data_version)
+    weather, df_nasa, epicentros_ia = snap["weather"], snap["df_nasa"], snap["epicentros"]
+    forecast = snap.get("forecast")
+    alerts = snap.get("hotspot_alerts")
+else:
+    weather, df_nasa = get_data_bundle()
+    data_status = "Datos en vivo (sin snapshot reciente del worker)"
+    data_version = file_hash("incendios.csv")
+    df = get_history(data_version)
+    # Número de zonas elegido por silueta; se recalcula solo si cambia el historial
+    epicentros_ia = get_risk_clusters(df, data_version=data_version, index=get_incident_index(data_version))
+    forecast = alerts = None
+archive_key = archive_version(ARCHIVE_PATH) if ARCHIVE_PATH else None
+if archive_key:
+    archive_aggregates, archive_cube = get_archive(archive_key)
+    epicentros_ia = get_archive_zones(archive_key)
+    total_incidentes = archive_aggregates.total
+else:
+    total_incidentes = len(df)
+if alerts is None:
+    alerts = hotspot_alerts(get_correlator(data_version), df_nasa, epicentros_ia)
+if forecast is None:
+    forecast = get_forecast()
 sim_wind = weather['wind']['speed'] * 3.6 if weather else 20
 sim_temp = weather['main']['temp'] if weather else 30
 sim_hum = weather['main']['humidity'] if weather else 20
@@ -65,17 +154,16 @@ with st.container():
     with col_btn:
         c_spacer, c_b = st.columns([1, 2])
         with c_b:
-            pdf_path = generate_pdf_report(weather, fwi_cat, len(df_nasa), epicentros_ia, len(df))
-            with open(pdf_path, "rb") as f:
-                pdf_data = f.read()
+            # El PDF se genera solo al hacer clic (no en cada rerun)
             st.download_button(
                 label="⬇️ DESCARGAR PDF",
-                data=pdf_data,
+                data=lambda: get_pdf_report(weather, fwi_cat, len(df_nasa), epicentros_ia, total_incidentes),
                 file_name="Reporte_SAPRIA.pdf",
                 mime="application/pdf",
                 use_container_width=True
             )
     st.markdown('</div>', unsafe_allow_html=True)
+    st.caption(data_status)
 
 # Lógica
 page = "Dashboard"
@@ -91,22 +179,27 @@ if page == "Dashboard":
     col_izq, col_mapa, col_der = st.columns([2.5, 6.5, 3], gap="medium")
     
     with col_izq:
-        render_left_alert_card(len(df_nasa))
+        render_left_alert_card(len(df_nasa), alerts)
         render_factors_card(weather, fwi_cat)
         show_heatmap = st.toggle("🔥 Historial", value=True)
         show_ai = st.toggle("🧠 Zonas IA", value=True)
 
     with col_mapa:
+        # Zoom y centro actuales del mapa (los devuelve st_folium en el rerun anterior)
+        map_state = st.session_state.get('mapa_tactico') or {}
+        map_zoom = map_state.get('zoom') or 11
+        map_center = map_state.get('center')
         m = folium.Map(location=[JUAREZ_LAT, JUAREZ_LON], zoom_start=11, tiles="CartoDB positron")
-        if show_heatmap and not df.empty: HeatMap([[r['lat'], r['lon']] for _, r in df.iterrows()], radius=15, gradient={0.4:'#FACC15', 1:'#EF4444'}).add_to(m)
+        if show_heatmap and (archive_key or not df.empty): HeatMap(get_heat_cells(data_version, int(map_zoom), archive_key), radius=15, gradient={0.4:'#FACC15', 1:'#EF4444'}).add_to(m)
         if show_ai:
              for ep in epicentros_ia:
                 folium.Circle(location=[ep['lat'], ep['lon']], radius=1500, color="#EF4444", weight=1, fill=True, fill_opacity=0.1).add_to(m)
-        st_folium(m, width="100%", height=500)
-        render_forecast_section(sim_temp)
+        st_folium(m, key='mapa_tactico', width="100%", height=500, returned_objects=['zoom', 'center'],
+                  zoom=map_zoom, center=(map_center['lat'], map_center['lng']) if map_center else None)
+        render_forecast_section(forecast)
 
     with col_der:
-        render_right_metrics(len(df))
+        render_right_metrics(total_incidentes)
         render_log_card(epicentros_ia)
 
 elif page == "Base":
@@ -117,14 +210,21 @@ elif page == "Analitica":
     st.markdown("## Inteligencia Táctica (Analítica Avanzada)")
     
     # 1. RENDERIZAR TABLERO CON GRÁFICAS Y FILTROS
-    # Guardamos los datos filtrados que nos devuelve la función
-    df_filtrado = render_tactical_dashboard(df)
+    # Las gráficas salen del cubo de conteos; devuelve el rango elegido
+    fecha_ini, fecha_fin = render_tactical_dashboard(archive_cube if archive_key else get_cube(data_version))
     
     st.markdown("---")
     
-    # 2. RENDERIZAR MAPA 3D USANDO LOS DATOS FILTRADOS
+    # 2. MAPA 3D CON CONTEOS PRE-AGRUPADOS DEL MISMO RANGO
     # Así el mapa reacciona al selector de fechas
-    render_3d_density_map(df_filtrado)
+    if archive_key:
+        # Los agregados del archivo no guardan la fecha por celda: el mapa cubre todo el periodo
+        st.caption("Archivo multianual: el mapa 3D muestra todo el periodo.")
+        render_3d_density_map(archive_aggregates.cell_counts(), cell_size_m=DEFAULT_CELL_SIZE * 111_320)
+    else:
+        incident_index = get_incident_index(data_version)
+        render_3d_density_map(incident_index.cell_counts(fecha_ini, fecha_fin, precision=7),
+                              cell_size_m=min(incident_index.cell_size_m(7)))
 
 st.markdown('</div>', unsafe_allow_html=True)
 render_footer()
\ No newline at end of file
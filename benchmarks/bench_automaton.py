@@ -0,0 +1,48 @@
+"""
+Velocidad del autómata celular de propagación (FireAutomaton.step).
+
+Mide ms/paso con un frente local (pocos focos) y en el peor caso, con focos
+repartidos en toda la malla (la ventana activa cubre la ciudad completa).
+Uso: python -m benchmarks.bench_automaton [--resolution 1000] [--steps 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.simulation import FireAutomaton
+
+BOUNDS = (31.55, 31.80, -106.55, -106.25)
+
+def _ms_per_step(ca, n_steps):
+    t0 = time.perf_counter()
+    ca.step(n_steps)
+    return (time.perf_counter() - t0) * 1000 / max(ca.steps, 1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolution', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    risk = rng.random((40, 40), dtype=np.float32)
+    common = dict(resolution=args.resolution, wind_speed_ms=6, wind_deg=45, fwi_score=30, risk_grid=risk, seed=0)
+
+    FireAutomaton(BOUNDS, **dict(common, resolution=10))  # Importaciones en frío fuera de la medición
+    t0 = time.perf_counter()
+    local = FireAutomaton(BOUNDS, **common)
+    setup_ms = (time.perf_counter() - t0) * 1000
+    local.ignite([31.70, 31.65], [-106.45, -106.35])
+    local_ms = _ms_per_step(local, args.steps)
+
+    dense = FireAutomaton(BOUNDS, **common)
+    dense.ignite(rng.uniform(*BOUNDS[:2], 2000), rng.uniform(*BOUNDS[2:], 2000))
+    dense_ms = _ms_per_step(dense, args.steps)
+
+    print(f"malla {args.resolution}x{args.resolution}, {args.steps} pasos (construcción {setup_ms:.0f} ms)")
+    print(f"frente local : {local_ms:7.2f} ms/paso, {local.burned_area_km2:8.2f} km² afectados")
+    print(f"peor caso    : {dense_ms:7.2f} ms/paso, {dense.burned_area_km2:8.2f} km² afectados")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Reportes de entrega de turno: generate_pdf_report en un bucle (un documento
+por zona) vs. el lote de src.batch_reports (pool de procesos -> zip, y un
+solo PDF con una página por zona).
+
+Uso: python -m benchmarks.bench_batch_reports [--zones 400] [--rows 200000] [--workers 4]
+"""
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_incidents
+from src.batch_reports import build_zone_specs, write_merged_report, write_reports_zip
+from src.report_generator import generate_pdf_report, generate_zone_report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--zones', type=int, default=400)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df = make_incidents(args.rows, seed=0)
+    rng = np.random.default_rng(0)
+    df['colonia'] = [f"Colonia {i}" for i in rng.integers(0, args.zones, len(df))]
+
+    start = time.perf_counter()
+    specs = build_zone_specs(df, 'colonia', fwi_cat='ALTO', nasa_count=3)
+    t_specs = time.perf_counter() - start
+    n = len(specs)
+    epicentros = [{'id': 1, 'lat': 31.7, 'lon': -106.4, 'weight': 10, 'peligro': 'ALTO'}]
+    weather = {'main': {'temp': 30, 'humidity': 20}, 'wind': {'speed': 5, 'deg': 90}}
+
+    print(f"{n} zonas, {args.rows} incidentes (resumen por zona: {t_specs:.2f} s)")
+    print(f"{'modo':<40} {'tiempo':>8} {'reportes/s':>11}")
+
+    def report(label, seconds):
+        print(f"{label:<40} {seconds:>7.2f}s {n / seconds:>11.0f}")
+
+    start = time.perf_counter()
+    for spec in specs:
+        generate_pdf_report(weather, 'ALTO', 3, epicentros, spec['total'])
+    report("generate_pdf_report en bucle", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for spec in specs:
+        generate_zone_report(spec)
+    report("generate_zone_report en bucle", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    write_reports_zip(specs, io.BytesIO(), workers=1)
+    report("zip, 1 proceso", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    write_reports_zip(specs, io.BytesIO(), workers=args.workers)
+    report(f"zip, pool de {args.workers} procesos", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    write_merged_report(specs, os.devnull)
+    report("PDF único (una página por zona)", time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()
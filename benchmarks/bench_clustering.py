@@ -0,0 +1,52 @@
+"""
+Zonas de riesgo: KMeans fijo (k=5, n_init=10) sobre lat/lon crudos (método
+anterior) vs. src.clustering sobre celdas del IncidentIndex (MiniBatchKMeans
+con k automático, DBSCAN y HDBSCAN haversine, y una ventana de un año).
+
+Uso: python -m benchmarks.bench_clustering [--rows 100000 1000000]
+"""
+import argparse
+import time
+
+from sklearn.cluster import KMeans
+
+from benchmarks.synthetic import make_incidents
+from src.clustering import find_risk_clusters
+from src.incident_index import IncidentIndex
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+def _summary(clusters):
+    return ", ".join(f"{c['weight']}/{c['radio_km']}km" for c in clusters[:5])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for n_rows in args.rows:
+        df = make_incidents(n_rows, seed=0)
+        df['causa'] = df['causa'].astype('category')  # Como en load_historical_data
+        print(f"{n_rows} incidentes")
+
+        _, t_legacy = _timed(lambda: KMeans(n_clusters=5, random_state=42, n_init=10).fit(df[['lat', 'lon']]))
+        print(f"  KMeans k=5 n_init=10 en grados: {t_legacy:.2f}s")
+
+        index, t_index = _timed(lambda: IncidentIndex(df))
+        print(f"  IncidentIndex (se construye una vez por versión de datos): {t_index:.2f}s")
+        runs = [
+            ("kmeans k=5", dict(method='kmeans', num_clusters=5)),
+            ("kmeans k auto", dict(method='kmeans')),
+            ("dbscan 0.5 km", dict(method='dbscan')),
+            ("hdbscan", dict(method='hdbscan')),
+            ("kmeans k auto, 2025", dict(method='kmeans', start='2025-01-01', end='2025-12-31')),
+        ]
+        for name, kwargs in runs:
+            clusters, elapsed = _timed(lambda: find_risk_clusters(df, index=index, **kwargs))
+            print(f"  {name}: {elapsed:.2f}s, {len(clusters)} zonas ({_summary(clusters)})")
+
+if __name__ == '__main__':
+    main()
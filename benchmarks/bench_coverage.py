@@ -0,0 +1,121 @@
+"""
+Cobertura de estaciones: una ruta OSRM por par incidente-estación (método
+anterior) vs. matriz de cobertura precalculada (src.coverage), contra un
+servidor OSRM local con latencia simulada.
+
+Uso: python -m benchmarks.bench_coverage [--stations 12] [--resolution 100] [--latency 0.02]
+"""
+import argparse
+import http.server
+import json
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src import feed_cache, route_cache
+from src.coverage import build_coverage
+from src.data_loader import get_route_osrm
+from src.http_client import ENDPOINTS
+from src.route_cache import encode_polyline
+from src.spatial_index import haversine_km
+
+BOUNDS = (31.55, 31.80, -106.55, -106.25)
+
+def _serve(state):
+    """OSRM mínimo: 'route' y 'table' con tiempos de línea recta a 30 km/h."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(state['latency'])
+            state['requests'] += 1
+            url = urlsplit(self.path)
+            service, coords = url.path.split('/')[1], url.path.rsplit('/', 1)[1]
+            lonlat = np.array([[float(v) for v in c.split(',')] for c in coords.split(';')])
+            seconds = lambda a, b: haversine_km(lonlat[a, 1], lonlat[a, 0], lonlat[b, 1], lonlat[b, 0]) / 30 * 3600
+            if service == 'table':
+                query = parse_qs(url.query)
+                sources = [int(i) for i in query['sources'][0].split(';')]
+                destinations = [int(i) for i in query['destinations'][0].split(';')]
+                body = {'code': 'Ok', 'durations': seconds(np.array(sources)[:, None], np.array(destinations)[None, :]).tolist()}
+            else:
+                km = float(haversine_km(lonlat[0, 1], lonlat[0, 0], lonlat[1, 1], lonlat[1, 0]))
+                body = {'code': 'Ok', 'routes': [{'duration': km / 30 * 3600, 'distance': km * 1000,
+                                                  'geometry': encode_polyline(lonlat[:, ::-1])}]}
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', type=int, default=12)
+    parser.add_argument('--resolution', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='Segundos por solicitud del servidor local')
+    parser.add_argument('--legacy-sample', type=int, default=100, help='Pares consultados con get_route_osrm (se extrapola)')
+    args = parser.parse_args()
+
+    state = {'latency': args.latency, 'requests': 0}
+    server = _serve(state)
+    ENDPOINTS['osrm']['base_url'] = f"http://127.0.0.1:{server.server_port}"
+    ENDPOINTS['osrm'].pop('rate', None)  # El límite de 1/s es del servidor público, no del local
+    feed_cache.FEED_DIR = tempfile.mkdtemp()
+    feed_cache.BLOCKING_REFRESH = True
+
+    rng = np.random.default_rng(0)
+    infra = pd.DataFrame({
+        'lat': rng.uniform(BOUNDS[0], BOUNDS[1], args.stations),
+        'lon': rng.uniform(BOUNDS[2], BOUNDS[3], args.stations),
+        'tipo': 'Bomberos', 'nombre': [f"Estación {i + 1}" for i in range(args.stations)],
+    })
+    n_cells = args.resolution ** 2
+    print(f"{args.stations} estaciones, malla {args.resolution}x{args.resolution}, {args.latency * 1000:.0f} ms por solicitud")
+
+    # Método anterior: una solicitud por par celda-estación
+    cells = rng.uniform([BOUNDS[0], BOUNDS[2]], [BOUNDS[1], BOUNDS[3]], (args.legacy_sample, 2))
+    route_cache._cache = route_cache.RouteCache(f"{feed_cache.FEED_DIR}/routes.sqlite")
+    start = time.perf_counter()
+    for lat, lon in cells:
+        get_route_osrm(infra['lat'][0], infra['lon'][0], lat, lon)
+    per_pair = (time.perf_counter() - start) / len(cells)
+    print(f"  una ruta por par: {n_cells * args.stations} solicitudes, estimado {per_pair * n_cells * args.stations:.0f}s")
+
+    state['requests'] = 0
+    start = time.perf_counter()
+    routed = build_coverage(infra, *BOUNDS, resolution=args.resolution, source='osrm')
+    print(f"  tabla OSRM: {state['requests']} solicitudes, {time.perf_counter() - start:.2f}s (fuente {routed.source})")
+
+    start = time.perf_counter()
+    local = build_coverage(infra, *BOUNDS, resolution=args.resolution, source='local')
+    print(f"  Dijkstra local: {time.perf_counter() - start:.2f}s, matriz {local.seconds.nbytes / 1024:.0f} KB")
+    diff = np.abs(local.best.astype(float) - routed.best.astype(float)) / 60
+    print(f"  diferencia local vs. tabla (tiempo mínimo): mediana {np.median(diff):.1f} min")
+
+    points = rng.uniform([BOUNDS[0], BOUNDS[2]], [BOUNDS[1], BOUNDS[3]], (1_000_000, 2))
+    start = time.perf_counter()
+    responders = routed.nearest_responder(points[:, 0], points[:, 1])
+    t_lookup = time.perf_counter() - start
+    risk = rng.random((args.resolution, args.resolution))
+    start = time.perf_counter()
+    exposure = routed.risk_exposure(risk, routed.lat_range, routed.lon_range)
+    t_risk = time.perf_counter() - start
+    print(f"  estación más cercana para 1M puntos: {t_lookup:.2f}s ({len(responders)} filas)")
+    print(f"  cobertura a 8 min: {routed.coverage_ratio():.0%}, huecos: {len(routed.coverage_gaps())} celdas, "
+          f"cruce con la malla de riesgo {t_risk * 1000:.1f} ms ({len(exposure)} celdas expuestas)")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Ingesta de FIRMS: descarga completa + pd.read_csv + filtro (método anterior)
+vs. lectura en streaming con filtro por área (src.firms), contra un servidor
+HTTP local con un CSV sintético de Centroamérica.
+
+Uso: python -m benchmarks.bench_firms [--rows 200000] [--in-area 0.01]
+"""
+import argparse
+import http.server
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from src import feed_cache
+from src.firms import FIRMS_BBOX, FIRMS_CSV_PATH, HotspotStore, fetch_firms_hotspots
+from src.http_client import ENDPOINTS, http_get
+
+HEADER = "latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_ti5,frp,daynight"
+
+def make_firms_csv(n_rows, in_area, seed=0):
+    """CSV con la forma del feed VIIRS de 24 h; una fracción 'in_area' cae en FIRMS_BBOX."""
+    rng = np.random.default_rng(seed)
+    inside = rng.random(n_rows) < in_area
+    lat = np.where(inside, rng.uniform(FIRMS_BBOX[0], FIRMS_BBOX[1], n_rows), rng.uniform(7, 30, n_rows))
+    lon = np.where(inside, rng.uniform(FIRMS_BBOX[2], FIRMS_BBOX[3], n_rows), rng.uniform(-117, -77, n_rows))
+    minutes = rng.integers(0, 24 * 60, n_rows)
+    lines = [HEADER] + [
+        f"{a:.5f},{o:.5f},{300 + (i % 70)}.5,0.39,0.36,2026-10-{17 + (m >= 720):02d},{m // 60:02d}{m % 60:02d},N,VIIRS,n,2.0NRT,290.1,{(i % 40) / 4:.2f},{'D' if m >= 720 else 'N'}"
+        for i, (a, o, m) in enumerate(zip(lat, lon, minutes))
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+def _serve(state):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            etag = f'"{state["version"]}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = state['body']
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _measure(fn, memory=False):
+    """(resultado, segundos, pico de RAM en MB). La RAM se mide en una segunda
+    ejecución, porque tracemalloc encarece mucho los bucles de Python."""
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        _expire()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+def _expire():
+    """Vence las entradas de la caché de feeds para forzar la consulta al servidor."""
+    for entries in feed_cache._memory.values():
+        for key, entry in list(entries.items()):
+            entries[key] = dict(entry, fetched_at=0)
+
+def _legacy():
+    df = pd.read_csv(StringIO(http_get('firms', FIRMS_CSV_PATH).text))
+    lat_min, lat_max, lon_min, lon_max = FIRMS_BBOX
+    return df[(df['latitude'] >= lat_min) & (df['latitude'] <= lat_max) &
+              (df['longitude'] >= lon_min) & (df['longitude'] <= lon_max)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--in-area', type=float, default=0.01)
+    args = parser.parse_args()
+
+    state = {'version': 1, 'body': make_firms_csv(args.rows, args.in_area)}
+    server = _serve(state)
+    ENDPOINTS['firms']['base_url'] = f"http://127.0.0.1:{server.server_port}"
+    workdir = tempfile.mkdtemp()
+    feed_cache.FEED_DIR = workdir
+    feed_cache.BLOCKING_REFRESH = True
+    store = HotspotStore(f"{workdir}/hotspots")
+
+    print(f"CSV de {len(state['body']) / 2 ** 20:.1f} MB, {args.rows} filas, ~{args.in_area:.0%} en el área")
+    print(f"{'modo':<44} {'tiempo':>8} {'pico RAM':>9} {'filas':>6}")
+
+    legacy, t, mem = _measure(_legacy, memory=True)
+    print(f"{'read_csv completo + filtro':<44} {t:>7.3f}s {mem:>7.1f}MB {len(legacy):>6}")
+
+    current, t, mem = _measure(fetch_firms_hotspots, memory=True)
+    print(f"{'streaming + filtro por área':<44} {t:>7.3f}s {mem:>7.1f}MB {len(current):>6}")
+    assert len(current) == len(legacy)
+
+    new, t, _ = _measure(lambda: store.append(current))
+    print(f"{'historial: primera carga':<44} {t:>7.3f}s {'':>9} {len(new):>6}")
+
+    # Sin cambios en el servidor: 304 y ninguna detección nueva
+    _expire()
+    again, t, _ = _measure(lambda: store.append(fetch_firms_hotspots()))
+    print(f"{'revalidación sin cambios (304) + historial':<44} {t:>7.3f}s {'':>9} {len(again):>6}")
+
+    # Siguiente publicación: las mismas detecciones más 1/8 de filas nuevas
+    state['version'] += 1
+    state['body'] += make_firms_csv(args.rows // 8, args.in_area, seed=1).split(b"\n", 1)[1]
+    _expire()
+    added, t, _ = _measure(lambda: store.append(fetch_firms_hotspots()))
+    print(f"{'nueva publicación (+1/8 filas) + historial':<44} {t:>7.3f}s {'':>9} {len(added):>6}")
+    print(f"historial: {len(store.load())} detecciones únicas")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
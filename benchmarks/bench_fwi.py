@@ -0,0 +1,55 @@
+"""
+FWI sobre 1M de observaciones: calculate_fwi en un bucle vs.
+calculate_fwi_array, y un día del sistema canadiense completo (FWISystem).
+
+Uso: python -m benchmarks.bench_fwi [--size 1000000] [--days 30]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.fwi_calculator import FWISystem, calculate_fwi, calculate_fwi_array
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=30, help='Días de la serie para el modo con estado')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    temp = rng.uniform(0, 45, args.size)
+    humidity = rng.uniform(2, 100, args.size)
+    wind = rng.uniform(0, 80, args.size)
+    rain = np.where(rng.random(args.size) < 0.1, rng.exponential(4, args.size), 0)
+
+    start = time.perf_counter()
+    scalar = [calculate_fwi(t, h, w)[0] for t, h, w in zip(temp.tolist(), humidity.tolist(), wind.tolist())]
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score, code, _ = calculate_fwi_array(temp, humidity, wind)
+    t_vec = time.perf_counter() - start
+    assert np.allclose(score, scalar, rtol=1e-5)
+
+    system = FWISystem(args.size)
+    start = time.perf_counter()
+    system.update(temp, humidity, wind, rain, 6)
+    t_day = time.perf_counter() - start
+
+    n_cells = args.size // args.days
+    system = FWISystem(n_cells)
+    start = time.perf_counter()
+    for day in range(args.days):
+        system.update(temp[day::args.days][:n_cells], humidity[day::args.days][:n_cells],
+                      wind[day::args.days][:n_cells], rain[day::args.days][:n_cells], 6)
+    t_series = time.perf_counter() - start
+
+    print(f"{args.size} observaciones")
+    print(f"calculate_fwi en bucle        {t_loop:8.3f} s")
+    print(f"calculate_fwi_array           {t_vec:8.3f} s  ({t_loop / t_vec:.0f}x)")
+    print(f"FWISystem, 1 día              {t_day:8.3f} s  (FFMC/DMC/DC/ISI/BUI/FWI)")
+    print(f"FWISystem, {args.days} días x {n_cells} celdas {t_series:6.3f} s")
+
+if __name__ == '__main__':
+    main()
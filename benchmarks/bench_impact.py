@@ -0,0 +1,60 @@
+"""
+Análisis de impacto: ray casting en Python (is_point_in_polygon por edificio)
+vs. points_in_polygon / impact_indices vectorizados.
+
+Uso: python -m benchmarks.bench_impact [--buildings 100000] [--fires 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.geometry_utils import impact_indices, is_point_in_polygon, points_in_polygon
+from src.simulation import get_fire_ellipse
+
+def _ellipse(lat, lon, wind_deg, n_vertices):
+    """Elipse de get_fire_ellipse remuestreada a 'n_vertices' vértices."""
+    base = np.asarray(get_fire_ellipse(lat, lon, wind_deg, 30, hours=2))
+    center = base.mean(axis=0)
+    radius = np.abs(base - center).max(axis=0)
+    theta = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    return np.column_stack([center[0] + radius[0] * np.sin(theta), center[1] + radius[1] * np.cos(theta)])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--buildings', type=int, default=100_000)
+    parser.add_argument('--fires', type=int, default=50)
+    parser.add_argument('--legacy-sample', type=int, default=10_000,
+                        help='Edificios evaluados con el bucle original (el tiempo se extrapola)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(31.55, 31.80, args.buildings)
+    lons = rng.uniform(-106.55, -106.25, args.buildings)
+
+    print(f"{args.buildings} edificios")
+    print(f"{'vértices':>8} | {'bucle Python':>13} {'vectorizado':>12} {'aceleración':>11} | {args.fires} incendios en lote")
+    for n_vertices in (36, 360):
+        poly = _ellipse(31.70, -106.42, 45, n_vertices)
+
+        sample = min(args.legacy_sample, args.buildings)
+        t0 = time.perf_counter()
+        legacy = np.array([is_point_in_polygon(lats[i], lons[i], poly.tolist()) for i in range(sample)])
+        legacy_time = (time.perf_counter() - t0) * args.buildings / sample
+
+        t0 = time.perf_counter()
+        fast = points_in_polygon(lats, lons, poly)
+        fast_time = time.perf_counter() - t0
+        mismatches = int((legacy != fast[:sample]).sum())
+
+        fires = [_ellipse(rng.uniform(31.6, 31.75), rng.uniform(-106.5, -106.3), rng.uniform(0, 360), n_vertices)
+                 for _ in range(args.fires)]
+        t0 = time.perf_counter()
+        poly_idx, point_idx = impact_indices(fires, lats, lons)
+        batch_time = time.perf_counter() - t0
+
+        print(f"{n_vertices:>8} | {legacy_time:>12.3f}s {fast_time:>11.4f}s {legacy_time / fast_time:>10.0f}x | "
+              f"{batch_time:.4f}s, {poly_idx.size} impactos (diferencias vs. original: {mismatches})")
+
+if __name__ == '__main__':
+    main()
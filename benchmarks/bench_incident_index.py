@@ -0,0 +1,61 @@
+"""
+Consultas de rango de fechas + área: filtro de pandas sobre el historial
+completo vs. IncidentIndex (cubetas día x geohash).
+
+Uso: python -m benchmarks.bench_incident_index [--rows 10000 100000 1000000]
+"""
+import argparse
+import time
+from datetime import date
+
+from benchmarks.synthetic import make_incidents
+from src.incident_index import IncidentIndex
+
+START, END = '2019-03-01', '2021-08-31'
+START_D, END_D = date.fromisoformat(START), date.fromisoformat(END)
+BBOX = (31.65, 31.75, -106.50, -106.40)
+
+def _best(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"rango {START} a {END}, área {BBOX}; tiempos en ms (mejor de 5)")
+    print(f"{'filas':>9} {'construir':>10} | {'conteo pandas':>13} {'índice':>7} | "
+          f"{'área pandas':>11} {'índice':>7} | {'mapa pandas':>11} {'índice':>7}")
+    for n_rows in args.rows:
+        df = make_incidents(n_rows, seed=0)
+
+        start = time.perf_counter()
+        index = IncidentIndex(df)
+        t_build = (time.perf_counter() - start) * 1000
+
+        def pandas_range():
+            # Igual que el filtro original de render_tactical_dashboard
+            data = df.copy()
+            return data.loc[(data['fecha'].dt.date >= START_D) & (data['fecha'].dt.date <= END_D)]
+
+        def pandas_area():
+            data = pandas_range()
+            return len(data[data['lat'].between(*BBOX[:2]) & data['lon'].between(*BBOX[2:])])
+
+        def pandas_map():
+            # Agrupar a la misma precisión (7) que el índice, como haría el navegador
+            data = pandas_range()
+            return data.groupby([(data['lat'] / 0.00137).astype(int), (data['lon'] / 0.00137).astype(int)]).size()
+
+        print(f"{n_rows:>9} {t_build:>10.1f} | "
+              f"{_best(lambda: len(pandas_range())):>13.1f} {_best(lambda: index.count(START, END)):>7.2f} | "
+              f"{_best(pandas_area):>11.1f} {_best(lambda: index.count(START, END, BBOX, precision=7)):>7.2f} | "
+              f"{_best(pandas_map):>11.1f} {_best(lambda: index.cell_counts(START, END, precision=7)):>7.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Compara reentrenamiento completo vs. actualización incremental del modelo
+Random Forest y de las zonas de riesgo (k-means) al llegar filas nuevas.
+
+Uso: python -m benchmarks.bench_incremental_training [--sizes 1000 10000 100000]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import make_incidents
+from src.ai_model import train_fire_model, train_fire_model_incremental, update_fire_model
+from src.clustering import find_risk_clusters, fit_zone_state, update_zone_state
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--new-fraction', type=float, default=0.01, help='Fracción de filas nuevas por actualización')
+    parser.add_argument('--trees', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} {'nuevas':>7} | {'RF completo':>11} {'RF incr.':>9} | {'zonas':>8} {'MBK incr.':>9}")
+    for n in args.sizes:
+        df = make_incidents(n, seed=n)
+        n_old = n - max(1, int(n * args.new_fraction))
+        df_old = df.iloc[:n_old]
+
+        rf_full = _timed(lambda: train_fire_model(df.copy(), n_estimators=args.trees))
+        state = train_fire_model_incremental(df_old, n_estimators=args.trees)
+        rf_inc = _timed(lambda: update_fire_model(state, df))
+
+        km_full = _timed(lambda: find_risk_clusters(df, num_clusters=5))
+        cl_state = fit_zone_state(df_old, num_clusters=5)
+        km_inc = _timed(lambda: update_zone_state(cl_state, df))
+
+        print(f"{n:>9} {n - n_old:>7} | {rf_full:>10.3f}s {rf_inc:>8.3f}s | {km_full:>7.3f}s {km_inc:>8.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Tiempo de carga y memoria pico (RSS) del historial: ruta CSV original vs.
+caché Parquet tipada, con y sin proyección de columnas.
+
+Cada modo corre en un subproceso limpio para que el RSS no se contamine.
+Uso: python -m benchmarks.bench_ingest [--rows 1000000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_incidents_csv
+
+MODES = ['legacy', 'typed_build', 'typed_cached', 'typed_latlon']
+
+def _legacy_load(csv_path):
+    """Ruta original de load_historical_data (antes de la caché tipada)."""
+    df = pd.read_csv(csv_path)
+    df.rename(columns={
+        'Fecha': 'fecha', 'Dirección (Cruces)': 'direccion', 'Colonia / Sector': 'colonia',
+        'Lat': 'lat', 'Lon': 'lon', 'Tipo de Incendio': 'tipo_incidente',
+        'Causa Probable': 'causa', 'Daños': 'dano', 'Descripción / Contexto': 'descripcion',
+        'Fuente': 'fuente'
+    }, inplace=True)
+    df['fecha'] = pd.to_datetime(df['fecha'], dayfirst=True, errors='coerce')
+    df = df.dropna(subset=['lat', 'lon'])
+    df['lat'] = pd.to_numeric(df['lat'], errors='coerce')
+    df['lon'] = pd.to_numeric(df['lon'], errors='coerce')
+    return df
+
+def _peak_rss_mb():
+    """Pico de memoria del proceso. VmHWM se reinicia con exec; ru_maxrss (KiB) no."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run_mode(mode, csv_path):
+    from src.data_loader import load_historical_data
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        df = _legacy_load(csv_path)
+    elif mode == 'typed_latlon':
+        df = load_historical_data(csv_path, columns=['lat', 'lon'])
+    else:
+        df = load_historical_data(csv_path)
+    elapsed = time.perf_counter() - t0
+    rss_mb = _peak_rss_mb()
+    frame_mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{elapsed:.3f} {rss_mb:.1f} {frame_mb:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--csv')
+    args = parser.parse_args()
+
+    if args.mode:
+        _run_mode(args.mode, args.csv)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_incidents_csv(os.path.join(tmp, 'historial.csv'), args.rows)
+        env = dict(os.environ, SAPRIA_CACHE_DIR=os.path.join(tmp, 'cache'))
+        print(f"{args.rows} filas ({os.path.getsize(csv_path) / 1e6:.0f} MB CSV)")
+        print(f"{'modo':<14} {'tiempo':>8} {'RSS pico':>10} {'DataFrame':>10}")
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_ingest', '--mode', mode, '--csv', csv_path],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout.split()[-3:]
+            elapsed, rss, frame = map(float, out)
+            print(f"{mode:<14} {elapsed:>7.3f}s {rss:>8.0f}MB {frame:>8.0f}MB")
+
+if __name__ == '__main__':
+    main()
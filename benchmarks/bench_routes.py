@@ -0,0 +1,132 @@
+"""
+Rutas de despacho repetidas: una solicitud GeoJSON por par con conversión
+punto por punto (método anterior) vs. caché de rutas por celda con lote
+concurrente y sin duplicados (src.route_cache), contra un OSRM local.
+
+Uso: python -m benchmarks.bench_routes [--stations 12] [--zones 80] [--incidents 300] [--simulations 10]
+"""
+import argparse
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from src.http_client import ENDPOINTS, http_get
+from src.route_cache import RouteCache, decode_polyline, encode_polyline, get_routes
+from src.spatial_index import haversine_km
+
+BOUNDS = (31.55, 31.80, -106.55, -106.25)
+ROUTE_POINTS = 400  # Vértices por ruta (una ruta urbana de ~10 km con overview=full)
+
+def _serve(state):
+    """OSRM mínimo: 'route' con geometría GeoJSON o polilínea, a 30 km/h en línea recta."""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(state['latency'])
+            state['requests'] += 1
+            url = urlsplit(self.path)
+            lonlat = np.array([[float(v) for v in c.split(',')] for c in url.path.rsplit('/', 1)[1].split(';')])
+            line = np.linspace(lonlat[0], lonlat[1], ROUTE_POINTS)
+            km = float(haversine_km(lonlat[0, 1], lonlat[0, 0], lonlat[1, 1], lonlat[1, 0]))
+            polyline = parse_qs(url.query).get('geometries', ['geojson'])[0] == 'polyline'
+            geometry = encode_polyline(line[:, ::-1]) if polyline else {'type': 'LineString', 'coordinates': line.round(6).tolist()}
+            payload = json.dumps({'code': 'Ok', 'routes': [{'duration': km / 30 * 3600, 'distance': km * 1000,
+                                                            'geometry': geometry}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _legacy_route(start_lat, start_lon, end_lat, end_lon):
+    """Como el get_route_osrm anterior (sin la caché de feeds, que solo acertaba con coordenadas idénticas)."""
+    path = f"route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}"
+    route = http_get('osrm', path, params={'overview': 'full', 'geometries': 'geojson'}).json()['routes'][0]
+    return {"path": [[p[1], p[0]] for p in route['geometry']['coordinates']],
+            "distance": round(route['distance'] / 1000, 2), "duration": round(route['duration'] / 60)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stations', type=int, default=12)
+    parser.add_argument('--zones', type=int, default=80, help='Colonias de donde salen los incidentes')
+    parser.add_argument('--incidents', type=int, default=300, help='Incidentes por simulación')
+    parser.add_argument('--simulations', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.02, help='Segundos por solicitud del servidor local')
+    args = parser.parse_args()
+
+    state = {'latency': args.latency, 'requests': 0}
+    server = _serve(state)
+    ENDPOINTS['osrm']['base_url'] = f"http://127.0.0.1:{server.server_port}"
+    ENDPOINTS['osrm'].pop('rate', None)  # El límite de 1/s es del servidor público, no del local
+
+    rng = np.random.default_rng(0)
+    stations = rng.uniform([BOUNDS[0], BOUNDS[2]], [BOUNDS[1], BOUNDS[3]], (args.stations, 2))
+    zones = rng.uniform([BOUNDS[0], BOUNDS[2]], [BOUNDS[1], BOUNDS[3]], (args.zones, 2))
+
+    def simulation(seed):
+        """Cada incidente cae a <100 m del centro de su colonia y se despacha desde 2 estaciones."""
+        r = np.random.default_rng(seed)
+        incidents = zones[r.integers(0, args.zones, args.incidents)] + r.normal(0, 0.0004, (args.incidents, 2))
+        responders = r.integers(0, args.stations, (args.incidents, 2))
+        return [(*stations[s], *incidents[i]) for i in range(args.incidents) for s in responders[i]]
+
+    n_pairs = 2 * args.incidents
+    print(f"{args.simulations} simulaciones x {n_pairs} rutas, {args.stations} estaciones, {args.zones} colonias, "
+          f"{args.latency * 1000:.0f} ms por solicitud")
+
+    sample = simulation(0)[:100]
+    start = time.perf_counter()
+    legacy = [_legacy_route(*pair) for pair in sample]
+    per_route = (time.perf_counter() - start) / len(sample)
+    print(f"  anterior: {per_route * 1000:.1f} ms por ruta -> {per_route * n_pairs:.1f}s por simulación "
+          f"(estimado, {n_pairs} solicitudes cada una)")
+
+    cache = RouteCache(os.path.join(tempfile.mkdtemp(), 'routes.sqlite'))
+    for sim in range(args.simulations):
+        if sim == 1:
+            # Simulación 2+ con la caché en memoria ya llena; se mide también un proceso nuevo (solo disco)
+            disk = RouteCache(cache.path)
+        state['requests'] = 0
+        start = time.perf_counter()
+        routes = get_routes(simulation(sim), cache)
+        elapsed = time.perf_counter() - start
+        if sim in (0, 1, args.simulations - 1):
+            found = sum(r is not None for r in routes)
+            print(f"  caché, simulación {sim + 1}: {elapsed:.2f}s, {state['requests']} solicitudes, {found}/{len(routes)} rutas")
+    state['requests'] = 0
+    start = time.perf_counter()
+    get_routes(simulation(args.simulations), disk)
+    print(f"  proceso nuevo (solo SQLite): {time.perf_counter() - start:.2f}s, {state['requests']} solicitudes")
+
+    # Respuesta de una ruta: parsear JSON + convertir la geometría
+    line = np.asarray(legacy[0]['path'])
+    geojson = json.dumps({'routes': [{'geometry': {'coordinates': line[:, ::-1].round(6).tolist()}}]})
+    polyline = json.dumps({'routes': [{'geometry': encode_polyline(line)}]})
+    start = time.perf_counter()
+    for _ in range(200):
+        [[p[1], p[0]] for p in json.loads(geojson)['routes'][0]['geometry']['coordinates']]
+    t_geojson = (time.perf_counter() - start) / 200
+    start = time.perf_counter()
+    for _ in range(200):
+        decode_polyline(json.loads(polyline)['routes'][0]['geometry'])
+    t_polyline = (time.perf_counter() - start) / 200
+    print(f"  respuesta de {len(line)} puntos: GeoJSON {len(geojson)} B + lista {t_geojson * 1e6:.0f} us; "
+          f"polilínea {len(polyline)} B + float32 {t_polyline * 1e6:.0f} us; disco {os.path.getsize(cache.path) / 1024:.0f} KB")
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
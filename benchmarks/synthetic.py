@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Epicentros aproximados de Ciudad Juárez para generar historiales sintéticos
+_CENTERS = np.array([
+    [31.7396, -106.4808],  # Centro
+    [31.6317, -106.3225],  # Riberas del Bravo
+    [31.6658, -106.4185],  # Sur
+    [31.7100, -106.3900],  # Oriente
+    [31.6900, -106.4500],  # Poniente
+])
+_COLONIAS = ['Centro', 'Riberas del Bravo', 'El Granjero', 'Infonavit Casas Grandes', 'Anapra']
+_TIPOS = ['Residencial', 'Comercial', 'Taller / Industrial', 'Lote Baldío', 'Vehicular']
+_CAUSAS = ['Cortocircuito', 'Intencional (Provocado)', 'Accidental (Calefacción)', 'Quema de basura']
+_DANOS = ['Parciales', 'Pérdida Total', 'Menores']
+
+def make_incidents(n_rows, seed=0, start='2016-01-01', end='2026-01-01'):
+    """Historial sintético con las columnas limpias de load_historical_data."""
+    rng = np.random.default_rng(seed)
+    centers = _CENTERS[rng.integers(0, len(_CENTERS), n_rows)]
+    start_ns = pd.Timestamp(start).value
+    end_ns = pd.Timestamp(end).value
+    return pd.DataFrame({
+        'fecha': pd.to_datetime(np.sort(rng.integers(start_ns, end_ns, n_rows))).normalize(),
+        'colonia': rng.choice(_COLONIAS, n_rows),
+        'lat': centers[:, 0] + rng.normal(0, 0.02, n_rows),
+        'lon': centers[:, 1] + rng.normal(0, 0.02, n_rows),
+        'tipo_incidente': rng.choice(_TIPOS, n_rows),
+        'causa': rng.choice(_CAUSAS, n_rows),
+        'dano': rng.choice(_DANOS, n_rows),
+    })
+
+def write_incidents_csv(path, n_rows, seed=0):
+    """Escribe un historial sintético con el formato original de incendios.csv."""
+    df = make_incidents(n_rows, seed)
+    out = pd.DataFrame({
+        'Fecha': df['fecha'].dt.strftime('%d/%m/%Y'),
+        'Dirección (Cruces)': 'Sin dato',
+        'Colonia / Sector': df['colonia'],
+        'Lat': df['lat'].round(5),
+        'Lon': df['lon'].round(5),
+        'Tipo de Incendio': df['tipo_incidente'],
+        'Causa Probable': df['causa'],
+        'Daños': df['dano'],
+        'Descripción / Contexto': '',
+        'Fuente': '',
+    })
+    out.to_csv(path, index=False)
+    return path
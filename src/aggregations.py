@@ -0,0 +1,285 @@
+import numpy as np
+import pandas as pd
+
+# --- AGREGADOS EN STREAMING ---
+# Conteos que se acumulan bloque por bloque (ver iter_historical_chunks), de
+# modo que el tablero pueda trabajar con historiales más grandes que la RAM.
+
+DEFAULT_CELL_SIZE = 0.005  # grados (~500 m en Ciudad Juárez)
+
+def _accumulate(current, counts):
+    """Suma conteos alineando por llave (la primera vez solo se asigna)."""
+    return counts if current is None else current.add(counts, fill_value=0)
+
+class IncidentAggregates:
+    """
+    Acumulador de conteos por celda espacial, por mes y por colonia.
+    La memoria depende del número de llaves distintas, no del número de filas.
+    """
+
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.total = 0
+        self.bounds = None  # (lat_min, lat_max, lon_min, lon_max)
+        self._cells = None
+        self._months = None
+        self._colonias = None
+
+    def update(self, chunk):
+        """Agrega un bloque limpio del historial."""
+        if chunk.empty:
+            return self
+        self.total += len(chunk)
+
+        lat = chunk['lat'].to_numpy()
+        lon = chunk['lon'].to_numpy()
+        chunk_bounds = (float(lat.min()), float(lat.max()), float(lon.min()), float(lon.max()))
+        if self.bounds is None:
+            self.bounds = chunk_bounds
+        else:
+            self.bounds = (min(self.bounds[0], chunk_bounds[0]), max(self.bounds[1], chunk_bounds[1]),
+                           min(self.bounds[2], chunk_bounds[2]), max(self.bounds[3], chunk_bounds[3]))
+
+        cells = pd.MultiIndex.from_arrays(
+            [np.floor(lat / self.cell_size).astype('int32'), np.floor(lon / self.cell_size).astype('int32')],
+            names=['lat_idx', 'lon_idx']
+        )
+        self._cells = _accumulate(self._cells, pd.Series(1, index=cells).groupby(level=[0, 1]).sum())
+
+        if 'fecha' in chunk:
+            months = chunk['fecha'].dropna().dt.to_period('M').value_counts()
+            self._months = _accumulate(self._months, months)
+        if 'colonia' in chunk:
+            colonias = chunk['colonia'].value_counts()
+            self._colonias = _accumulate(self._colonias, colonias[colonias > 0].rename(index=str))
+        return self
+
+    def cell_counts(self):
+        """DataFrame con el centro de cada celda (lat, lon) y su 'count'."""
+        if self._cells is None:
+            return pd.DataFrame(columns=['lat', 'lon', 'count'])
+        idx = self._cells.index
+        return pd.DataFrame({
+            'lat': (idx.get_level_values('lat_idx').to_numpy() + 0.5) * self.cell_size,
+            'lon': (idx.get_level_values('lon_idx').to_numpy() + 0.5) * self.cell_size,
+            'count': self._cells.to_numpy().astype('int64')
+        })
+
+    def month_counts(self):
+        """Serie de incidentes por mes (Period 'M'), en orden cronológico."""
+        if self._months is None:
+            return pd.Series(dtype='int64')
+        return self._months.astype('int64').sort_index()
+
+    def colonia_counts(self):
+        """Serie de incidentes por colonia, de mayor a menor."""
+        if self._colonias is None:
+            return pd.Series(dtype='int64')
+        return self._colonias.astype('int64').sort_values(ascending=False)
+
+def aggregate_chunks(chunks, cell_size=DEFAULT_CELL_SIZE):
+    """Recorre un iterable de bloques (p. ej. iter_historical_chunks) y devuelve los agregados."""
+    aggregates = IncidentAggregates(cell_size)
+    for chunk in chunks:
+        aggregates.update(chunk)
+    return aggregates
+
+# --- CELDAS DE MAPA DE CALOR POR NIVEL DE ZOOM ---
+# En lugar de mandar cada incidente al navegador, se agrupan en celdas cuyo
+# tamaño equivale a unos pocos píxeles en el zoom actual. El número de celdas
+# queda acotado por 'max_cells' sin importar el tamaño del historial.
+
+HEATMAP_MIN_ZOOM = 8
+HEATMAP_MAX_ZOOM = 16
+HEATMAP_MAX_CELLS = 4000
+
+def cell_size_for_zoom(zoom, pixels=8):
+    """Grados que ocupan 'pixels' píxeles de mosaico web (256 px) en el nivel de zoom."""
+    zoom = min(max(int(zoom), HEATMAP_MIN_ZOOM), HEATMAP_MAX_ZOOM)
+    return 360.0 / (256 * 2 ** zoom) * pixels
+
+def bin_points(lats, lons, cell_size, weights=None):
+    """
+    Agrupa puntos en celdas cuadradas de 'cell_size' grados.
+    Retorna (lat, lon, count) por celda; la posición es el centroide de sus
+    puntos. Con 'weights' cada punto cuenta como su peso (p. ej. celdas finas
+    que se vuelven a agrupar en celdas más grandes).
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    weights = np.ones(lats.size) if weights is None else np.asarray(weights, dtype=np.float64)
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    lats, lons, weights = lats[valid], lons[valid], weights[valid]
+    if lats.size == 0:
+        return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+    row = np.floor(lats / cell_size).astype(np.int64)
+    col = np.floor(lons / cell_size).astype(np.int64)
+    keys = (row - row.min()) * (col.max() - col.min() + 1) + (col - col.min())
+    _, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, weights=weights)
+    lat_c = np.bincount(inverse, weights=lats * weights) / counts
+    lon_c = np.bincount(inverse, weights=lons * weights) / counts
+    return lat_c, lon_c, counts.round().astype(np.int64)
+
+def heatmap_cells(df, zoom, max_cells=HEATMAP_MAX_CELLS, pixels=8):
+    """
+    Celdas ponderadas [[lat, lon, peso], ...] para folium.plugins.HeatMap.
+    'df' son incidentes o celdas ya contadas (columna 'count', p. ej.
+    IncidentAggregates.cell_counts).
+    Si hay más de 'max_cells' celdas, se duplica el tamaño de celda (agrupando
+    las celdas ya calculadas) hasta caber.
+    El peso se normaliza al percentil 98 para que un par de celdas extremas
+    no apaguen el resto del mapa.
+    """
+    if df.empty:
+        return []
+    lats, lons = df['lat'].to_numpy(), df['lon'].to_numpy()
+    cell_size = cell_size_for_zoom(zoom, pixels)
+    lat_c, lon_c, counts = bin_points(lats, lons, cell_size, weights=df['count'].to_numpy() if 'count' in df else None)
+    while counts.size > max_cells:
+        cell_size *= 2
+        lat_c, lon_c, counts = bin_points(lat_c, lon_c, cell_size, weights=counts)
+    if counts.size == 0:
+        return []
+    weights = np.clip(counts / max(np.quantile(counts, 0.98), 1), 0, 1)
+    return np.column_stack([lat_c.round(5), lon_c.round(5), weights.round(3)]).tolist()
+
+# --- CUBO DE CONTEOS PARA LA ANALÍTICA ---
+# Incidentes por (día, colonia, tipo, causa, daño). Mes, día de la semana y
+# año se derivan del día sobre el cubo, que es mucho más chico que el
+# historial; las gráficas reciben tablas ya contadas.
+
+ROLLUP_DIMENSIONS = ('colonia', 'tipo_incidente', 'causa', 'dano')
+MISSING_LABEL = 'Sin dato'
+
+class RollupCube:
+    """
+    Cubo de conteos que se actualiza por bloques (update) conforme llegan
+    datos. Las categorías se guardan como códigos enteros con su vocabulario.
+    """
+
+    def __init__(self, dimensions=ROLLUP_DIMENSIONS):
+        self.dimensions = tuple(dimensions)
+        self.total = 0
+        self._labels = {dim: [] for dim in self.dimensions}
+        self._codes = {dim: {} for dim in self.dimensions}
+        self._table = pd.DataFrame({col: pd.Series(dtype='int32') for col in ('dia',) + self.dimensions})
+        self._table['incidentes'] = pd.Series(dtype='int64')
+        self._days = np.empty(0, dtype=np.int32)
+
+    def _encode(self, dim, values):
+        """Códigos globales de una columna, agregando al vocabulario las categorías nuevas."""
+        local, uniques = pd.factorize(values)  # Nulos -> -1
+        local = np.where(local < 0, len(uniques), local)
+        codes, labels = self._codes[dim], self._labels[dim]
+        lut = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, label in enumerate([str(u) for u in uniques] + [MISSING_LABEL]):
+            if label not in codes:
+                codes[label] = len(labels)
+                labels.append(label)
+            lut[i] = codes[label]
+        return lut[local]
+
+    def update(self, chunk):
+        """Suma un bloque del historial al cubo. Las filas sin fecha no se cuentan."""
+        if chunk.empty:
+            return self
+        fechas = pd.to_datetime(chunk['fecha'], errors='coerce').to_numpy().astype('datetime64[D]')
+        valid = ~np.isnat(fechas)
+        if not valid.any():
+            return self
+        chunk = chunk[valid]
+        self.total += len(chunk)
+
+        keys = {'dia': fechas[valid].astype(np.int64).astype(np.int32)}
+        for dim in self.dimensions:
+            keys[dim] = self._encode(dim, chunk[dim] if dim in chunk else pd.Series([None] * len(chunk)))
+        counts = pd.DataFrame(keys).groupby(list(keys), sort=False).size().rename('incidentes').reset_index()
+
+        table = pd.concat([self._table, counts], ignore_index=True) if len(self._table) else counts
+        table = table.groupby(list(keys), sort=False)['incidentes'].sum().reset_index()
+        self._table = table.sort_values('dia', kind='stable', ignore_index=True)
+        self._days = self._table['dia'].to_numpy()
+        return self
+
+    @property
+    def first_day(self):
+        return pd.Timestamp(int(self._days[0]), unit='D') if len(self._days) else None
+
+    @property
+    def last_day(self):
+        return pd.Timestamp(int(self._days[-1]), unit='D') if len(self._days) else None
+
+    def labels(self, dim):
+        """Categorías conocidas de una dimensión."""
+        return list(self._labels[dim])
+
+    def _window(self, start, end, where):
+        lo = 0 if start is None else np.searchsorted(self._days, pd.Timestamp(start).value // 86_400_000_000_000)
+        hi = len(self._days) if end is None else np.searchsorted(
+            self._days, pd.Timestamp(end).value // 86_400_000_000_000, side='right')
+        table = self._table.iloc[lo:hi]
+        for dim, values in (where or {}).items():
+            values = [values] if isinstance(values, str) else values
+            wanted = [self._codes[dim][v] for v in values if v in self._codes[dim]]
+            table = table[table[dim].isin(wanted)]
+        return table
+
+    def counts(self, by, start=None, end=None, where=None):
+        """
+        Incidentes agrupados por 'by' entre 'start' y 'end' (inclusive).
+        'by' admite las dimensiones del cubo y 'fecha', 'anio', 'mes' (1-12) y
+        'dia_semana' (0 = lunes). 'where' filtra dimensiones, p. ej. {'causa': [...]}.
+        Retorna un DataFrame con las columnas de 'by' y 'incidentes'.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        table = self._window(start, end, where)
+        dias = table['dia'].to_numpy().astype('datetime64[D]')
+        columns = {}
+        for key in by:
+            if key in self.dimensions:
+                columns[key] = pd.Categorical.from_codes(table[key].to_numpy(), categories=self._labels[key])
+            elif key == 'fecha':
+                columns[key] = dias
+            elif key == 'anio':
+                columns[key] = dias.astype('datetime64[Y]').astype(np.int64) + 1970
+            elif key == 'mes':
+                columns[key] = dias.astype('datetime64[M]').astype(np.int64) % 12 + 1
+            elif key == 'dia_semana':
+                columns[key] = (table['dia'].to_numpy() + 3) % 7  # 1970-01-01 fue jueves
+            else:
+                raise ValueError(f"Dimensión desconocida: {key}")
+        frame = pd.DataFrame(columns)
+        frame['incidentes'] = table['incidentes'].to_numpy()
+        if not by:
+            return pd.DataFrame({'incidentes': [int(frame['incidentes'].sum())]})
+        return frame.groupby(by, observed=True)['incidentes'].sum().reset_index()
+
+    def count(self, start=None, end=None, where=None):
+        """Total de incidentes en el rango."""
+        return int(self._window(start, end, where)['incidentes'].sum())
+
+def summarize_chunks(chunks, cell_size=DEFAULT_CELL_SIZE, dimensions=ROLLUP_DIMENSIONS):
+    """
+    Una sola pasada por los bloques (p. ej. iter_historical_chunks): agregados
+    por celda/mes/colonia para el mapa y las zonas, y el cubo de la analítica.
+    """
+    aggregates, cube = IncidentAggregates(cell_size), RollupCube(dimensions)
+    for chunk in chunks:
+        aggregates.update(chunk)
+        cube.update(chunk)
+    return aggregates, cube
+
+def get_rollup_cube(df, csv_path, dimensions=ROLLUP_DIMENSIONS):
+    """
+    Cubo del historial guardado en el almacén de modelos. Si al CSV solo se le
+    agregaron filas, se suman las nuevas al cubo guardado sin recontar todo.
+    """
+    from src.model_store import get_or_update
+
+    state = get_or_update(
+        'rollup_cube', csv_path, {'dimensions': list(dimensions)},
+        train_fn=lambda: {'cube': RollupCube(dimensions).update(df), 'n_rows': len(df)},
+        update_fn=lambda st_: {'cube': st_['cube'].update(df.iloc[st_['n_rows']:]), 'n_rows': len(df)}
+    )
+    return state['cube'] if state else RollupCube(dimensions).update(df)
@@ -4,8 +4,31 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import streamlit as st
+from src.model_store import get_or_train, get_or_update
+from src.storage import file_hash
 
-def train_fire_model(df):
+def _sample_negatives(df, num_negatives):
+    """Puntos aleatorios (simulación de zonas sin incidentes) dentro de los límites de los datos."""
+    lat_min, lat_max = df['lat'].min(), df['lat'].max()
+    lon_min, lon_max = df['lon'].min(), df['lon'].max()
+
+    return pd.DataFrame({
+        'lat': np.random.uniform(lat_min, lat_max, num_negatives),
+        'lon': np.random.uniform(lon_min, lon_max, num_negatives),
+        'month': np.random.randint(1, 13, num_negatives),
+        'day_of_week': np.random.randint(0, 7, num_negatives)
+    })
+
+def _positive_features(df):
+    """Variables de entrada de los incendios reales, sin modificar el DataFrame original."""
+    return pd.DataFrame({
+        'lat': df['lat'].to_numpy(),
+        'lon': df['lon'].to_numpy(),
+        'month': df['fecha'].dt.month.to_numpy(),
+        'day_of_week': df['fecha'].dt.dayofweek.to_numpy()
+    })
+
+def train_fire_model(df, n_estimators=100, random_state=42):
     """
     Entrena un modelo Random Forest usando tus datos reales.
     Genera puntos de 'no-incendio' para balancear el aprendizaje.
@@ -25,23 +48,7 @@ def train_fire_model(df):
     # 2. GENERAR DATOS NEGATIVOS (Background/Ausencia)
     # Esto es necesario para que la IA sepa distinguir zonas seguras
     # Generamos la misma cantidad de puntos aleatorios dentro de los límites de tus datos
-    lat_min, lat_max = df['lat'].min(), df['lat'].max()
-    lon_min, lon_max = df['lon'].min(), df['lon'].max()
-    
-    num_negatives = len(df)
-    
-    # Crear puntos aleatorios (simulación de zonas sin incidentes)
-    neg_lats = np.random.uniform(lat_min, lat_max, num_negatives)
-    neg_lons = np.random.uniform(lon_min, lon_max, num_negatives)
-    neg_months = np.random.randint(1, 13, num_negatives)
-    neg_days = np.random.randint(0, 7, num_negatives)
-    
-    X_neg = pd.DataFrame({
-        'lat': neg_lats,
-        'lon': neg_lons,
-        'month': neg_months,
-        'day_of_week': neg_days
-    })
+    X_neg = _sample_negatives(df, len(df))
     y_neg = pd.Series([0] * len(X_neg)) # Etiqueta 0 = Seguro
 
     # 3. UNIR Y ENTRENAR
@@ -52,7 +59,7 @@ def train_fire_model(df):
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     
     # EL MODELO (Random Forest - Como pide el PDF)
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state)
     model.fit(X_train, y_train)
     
     # Evaluar precisión
@@ -61,32 +68,177 @@ def train_fire_model(df):
     
     return model, accuracy
 
-def predict_risk_grid(model, lat_min, lat_max, lon_min, lon_max, current_date):
+def get_fire_model(csv_path, df=None, n_estimators=100, random_state=42):
     """
-    Genera una cuadrícula de predicción para visualizar el riesgo futuro
+    Devuelve (modelo, precisión) desde el almacén en disco.
+    Solo reentrena si cambió el contenido del CSV o los hiperparámetros.
     """
-    # Crear una malla de puntos sobre Juárez (Resolución 30x30)
-    lat_range = np.linspace(lat_min, lat_max, 40)
-    lon_range = np.linspace(lon_min, lon_max, 40)
-    
-    grid_points = []
-    
-    month = current_date.month
-    day = current_date.weekday()
-    
-    for lat in lat_range:
-        for lon in lon_range:
-            grid_points.append({
-                'lat': lat,
-                'lon': lon,
-                'month': month,
-                'day_of_week': day
-            })
-            
-    df_grid = pd.DataFrame(grid_points)
-    
-    # Predecir PROBABILIDAD (0 a 1)
-    probs = model.predict_proba(df_grid)[:, 1] # Tomamos la probabilidad de clase 1 (Fuego)
-    
-    df_grid['risk_prob'] = probs
-    return df_grid
\ No newline at end of file
+    params = {'n_estimators': n_estimators, 'random_state': random_state}
+
+    def _train():
+        from src.data_loader import load_historical_data
+        data = df if df is not None else load_historical_data(csv_path)
+        return train_fire_model(data, **params)
+
+    return get_or_train('fire_rf', file_hash(csv_path), params, _train)
+
+# --- ENTRENAMIENTO INCREMENTAL ---
+# El estado guarda el modelo (warm_start), cuántas filas del historial ya
+# aprendió y los puntos negativos ya sorteados, para no regenerarlos.
+
+def train_fire_model_incremental(df, n_estimators=100, random_state=42):
+    """Entrenamiento completo que deja el estado listo para actualizaciones incrementales."""
+    if df.empty:
+        return None
+
+    X_pos = _positive_features(df)
+    X_neg = _sample_negatives(df, len(df))
+    X = pd.concat([X_pos, X_neg], ignore_index=True)
+    y = np.r_[np.ones(len(X_pos), dtype=int), np.zeros(len(X_neg), dtype=int)]
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state, warm_start=True)
+    model.fit(X_train, y_train)
+
+    return {
+        'model': model,
+        'accuracy': accuracy_score(y_test, model.predict(X_test)),
+        'n_rows': len(df),
+        'negatives': X_neg
+    }
+
+def update_fire_model(state, df, trees_per_update=10, replay_size=1000):
+    """
+    Agrega 'trees_per_update' árboles entrenados con las filas nuevas del
+    historial (las posteriores a state['n_rows']) más una muestra acotada de
+    datos anteriores, para que los árboles nuevos no olviden el resto del mapa.
+    La precisión se mide sobre las filas nuevas antes de aprenderlas.
+    """
+    new_rows = df.iloc[state['n_rows']:]
+    if new_rows.empty:
+        return state
+
+    model = state['model']
+    X_new = pd.concat([_positive_features(new_rows), _sample_negatives(df, len(new_rows))], ignore_index=True)
+    y_new = np.r_[np.ones(len(new_rows), dtype=int), np.zeros(len(new_rows), dtype=int)]
+    accuracy = accuracy_score(y_new, model.predict(X_new))
+
+    # Muestra de repaso: positivos previos y sus negativos ya sorteados
+    idx = np.random.choice(state['n_rows'], min(replay_size, state['n_rows']), replace=False)
+    X_old = pd.concat([_positive_features(df.iloc[idx]), state['negatives'].iloc[idx]], ignore_index=True)
+    y_old = np.r_[np.ones(len(idx), dtype=int), np.zeros(len(idx), dtype=int)]
+
+    model.set_params(n_estimators=model.n_estimators + trees_per_update)
+    model.fit(pd.concat([X_old, X_new], ignore_index=True), np.r_[y_old, y_new])
+
+    return {
+        'model': model,
+        'accuracy': accuracy,
+        'n_rows': len(df),
+        'negatives': pd.concat([state['negatives'], X_new.iloc[len(new_rows):]], ignore_index=True)
+    }
+
+def get_fire_model_incremental(csv_path, n_estimators=100, random_state=42, trees_per_update=10):
+    """
+    Devuelve (modelo, precisión). Si al CSV solo se le agregaron filas al
+    final, actualiza el modelo guardado en lugar de reentrenarlo completo.
+    """
+    from src.data_loader import load_historical_data
+    params = {'n_estimators': n_estimators, 'random_state': random_state}
+    state = get_or_update(
+        'fire_rf_inc', csv_path, params,
+        train_fn=lambda: train_fire_model_incremental(load_historical_data(csv_path), **params),
+        update_fn=lambda st_: update_fire_model(st_, load_historical_data(csv_path), trees_per_update)
+    )
+    if state is None:
+        return None, 0
+    return state['model'], state['accuracy']
+
+# Orden de columnas con el que se entrena el modelo
+FEATURES = ['lat', 'lon', 'month', 'day_of_week']
+
+def build_grid_axes(lat_min, lat_max, lon_min, lon_max, resolution=40):
+    """
+    Ejes de la cuadrícula de riesgo. 'resolution' puede ser un entero
+    (malla cuadrada) o una tupla (filas_lat, columnas_lon).
+    """
+    if isinstance(resolution, (tuple, list)):
+        n_lat, n_lon = resolution
+    else:
+        n_lat = n_lon = resolution
+    lat_range = np.linspace(lat_min, lat_max, int(n_lat))
+    lon_range = np.linspace(lon_min, lon_max, int(n_lon))
+    return lat_range, lon_range
+
+def week_time_slices(start_date):
+    """Las 168 franjas horarias (mes, día de la semana, hora) de la semana que inicia en 'start_date'."""
+    start = pd.Timestamp(start_date).normalize()
+    return [(t.month, t.dayofweek, t.hour) for t in pd.date_range(start, periods=24 * 7, freq='h')]
+
+def _as_time_slice(value):
+    """Acepta una fecha/datetime o una tupla (mes, día_semana, hora)."""
+    if isinstance(value, tuple):
+        month, day, hour = (tuple(value) + (0,))[:3]
+        return int(month), int(day), int(hour)
+    return value.month, value.weekday(), getattr(value, 'hour', 0)
+
+def predict_risk_grid(model, lat_min, lat_max, lon_min, lon_max, current_date=None,
+                      resolution=40, time_slices=None, batch_size=65536):
+    """
+    Genera una cuadrícula de predicción para visualizar el riesgo futuro.
+
+    Las coordenadas se construyen con mallas de NumPy y la predicción corre en
+    lotes de tamaño fijo, así que la memoria no depende de la resolución.
+    Se pueden pedir muchas franjas de tiempo a la vez con 'time_slices'
+    (fechas o tuplas (mes, día_semana, hora)); si no, se usa 'current_date'.
+
+    Retorna: (risk, meta)
+      - risk: arreglo float32 de forma (n_franjas, n_lat, n_lon) con la
+        probabilidad de incendio (0 a 1).
+      - meta: dict con los ejes 'lat'/'lon', los 'bounds' y las 'time_slices'.
+    """
+    if time_slices is None:
+        time_slices = [current_date if current_date is not None else pd.Timestamp.now()]
+    slices = [_as_time_slice(ts) for ts in time_slices]
+
+    lat_range, lon_range = build_grid_axes(lat_min, lat_max, lon_min, lon_max, resolution)
+    lat_grid, lon_grid = np.meshgrid(lat_range, lon_range, indexing='ij')
+    lat_flat = lat_grid.ravel()
+    lon_flat = lon_grid.ravel()
+    n_cells = lat_flat.size
+
+    features = list(getattr(model, 'feature_names_in_', FEATURES))
+    risk = np.empty((len(slices), n_cells), dtype=np.float32)
+
+    # Franjas que el modelo no distingue (p. ej. la hora, si no es variable
+    # de entrada) comparten la misma predicción: se calcula una sola vez.
+    computed = {}
+    for s, (month, day, hour) in enumerate(slices):
+        values = {'month': month, 'day_of_week': day, 'hour': hour}
+        key = tuple(values[f] for f in features if f in values)
+        if key in computed:
+            risk[s] = risk[computed[key]]
+            continue
+        computed[key] = s
+
+        batch = np.empty((min(batch_size, n_cells), len(features)), dtype=np.float64)
+        for start in range(0, n_cells, batch_size):
+            stop = min(start + batch_size, n_cells)
+            X = batch[:stop - start]
+            for j, name in enumerate(features):
+                if name == 'lat':
+                    X[:, j] = lat_flat[start:stop]
+                elif name == 'lon':
+                    X[:, j] = lon_flat[start:stop]
+                else:
+                    X[:, j] = values[name]
+            # Probabilidad de clase 1 (Fuego)
+            risk[s, start:stop] = model.predict_proba(pd.DataFrame(X, columns=features))[:, 1]
+
+    meta = {
+        'lat': lat_range,
+        'lon': lon_range,
+        'bounds': (lat_min, lat_max, lon_min, lon_max),
+        'time_slices': slices,
+    }
+    return risk.reshape(len(slices), lat_range.size, lon_range.size), meta
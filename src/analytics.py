@@ -3,32 +3,23 @@ import pydeck as pdk
 import pandas as pd
 import altair as alt
 
-def render_tactical_dashboard(df):
+def render_tactical_dashboard(cube):
     """
     Renderiza el tablero de inteligencia histórica con filtros y gráficas.
+    Las gráficas se alimentan del cubo de conteos (RollupCube): cada cambio de
+    filtro agrupa el cubo, no el historial. Retorna el rango (inicio, fin).
     """
-    if df.empty:
+    if cube.total == 0:
         st.warning("No hay datos históricos para analizar.")
-        return df
+        return None, None
 
-    # 1. COPIA SEGURA Y EXTRACCIÓN DE FECHAS
-    data = df.copy()
-    data['fecha'] = pd.to_datetime(data['fecha'])
-
-    # MESES
     meses_es = {
         1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
         7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
     }
-    data['mes_num'] = data['fecha'].dt.month
-    data['mes_nombre'] = data['mes_num'].map(meses_es)
-
-    # DÍAS
     dias_es = {0: 'Lunes', 1: 'Martes', 2: 'Miércoles', 3: 'Jueves', 4: 'Viernes', 5: 'Sábado', 6: 'Domingo'}
-    data['dia_num'] = data['fecha'].dt.dayofweek
-    data['dia_nombre'] = data['dia_num'].map(dias_es)
 
-    # 2. FILTROS
+    # 1. FILTROS
     st.markdown("""
     <div style="background-color:white; padding:15px; border-radius:10px; border:1px solid #E5E7EB; margin-bottom:20px;">
         <h4 style="color:#374151; margin:0 0 10px 0; font-size:14px; font-weight:bold;">🔎 FILTROS DE TIEMPO</h4>
@@ -37,39 +28,46 @@ def render_tactical_dashboard(df):
     
     col_f1, col_f2 = st.columns(2)
     with col_f1:
-        min_date = data['fecha'].min().date()
-        max_date = data['fecha'].max().date()
+        min_date, max_date = cube.first_day.date(), cube.last_day.date()
         date_range = st.date_input("Rango de Fechas", [min_date, max_date])
 
-    if len(date_range) == 2:
-        mask = (data['fecha'].dt.date >= date_range[0]) & (data['fecha'].dt.date <= date_range[1])
-        data = data.loc[mask]
+    start, end = (date_range[0], date_range[1]) if len(date_range) == 2 else (None, None)
+
+    # 2. CONTEOS DEL RANGO (12 y 7 filas)
+    por_mes = cube.counts('mes', start, end)
+    por_mes['mes_nombre'] = por_mes['mes'].map(meses_es)
+    por_dia = cube.counts('dia_semana', start, end)
+    por_dia['dia_nombre'] = por_dia['dia_semana'].map(dias_es)
 
     # 3. GRÁFICAS ESTRATÉGICAS
     col_g1, col_g2 = st.columns(2, gap="medium")
 
     with col_g1:
         st.markdown("<h5 style='color:#374151; font-size:12px; font-weight:bold; text-align:center'>📅 TENDENCIA MENSUAL (Temporada de Riesgo)</h5>", unsafe_allow_html=True)
-        chart_mes = alt.Chart(data).mark_bar(color='#374151', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
+        chart_mes = alt.Chart(por_mes).mark_bar(color='#374151', cornerRadiusTopLeft=3, cornerRadiusTopRight=3).encode(
             x=alt.X('mes_nombre:N', sort=list(meses_es.values()), title='Mes'),
-            y=alt.Y('count()', title='Incidentes'),
-            tooltip=['mes_nombre', 'count()']
+            y=alt.Y('incidentes:Q', title='Incidentes'),
+            tooltip=['mes_nombre', 'incidentes']
         ).properties(height=220)
         st.altair_chart(chart_mes, use_container_width=True)
 
     with col_g2:
         st.markdown("<h5 style='color:#374151; font-size:12px; font-weight:bold; text-align:center'>📆 DÍAS DE ALTO RIESGO</h5>", unsafe_allow_html=True)
-        chart_dia = alt.Chart(data).mark_bar(color='#FACC15').encode(
+        chart_dia = alt.Chart(por_dia).mark_bar(color='#FACC15').encode(
             x=alt.X('dia_nombre:N', sort=['Lunes','Martes','Miércoles','Jueves','Viernes','Sábado','Domingo'], title='Día'),
-            y=alt.Y('count()', title='Incidentes'),
-            tooltip=['dia_nombre', 'count()']
+            y=alt.Y('incidentes:Q', title='Incidentes'),
+            tooltip=['dia_nombre', 'incidentes']
         ).properties(height=220)
         st.altair_chart(chart_dia, use_container_width=True)
 
-    return data
+    return start, end
 
-def render_3d_density_map(df):
-    if df.empty:
+def render_3d_density_map(cells, cell_size_m=150):
+    """
+    Columnas 3D sobre celdas ya contadas (DataFrame 'lat', 'lon', 'count',
+    p. ej. IncidentIndex.cell_counts): el navegador no vuelve a agrupar puntos.
+    """
+    if cells.empty:
         st.info("Sin datos para mostrar en el mapa 3D.")
         return
 
@@ -80,22 +78,26 @@ def render_3d_density_map(df):
     </div>
     """, unsafe_allow_html=True)
 
-    # CAPA HEXAGONAL CALIBRADA
+    # Color de amarillo a rojo según la densidad relativa de la celda
+    cells = cells.copy()
+    ratio = (cells['count'] / cells['count'].max()).clip(0, 1)
+    cells['g'] = ((1 - ratio) * 255).astype(int)
+    # Altura acotada a 0-1000 m para que las celdas pequeñas no desaparezcan
+    cells['altura'] = ratio * 1000
+
+    # CAPA DE COLUMNAS CALIBRADA
     layer = pdk.Layer(
-        "HexagonLayer",
-        df,
+        "ColumnLayer",
+        cells,
         get_position=["lon", "lat"],
+        get_elevation="altura",
         auto_highlight=True,
-        # 1. BAJAMOS LA ESCALA DE ALTURA (Antes 30 -> Ahora 10)
-        elevation_scale=10,
+        elevation_scale=1,
         pickable=True,
-        # 2. ACOTAMOS EL RANGO PARA QUE LOS PEQUEÑOS NO DESAPAREZCAN
-        elevation_range=[0, 1000], 
         extruded=True,
         coverage=1,
-        radius=30, 
-        # Color: Gradiente de Rojo a Amarillo (Más visible)
-        get_fill_color="[255, (1 - elevationValue / 200) * 255, 0, 200]",
+        radius=cell_size_m / 2,
+        get_fill_color="[255, g, 0, 200]",
     )
 
     view_state = pdk.ViewState(
@@ -108,7 +110,7 @@ def render_3d_density_map(df):
     r = pdk.Deck(
         layers=[layer],
         initial_view_state=view_state,
-        tooltip={"text": "Densidad: {elevationValue} incidentes"},
+        tooltip={"text": "Densidad: {count} incidentes"},
         map_style=pdk.map_styles.CARTO_DARK
     )
     
@@ -0,0 +1,164 @@
+"""
+Generación masiva de reportes por zona para la entrega de turno.
+
+Uso:
+    python -m src.batch_reports --by colonia --out reportes.zip
+    python -m src.batch_reports --by epicentro --clusters 20 --merged --out turno.pdf
+"""
+import argparse
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.report_generator import generate_zone_report, generate_zone_reports_merged
+
+TOP_N = 5
+
+def _top_counts(data, column):
+    """Top-N (etiqueta, conteo) de 'column' por zona, en un solo groupby."""
+    counts = data.groupby(['zona', column], sort=False).size()
+    top = counts.sort_values(ascending=False, kind='stable').groupby(level=0, sort=False).head(TOP_N)
+    result = {}
+    for (zona, label), n in top.items():
+        result.setdefault(zona, []).append((str(label), int(n)))
+    return result
+
+def assign_epicentros(df, epicentros):
+    """Etiqueta cada incidente con el id del epicentro más cercano (distancia de gran círculo)."""
+    from src.spatial_index import SpatialIndex
+
+    index = SpatialIndex([ep['lat'] for ep in epicentros], [ep['lon'] for ep in epicentros])
+    _, idx = index.nearest(df['lat'].to_numpy(), df['lon'].to_numpy(), k=1)
+    ids = np.array([ep['id'] for ep in epicentros])
+    return pd.Series(ids[idx[:, 0]], index=df.index)
+
+def build_zone_specs(df, by='colonia', epicentros=None, fwi_cat='--', nasa_count=0):
+    """
+    Un dict por zona con lo que imprime render_zone_page. Los conteos salen de
+    un solo groupby por dimensión, no de filtrar el DataFrame zona por zona.
+    """
+    if df.empty:
+        return []
+    if by == 'epicentro':
+        if not epicentros:
+            return []
+        zones = assign_epicentros(df, epicentros).map(lambda i: f"Epicentro {i}")
+    else:
+        zones = df['colonia'].astype(object).fillna('Sin colonia').astype(str)
+
+    data = pd.DataFrame({
+        'zona': zones.to_numpy(),
+        'fecha': df['fecha'].to_numpy(),
+        'causa': df['causa'].astype(str).to_numpy(),
+        'tipo': df['tipo_incidente'].astype(str).to_numpy(),
+    })
+    totals = data.groupby('zona').size()
+    ultimos = data.groupby('zona')['fecha'].max()
+    causas = _top_counts(data, 'causa')
+    tipos = _top_counts(data, 'tipo')
+
+    emitido = datetime.now().strftime("%d/%m/%Y %H:%M hrs")
+    specs = []
+    for zona, total in totals.sort_values(ascending=False).items():
+        ultimo = ultimos.get(zona)
+        specs.append({
+            'titulo': zona,
+            'total': int(total),
+            'ultimo': ultimo.strftime('%d/%m/%Y') if pd.notna(ultimo) else '--',
+            'causas': causas.get(zona, []),
+            'tipos': tipos.get(zona, []),
+            'fwi_cat': fwi_cat,
+            'nasa_count': int(nasa_count),
+            'emitido': emitido,
+        })
+    return specs
+
+def _render_chunk(specs):
+    """Tarea de cada proceso: un bloque de zonas -> [(nombre, bytes)]."""
+    return [(report_filename(spec), generate_zone_report(spec)) for spec in specs]
+
+def report_filename(spec):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', spec['titulo']).strip('_') or 'zona'
+    return f"Reporte_{slug}.pdf"
+
+def iter_zone_reports(specs, workers=None, chunk_size=16):
+    """
+    Genera los reportes en un pool de procesos, en bloques de 'chunk_size'
+    zonas por tarea. Entrega (nombre, bytes) en orden, conforme van saliendo.
+    """
+    chunks = [specs[i:i + chunk_size] for i in range(0, len(specs), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _render_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_render_chunk, chunks):
+            yield from results
+
+def write_reports_zip(specs, out, workers=None, chunk_size=16):
+    """Escribe cada reporte en el zip 'out' (ruta o archivo) según se genera. Retorna el número de reportes."""
+    count = 0
+    used = set()
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in iter_zone_reports(specs, workers, chunk_size):
+            base, n = name, 1
+            while name in used:
+                n += 1
+                name = base.replace('.pdf', f'_{n}.pdf')
+            used.add(name)
+            zf.writestr(name, data)
+            count += 1
+    return count
+
+def write_merged_report(specs, out_path):
+    """Un solo PDF con una página por zona."""
+    with open(out_path, 'wb') as f:
+        f.write(generate_zone_reports_merged(specs))
+    return len(specs)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes PDF por zona para entrega de turno")
+    parser.add_argument('--csv', default='incendios.csv')
+    parser.add_argument('--by', choices=['colonia', 'epicentro'], default='colonia')
+    parser.add_argument('--clusters', type=int, default=None, help='Número de epicentros (con --by epicentro; automático si se omite)')
+    parser.add_argument('--out', default='reportes_turno.zip')
+    parser.add_argument('--merged', action='store_true', help='Un solo PDF en lugar de un zip')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from src.data_loader import load_historical_data
+    from src.ml_engine import get_risk_clusters
+    from src.snapshots import read_snapshot
+    from src.storage import file_hash
+
+    df = load_historical_data(args.csv)
+    if df.empty:
+        print(f"Sin datos en {args.csv}")
+        return 1
+
+    # Clima y FIRMS del último snapshot del worker, si existe (sin llamar APIs)
+    snapshot = read_snapshot('dashboard')
+    snap = snapshot['payload'] if snapshot else {}
+    fwi_cat = snap['fwi'][1] if snap.get('fwi') else '--'
+    nasa = snap.get('df_nasa')
+    epicentros = None
+    if args.by == 'epicentro':
+        epicentros = get_risk_clusters(df, num_clusters=args.clusters, data_version=file_hash(args.csv))
+
+    specs = build_zone_specs(df, args.by, epicentros, fwi_cat, 0 if nasa is None else len(nasa))
+    if args.merged:
+        n = write_merged_report(specs, args.out)
+    else:
+        n = write_reports_zip(specs, args.out, workers=args.workers)
+    print(f"{n} reportes -> {os.path.abspath(args.out)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
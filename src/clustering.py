@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN, HDBSCAN, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+from src.incident_index import IncidentIndex
+from src.spatial_index import EARTH_RADIUS_KM
+
+# --- ZONAS DE RIESGO (CLUSTERING ESPACIAL) ---
+# Los métodos no agrupan incidentes sueltos sino las celdas geohash del
+# IncidentIndex (precisión 7, ~150 m) ponderadas por su número de incidentes
+# en la ventana de fechas pedida: 1M de incidentes se reduce a unas decenas
+# de miles de celdas sin perder densidad.
+#   - 'kmeans': MiniBatchKMeans en km (no en grados); con num_clusters=None
+#     se elige k por silueta sobre una muestra ponderada.
+#   - 'dbscan': DBSCAN haversine sobre BallTree; 'eps_km' es el radio y
+#     'min_incidents' la densidad mínima (cuenta los pesos de las celdas).
+#   - 'hdbscan': HDBSCAN haversine; sklearn no admite pesos aquí, así que se
+#     agrupan celdas más gruesas (precisión 6, ~1 km) y solo las densas: las
+#     que tienen al menos 'min_cell_incidents' (por defecto, la mediana).
+# Las estadísticas por zona (incidentes, último incidente, causa dominante)
+# salen de un solo groupby sobre las filas de la ventana.
+
+CLUSTER_METHODS = ('kmeans', 'dbscan', 'hdbscan')
+CELL_PRECISION = 7
+AUTO_K_RANGE = (3, 10)
+SILHOUETTE_SAMPLE = 1000
+DBSCAN_EPS_KM = 0.5
+HDBSCAN_MIN_CELLS = 10
+HDBSCAN_PRECISION = 6
+
+def _to_km(lats, lons, lat0, lon0):
+    """Proyección local equirectangular (km); suficiente a escala de ciudad."""
+    return np.column_stack([
+        (np.asarray(lons, dtype=np.float64) - lon0) * np.radians(EARTH_RADIUS_KM) * np.cos(np.radians(lat0)),
+        (np.asarray(lats, dtype=np.float64) - lat0) * np.radians(EARTH_RADIUS_KM),
+    ])
+
+def choose_k(xy, weights, k_range=AUTO_K_RANGE, seed=42):
+    """
+    Número de zonas con mejor silueta. Cada k se ajusta sobre las celdas
+    ponderadas y se evalúa en una muestra de celdas tomada según su peso.
+    Retorna (k, modelo ajustado).
+    """
+    rng = np.random.default_rng(seed)
+    # Con pocas celdas el rango se recorta a lo que la silueta admite (k < número de celdas)
+    k_min, k_max = min(k_range[0], len(xy) - 1), min(k_range[1], len(xy) - 1)
+    sample = rng.choice(len(xy), size=min(SILHOUETTE_SAMPLE, len(xy)), p=weights / weights.sum())
+    best = (-np.inf, None, None)
+    for k in range(max(k_min, 2), k_max + 1):
+        model = MiniBatchKMeans(n_clusters=k, random_state=seed, n_init=3, batch_size=4096)
+        model.fit(xy, sample_weight=weights)
+        labels = model.predict(xy[sample])
+        if not 2 <= len(np.unique(labels)) < len(sample):
+            continue
+        score = silhouette_score(xy[sample], labels)
+        if score > best[0]:
+            best = (score, k, model)
+    return best[1], best[2]
+
+def fit_kmeans(xy, weights, num_clusters=None, seed=42):
+    """
+    MiniBatchKMeans ponderado; con num_clusters=None elige k por silueta y,
+    si no hay k evaluable (muy pocas celdas), usa k fijo. k nunca supera el
+    número de celdas.
+    """
+    if num_clusters is None:
+        _, model = choose_k(xy, weights, seed=seed)
+        if model is not None:
+            return model
+        num_clusters = AUTO_K_RANGE[0]
+    model = MiniBatchKMeans(n_clusters=min(num_clusters, len(xy)), random_state=seed, n_init=3, batch_size=4096)
+    return model.fit(xy, sample_weight=weights)
+
+def cluster_cells(cells, method='kmeans', num_clusters=None, eps_km=DBSCAN_EPS_KM, min_incidents=None,
+                  min_cell_incidents=None, seed=42):
+    """
+    Etiqueta de zona de cada celda (-1 = ruido, solo DBSCAN/HDBSCAN).
+    'cells' es un DataFrame 'lat', 'lon', 'count' (IncidentIndex.cell_counts).
+    """
+    if method not in CLUSTER_METHODS:
+        raise ValueError(f"Método de clustering desconocido: {method}")
+    weights = cells['count'].to_numpy(dtype=np.float64)
+    lats, lons = cells['lat'].to_numpy(), cells['lon'].to_numpy()
+    labels = np.full(len(cells), -1, dtype=np.int64)
+
+    if method == 'kmeans':
+        xy = _to_km(lats, lons, np.average(lats, weights=weights), np.average(lons, weights=weights))
+        return fit_kmeans(xy, weights, num_clusters, seed).predict(xy)
+
+    coords = np.radians(np.column_stack([lats, lons]))
+    if method == 'dbscan':
+        if min_incidents is None:
+            min_incidents = max(5, int(weights.sum() // 200))
+        model = DBSCAN(eps=eps_km / EARTH_RADIUS_KM, min_samples=min_incidents,
+                       metric='haversine', algorithm='ball_tree')
+        return model.fit_predict(coords, sample_weight=weights)
+
+    if min_cell_incidents is None:
+        min_cell_incidents = np.median(weights)
+    dense = np.flatnonzero(weights >= min_cell_incidents)
+    if len(dense) >= HDBSCAN_MIN_CELLS:
+        model = HDBSCAN(min_cluster_size=HDBSCAN_MIN_CELLS, metric='haversine', copy=False)
+        labels[dense] = model.fit_predict(coords[dense])
+    return labels
+
+def cluster_stats(df, rows, row_labels):
+    """
+    Estadísticas por zona con un solo groupby sobre (zona, causa):
+    'incidentes', 'ultimo' (fecha más reciente) y 'causa_dominante'.
+    """
+    if 'causa' in df:
+        causa = df['causa']
+        if isinstance(causa.dtype, pd.CategoricalDtype):
+            # load_historical_data carga 'causa' como categoría: basta con sus códigos
+            codes, names = causa.cat.codes.to_numpy()[rows], causa.cat.categories
+        else:
+            codes, names = pd.factorize(causa.to_numpy()[rows])
+    else:
+        codes, names = np.zeros(len(rows), dtype=np.int64), pd.Index(['Sin dato'])
+    keep = row_labels >= 0
+    zone = row_labels[keep].astype(np.int64)
+    # Llave entera única (zona, causa): el groupby no toca cadenas
+    key = zone * (len(names) + 1) + (codes[keep].astype(np.int64) + 1)
+    grouped = pd.DataFrame({'key': key, 'fecha': df['fecha'].to_numpy()[rows[keep]]}).groupby('key', sort=False)['fecha'].agg(['size', 'max'])
+    # El resto son operaciones sobre la tabla (zona, causa), de pocas filas
+    keys = grouped.index.to_numpy()
+    table = pd.DataFrame({'zona': keys // (len(names) + 1), 'causa': keys % (len(names) + 1) - 1,
+                          'n': grouped['size'].to_numpy(), 'ultimo': grouped['max'].to_numpy()})
+    table = table.sort_values(['zona', 'n'], ascending=[True, False], kind='stable')
+    by_zone = table.groupby('zona', sort=True)
+    dominant = by_zone['causa'].first()
+    return pd.DataFrame({
+        'incidentes': by_zone['n'].sum(),
+        'ultimo': by_zone['ultimo'].max(),
+        'causa_dominante': [names[c] if c >= 0 else 'Sin dato' for c in dominant],
+    }, index=dominant.index)
+
+def zone_geometry(cells, labels):
+    """
+    Centro ponderado, incidentes y radio (km, percentil 90 de la distancia de
+    sus incidentes) de cada zona, a partir de las celdas etiquetadas.
+    """
+    valid = labels >= 0
+    weights = cells['count'].to_numpy(dtype=np.float64)[valid]
+    lats, lons, zone = cells['lat'].to_numpy()[valid], cells['lon'].to_numpy()[valid], labels[valid]
+    n_zones = int(zone.max()) + 1 if len(zone) else 0
+    total_w = np.bincount(zone, weights=weights, minlength=n_zones)
+    center_lat = np.bincount(zone, weights=weights * lats, minlength=n_zones) / np.maximum(total_w, 1)
+    center_lon = np.bincount(zone, weights=weights * lons, minlength=n_zones) / np.maximum(total_w, 1)
+    dist = np.hypot(*_to_km(lats, lons, center_lat[zone], center_lon[zone]).T)
+
+    radio = np.zeros(n_zones)
+    for z in np.unique(zone):
+        in_zone = zone == z
+        order = np.argsort(dist[in_zone])
+        cum = np.cumsum(weights[in_zone][order])
+        radio[z] = dist[in_zone][order][np.searchsorted(cum, 0.9 * cum[-1])]
+    zones = pd.DataFrame({'lat': center_lat, 'lon': center_lon, 'incidentes': total_w.astype(np.int64),
+                          'radio_km': radio.round(2)}, index=pd.RangeIndex(n_zones, name='zona'))
+    return zones[zones['incidentes'] > 0]
+
+def _epicentros(zones):
+    """Lista de epicentros (dicts), de la zona con más incidentes a la de menos."""
+    zones = zones.sort_values('incidentes', ascending=False, kind='stable')
+    mean = zones['incidentes'].sum() / max(len(zones), 1)
+    clusters = []
+    for _, row in zones.iterrows():
+        clusters.append({
+            "id": len(clusters) + 1,
+            "lat": float(row['lat']),
+            "lon": float(row['lon']),
+            "weight": int(row['incidentes']),
+            "peligro": "CRÍTICO" if row['incidentes'] > mean * 1.2 else "ALTO",
+            "radio_km": float(row['radio_km']),
+        })
+        if 'ultimo' in zones:
+            clusters[-1]["ultimo"] = pd.Timestamp(row['ultimo'])
+            clusters[-1]["causa_dominante"] = row['causa_dominante']
+    return clusters
+
+def zones_from_cells(cells, method='kmeans', num_clusters=None, eps_km=DBSCAN_EPS_KM, min_incidents=None):
+    """
+    Zonas de riesgo a partir de celdas ya contadas ('lat', 'lon', 'count'),
+    p. ej. IncidentAggregates.cell_counts de un archivo leído por bloques.
+    Sin filas no hay fechas ni causas: cada epicentro trae id, lat, lon,
+    weight, peligro y radio_km.
+    """
+    if len(cells) < 2:
+        return []
+    labels = cluster_cells(cells, method, num_clusters, eps_km, min_incidents)
+    return _epicentros(zone_geometry(cells, labels))
+
+def find_risk_clusters(df, method='kmeans', num_clusters=None, start=None, end=None, index=None,
+                       eps_km=DBSCAN_EPS_KM, min_incidents=None, precision=None, zone_state=None):
+    """
+    Zonas de riesgo de los incidentes entre 'start' y 'end' (inclusive).
+    Retorna la lista de epicentros (id, lat, lon, weight, peligro, radio_km,
+    ultimo, causa_dominante), de la zona con más incidentes a la de menos.
+    'index' permite reutilizar un IncidentIndex ya construido para 'df'.
+    Con 'zone_state' (fit_zone_state) las celdas se asignan a sus centroides
+    en lugar de reagrupar.
+    """
+    if df.empty:
+        return []
+    if precision is None:
+        precision = HDBSCAN_PRECISION if method == 'hdbscan' else CELL_PRECISION
+    index = index or IncidentIndex(df)
+    cells = index.cell_counts(start, end, precision=precision)
+    if len(cells) < 2:
+        return []
+
+    if zone_state is not None:
+        labels = zone_state["model"].predict(_to_km(cells['lat'], cells['lon'], *zone_state["origin"]))
+    else:
+        labels = cluster_cells(cells, method, num_clusters, eps_km, min_incidents)
+    rows, cell_ids = index.rows_cells(start, end, precision=precision)
+    # Etiqueta por celda del índice completo (-1 si no hay incidentes en la ventana) y de ahí por fila
+    cell_labels = np.full(len(index.cell_codes(precision)), -1, dtype=np.int64)
+    cell_labels[np.searchsorted(index.cell_codes(precision), cells['geohash'].to_numpy())] = labels
+    stats = cluster_stats(df, rows, cell_labels[cell_ids])
+    if stats.empty:
+        return []
+    zones = zone_geometry(cells, labels).join(stats[['ultimo', 'causa_dominante']], how='inner')
+    return _epicentros(zones)
+
+# --- ZONAS INCREMENTALES (MiniBatchKMeans) ---
+# Cuando al historial solo se le agregan filas, los centroides (en km, con el
+# origen de la proyección fijo) se mueven con 'partial_fit' usando solo las
+# filas nuevas en lugar de reagrupar todo.
+
+def fit_zone_state(df, num_clusters=None, index=None, seed=42):
+    """Ajuste inicial sobre las celdas; el estado recuerda cuántas filas del historial ya se aprendieron."""
+    if df.empty:
+        return None
+    cells = (index or IncidentIndex(df)).cell_counts(precision=CELL_PRECISION)
+    if len(cells) < 2:
+        return None
+    weights = cells['count'].to_numpy(dtype=np.float64)
+    lats, lons = cells['lat'].to_numpy(), cells['lon'].to_numpy()
+    origin = (float(np.average(lats, weights=weights)), float(np.average(lons, weights=weights)))
+    model = fit_kmeans(_to_km(lats, lons, *origin), weights, num_clusters, seed)
+    return {"model": model, "origin": origin, "n_rows": len(df)}
+
+def update_zone_state(state, df):
+    """Mueve los centroides guardados con 'partial_fit' usando solo las filas nuevas."""
+    new = df.iloc[state["n_rows"]:][['lat', 'lon']].dropna()
+    if not new.empty:
+        state["model"].partial_fit(_to_km(new['lat'], new['lon'], *state["origin"]))
+    return dict(state, n_rows=len(df))
@@ -1,12 +1,23 @@
 import streamlit as st
-from datetime import datetime, timedelta
+import pandas as pd
 
 def inject_tailwind():
     st.markdown('<link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">', unsafe_allow_html=True)
 
-def render_left_alert_card(nasa_anomalies):
+def render_left_alert_card(nasa_anomalies, alerts=None):
+    """
+    Tarjeta de anomalías NASA. Con 'alerts' (correlation.hotspot_alerts) indica
+    cuántas no tienen incidente reportado en tierra y lista las prioritarias.
+    """
     if nasa_anomalies > 0:
-        html = f'<div style="background:white;padding:1rem;border-radius:0.75rem;border-left:4px solid #EF4444;margin-bottom:1rem;box-shadow:0 1px 3px rgba(0,0,0,0.1);"><div style="display:flex;justify-content:space-between;align-items:start;margin-bottom:0.5rem;"><h3 style="color:#EF4444;font-weight:700;font-size:0.875rem;margin:0;">ALERTA CRÍTICA</h3><span style="height:8px;width:8px;background:#EF4444;border-radius:50%;"></span></div><p style="color:#4B5563;font-size:0.75rem;margin:0;">NASA VIIRS detectó {nasa_anomalies} anomalías.</p></div>'
+        detalle = ""
+        if alerts:
+            detalle = f'<p style="color:#4B5563;font-size:0.75rem;margin:0.25rem 0 0 0;"><b>{alerts["sin_reporte"]}</b> sin reporte en tierra.</p>'
+            for a in alerts["alertas"][:3]:
+                zona = f' · Zona {a["epicentro"]}' if a["epicentro"] is not None else ''
+                marca = 'SIN REPORTE' if a["sin_reporte"] else f'{a["incidentes"]} incidentes'
+                detalle += f'<div style="display:flex;justify-content:space-between;font-size:0.65rem;color:#6B7280;margin-top:0.25rem;"><span>{a["lat"]:.3f}, {a["lon"]:.3f}{zona}</span><span style="color:#EF4444;font-weight:700;">{marca}</span></div>'
+        html = f'<div style="background:white;padding:1rem;border-radius:0.75rem;border-left:4px solid #EF4444;margin-bottom:1rem;box-shadow:0 1px 3px rgba(0,0,0,0.1);"><div style="display:flex;justify-content:space-between;align-items:start;margin-bottom:0.5rem;"><h3 style="color:#EF4444;font-weight:700;font-size:0.875rem;margin:0;">ALERTA CRÍTICA</h3><span style="height:8px;width:8px;background:#EF4444;border-radius:50%;"></span></div><p style="color:#4B5563;font-size:0.75rem;margin:0;">NASA VIIRS detectó {nasa_anomalies} anomalías.</p>{detalle}</div>'
         st.markdown(html, unsafe_allow_html=True)
 
 def render_factors_card(weather, fwi_cat):
@@ -30,14 +41,20 @@ def render_log_card(epicentros_ia):
     html = f'<div style="background:white;border-radius:0.75rem;box-shadow:0 1px 3px rgba(0,0,0,0.1);padding:1rem;margin-bottom:1rem;"><h2 style="font-size:0.75rem;font-weight:700;color:#1F2937;margin-bottom:1rem;">ZONAS IA</h2>{content}</div>'
     st.markdown(html, unsafe_allow_html=True)
 
-def render_forecast_section(base_temp):
+def render_forecast_section(timeline, slots=5):
+    """
+    Próximos pasos del pronóstico real (cada 3 h) con su riesgo FWI.
+    'timeline' es la salida de forecast.forecast_risk_timeline.
+    """
     items = ""
-    now = datetime.now()
-    for i in range(5):
-        ft = now + timedelta(hours=i*3)
-        val = round(base_temp - (i*0.5))
-        items += f'<div style="text-align:center;"><div style="font-size:0.65rem;color:#6B7280;font-weight:700;margin-bottom:2px;">{ft.strftime("%I %p")}</div><div style="font-size:0.9rem;font-weight:800;color:#1F2937;">{val}°</div></div>'
-    html = f'<div style="background:white;border-radius:0.75rem;box-shadow:0 1px 3px rgba(0,0,0,0.1);padding:1rem;margin-top:1rem;"><div style="display:flex;justify-content:space-between;margin-bottom:1rem;"><span style="font-size:0.65rem;font-weight:700;color:#9CA3AF;">PRONÓSTICO</span><span style="font-size:0.65rem;font-weight:700;color:#9CA3AF;">LIVE</span></div><div style="display:flex;justify-content:space-between;">{items}</div></div>'
+    if timeline is not None and not timeline.empty:
+        now = pd.Timestamp.now(tz=timeline['hora'].dt.tz)
+        upcoming = timeline[timeline['hora'] > now - pd.Timedelta(hours=3)].head(slots)
+        for row in upcoming.itertuples(index=False):
+            items += f'<div style="text-align:center;" title="{row.punto}: FWI {row.fwi:.0f}"><div style="font-size:0.65rem;color:#6B7280;font-weight:700;margin-bottom:2px;">{row.hora.strftime("%I %p")}</div><div style="font-size:0.9rem;font-weight:800;color:#1F2937;">{round(row.temp)}°</div><div style="font-size:0.55rem;font-weight:800;color:{row.color};">{row.categoria}</div></div>'
+    if not items:
+        items = '<div style="font-size:0.7rem;color:#9CA3AF;">Pronóstico no disponible</div>'
+    html = f'<div style="background:white;border-radius:0.75rem;box-shadow:0 1px 3px rgba(0,0,0,0.1);padding:1rem;margin-top:1rem;"><div style="display:flex;justify-content:space-between;margin-bottom:1rem;"><span style="font-size:0.65rem;font-weight:700;color:#9CA3AF;">PRONÓSTICO / RIESGO FWI</span><span style="font-size:0.65rem;font-weight:700;color:#9CA3AF;">OPENWEATHER 3H</span></div><div style="display:flex;justify-content:space-between;">{items}</div></div>'
     st.markdown(html, unsafe_allow_html=True)
 
 def render_footer():
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from src.spatial_index import SpatialIndex, haversine_km
+
+# --- CORRELACIÓN SATÉLITE / TIERRA ---
+# Cada detección FIRMS se compara con los incidentes reportados cerca en el
+# espacio y en el tiempo, y con los epicentros K-Means. Los incidentes se
+# indexan una vez en un KDTree de 3 dimensiones (x km, y km, día escalado):
+# una sola consulta de caja por detección devuelve los candidatos de la
+# ventana y solo esos se confirman con distancia haversine.
+
+MATCH_RADIUS_KM = 1.0       # Distancia máxima detección-incidente
+MATCH_WINDOW_DAYS = 2       # Días antes o después de la detección
+EPICENTRO_RADIUS_KM = 2.0   # Detecciones dentro de una zona de riesgo IA
+QUERY_BLOCK = 20_000        # Detecciones por consulta (memoria acotada)
+
+_KM_PER_DEG_LAT = 110.574
+_KM_PER_DEG_LON = 111.320
+_BOX_MARGIN = 1.02          # Holgura por la proyección local; se confirma con haversine
+
+_CONFIDENCE_WEIGHTS = {'l': 0.5, 'low': 0.5, 'n': 0.8, 'nominal': 0.8, 'h': 1.0, 'high': 1.0}
+_PELIGRO_WEIGHTS = {'CRÍTICO': 1.0, 'CRITICO': 1.0, 'ALTO': 0.5}
+
+def hotspot_days(hotspots):
+    """Día de adquisición (días desde 1970-01-01, int64) de cada detección."""
+    values = pd.to_datetime(hotspots['acq_date'], errors='coerce').to_numpy().astype('datetime64[D]')
+    return values.astype(np.int64)
+
+class HotspotCorrelator:
+    """
+    Índice espacio-temporal del historial de incidentes para correlacionar
+    detecciones satelitales. Se construye una vez por versión de datos.
+    """
+
+    def __init__(self, incidents, radius_km=MATCH_RADIUS_KM, window_days=MATCH_WINDOW_DAYS):
+        self.radius_km = radius_km
+        self.window_days = window_days
+        if incidents.empty:
+            lats = lons = np.empty(0)
+            days = np.empty(0, dtype=np.int64)
+            self._rows = np.empty(0, dtype=np.intp)
+        else:
+            lats = incidents['lat'].to_numpy(dtype=np.float64)
+            lons = incidents['lon'].to_numpy(dtype=np.float64)
+            days = pd.to_datetime(incidents['fecha'], errors='coerce').to_numpy().astype('datetime64[D]')
+            valid = ~np.isnat(days) & np.isfinite(lats) & np.isfinite(lons)
+            # Filas válidas referidas al DataFrame original
+            self._rows = np.flatnonzero(valid)
+            lats, lons, days = lats[valid], lons[valid], days[valid].astype(np.int64)
+        self.size = len(lats)
+        self.lat0 = float(np.mean(lats)) if self.size else 0.0
+        self.lon0 = float(np.mean(lons)) if self.size else 0.0
+        self._lats, self._lons, self._days = lats, lons, days
+        # Caja de búsqueda: |dx|, |dy| <= radio y |d_días| <= ventana + 0.5 (métrica chebyshev)
+        self._box = radius_km * _BOX_MARGIN
+        self._day_scale = self._box / (window_days + 0.5)
+        self._tree = KDTree(self._points(lats, lons, days), metric='chebyshev') if self.size else None
+
+    def _points(self, lats, lons, days):
+        return np.column_stack([
+            (np.asarray(lons, dtype=np.float64) - self.lon0) * _KM_PER_DEG_LON * np.cos(np.radians(self.lat0)),
+            (np.asarray(lats, dtype=np.float64) - self.lat0) * _KM_PER_DEG_LAT,
+            np.asarray(days, dtype=np.float64) * self._day_scale,
+        ])
+
+    def match(self, lats, lons, days):
+        """
+        Pares (detección, incidente) dentro del radio y la ventana.
+        Retorna (pos_detección, fila_incidente, dist_km, desfase_días) con la
+        fila referida al DataFrame original de incidentes.
+        """
+        empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0), np.empty(0, dtype=np.int64))
+        if self._tree is None or len(lats) == 0:
+            return empty
+        lats, lons, days = (np.asarray(v) for v in (lats, lons, days))
+        parts = []
+        for lo in range(0, len(lats), QUERY_BLOCK):
+            hi = min(lo + QUERY_BLOCK, len(lats))
+            found = self._tree.query_radius(self._points(lats[lo:hi], lons[lo:hi], days[lo:hi]), r=self._box)
+            sizes = np.fromiter((len(f) for f in found), dtype=np.intp, count=len(found))
+            if not sizes.sum():
+                continue
+            q = np.repeat(np.arange(lo, hi), sizes)
+            c = np.concatenate(found)
+            dist = haversine_km(lats[q], lons[q], self._lats[c], self._lons[c])
+            lag = self._days[c] - days[q]
+            keep = (dist <= self.radius_km) & (np.abs(lag) <= self.window_days)
+            parts.append((q[keep], c[keep], dist[keep], lag[keep]))
+        if not parts:
+            return empty
+        q, c, dist, lag = (np.concatenate(p) for p in zip(*parts))
+        return q, self._rows[c], dist, lag
+
+    def correlate(self, hotspots, epicentros=None, epicentro_radius_km=EPICENTRO_RADIUS_KM):
+        """
+        Detecciones con su correlación: incidentes en la ventana, el más
+        cercano (fila, km, desfase en días), epicentro IA que las contiene,
+        bandera 'sin_reporte' y prioridad de alerta.
+        """
+        out = hotspots.reset_index(drop=True).copy()
+        n = len(out)
+        lats = out['latitude'].to_numpy(dtype=np.float64) if n else np.empty(0)
+        lons = out['longitude'].to_numpy(dtype=np.float64) if n else np.empty(0)
+        days = hotspot_days(out) if n else np.empty(0, dtype=np.int64)
+
+        q, rows, dist, lag = self.match(lats, lons, days)
+        out['incidentes'] = np.bincount(q, minlength=n).astype(np.int64)
+        # Incidente más cercano: ordenar pares por (detección, distancia) y tomar el primero
+        order = np.lexsort((dist, q))
+        q, rows, dist, lag = q[order], rows[order], dist[order], lag[order]
+        first = np.flatnonzero(np.r_[True, q[1:] != q[:-1]]) if len(q) else np.empty(0, dtype=np.intp)
+        nearest_row = np.full(n, -1, dtype=np.int64)
+        nearest_km = np.full(n, np.nan)
+        nearest_lag = np.full(n, np.nan)
+        nearest_row[q[first]] = rows[first]
+        nearest_km[q[first]] = dist[first]
+        nearest_lag[q[first]] = lag[first]
+        out['incidente_fila'] = nearest_row
+        out['incidente_km'] = nearest_km
+        out['incidente_desfase_dias'] = nearest_lag
+
+        out['epicentro'] = pd.array([pd.NA] * n, dtype='Int64')
+        out['epicentro_km'] = np.nan
+        peligro = np.zeros(n)
+        if epicentros and n:
+            ep_index = SpatialIndex([e['lat'] for e in epicentros], [e['lon'] for e in epicentros])
+            ep_km, ep_idx = ep_index.nearest(lats, lons, k=1)
+            ep_km, ep_idx = ep_km[:, 0], ep_idx[:, 0]
+            inside = ep_km <= epicentro_radius_km
+            ids = np.array([e['id'] for e in epicentros])
+            out.loc[inside, 'epicentro'] = ids[ep_idx[inside]]
+            out['epicentro_km'] = ep_km
+            weights = np.array([_PELIGRO_WEIGHTS.get(e.get('peligro'), 0.0) for e in epicentros])
+            peligro = np.where(inside, weights[ep_idx], 0.0)
+
+        out['sin_reporte'] = out['incidentes'].to_numpy() == 0
+        out['prioridad'] = alert_priority(out, peligro)
+        return out
+
+def alert_priority(hotspots, peligro=0.0):
+    """
+    Prioridad 0-4 de cada detección: intensidad (FRP, o brillo si falta) por
+    confianza, duplicada si nadie la reportó en tierra y aumentada dentro de
+    epicentros de riesgo ('peligro' 0-1).
+    """
+    n = len(hotspots)
+    frp = pd.to_numeric(hotspots.get('frp', pd.Series(np.nan, index=hotspots.index)), errors='coerce').to_numpy(dtype=np.float64)
+    bright = pd.to_numeric(hotspots.get('bright_ti4', pd.Series(np.nan, index=hotspots.index)), errors='coerce').to_numpy(dtype=np.float64)
+    intensity = np.where(np.isfinite(frp), 1 - np.exp(-np.nan_to_num(frp) / 20.0),
+                         np.clip((np.nan_to_num(bright, nan=300.0) - 300.0) / 60.0, 0, 1))
+    confidence = hotspots['confidence'].astype(str).str.lower().map(_CONFIDENCE_WEIGHTS).fillna(0.8).to_numpy() \
+        if 'confidence' in hotspots and n else np.full(n, 0.8)
+    unreported = np.where(hotspots['sin_reporte'].to_numpy(dtype=bool), 2.0, 1.0) if n else np.empty(0)
+    return np.round(intensity * confidence * unreported * (1 + np.asarray(peligro)), 3)
+
+def rank_alerts(correlated, top=None):
+    """Detecciones ordenadas de mayor a menor prioridad (las no reportadas primero en empates)."""
+    ranked = correlated.sort_values(['prioridad', 'sin_reporte'], ascending=False, kind='stable')
+    return ranked.head(top) if top else ranked
+
+def correlate_history(correlator, start=None, end=None, epicentros=None, store=None):
+    """Correlaciona el historial local de detecciones (src.firms.HotspotStore) entre dos fechas."""
+    from src.firms import get_hotspot_store
+    store = store or get_hotspot_store()
+    return correlator.correlate(store.load(start, end), epicentros)
+
+def hotspot_alerts(correlator, hotspots, epicentros=None, top=5):
+    """
+    Resumen para el tablero: total de detecciones, cuántas no tienen
+    incidente reportado y las 'top' alertas con mayor prioridad.
+    """
+    try:
+        if hotspots is None or hotspots.empty:
+            return {"total": 0, "sin_reporte": 0, "alertas": []}
+        correlated = correlator.correlate(hotspots, epicentros)
+        alertas = rank_alerts(correlated, top)
+        return {
+            "total": len(correlated),
+            "sin_reporte": int(correlated['sin_reporte'].sum()),
+            "alertas": [
+                {
+                    "lat": float(a['latitude']), "lon": float(a['longitude']),
+                    "fecha": f"{a['acq_date']} {str(a['acq_time']).zfill(4)}",
+                    "prioridad": float(a['prioridad']),
+                    "sin_reporte": bool(a['sin_reporte']),
+                    "incidentes": int(a['incidentes']),
+                    "epicentro": None if pd.isna(a['epicentro']) else int(a['epicentro']),
+                }
+                for _, a in alertas.iterrows()
+            ],
+        }
+    except Exception as e:
+        print(f"Error correlacionando anomalías: {e}")
+        return {"total": len(hotspots) if hotspots is not None else 0, "sin_reporte": 0, "alertas": []}
@@ -0,0 +1,270 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from src.ai_model import build_grid_axes
+from src.feed_cache import feed_key, get_feed, http_fetcher
+from src.http_client import fetch_concurrently
+from src.model_store import load_model, model_key, save_model
+from src.spatial_index import haversine_km
+
+# --- COBERTURA DE ESTACIONES DE BOMBEROS ---
+# Tiempos de traslado de cada estación a cada celda de la misma malla que
+# predict_risk_grid, precalculados una vez por conjunto de estaciones:
+#   - 'osrm': API 'table' de OSRM (una matriz estaciones x ~100 celdas por
+#     solicitud, en lugar de una ruta por par incidente-estación).
+#   - 'local': Dijkstra sobre la malla (8 vecinos) con velocidad media y
+#     factor de rodeo; no usa red y sirve de respaldo y para pruebas.
+# La matriz se guarda en segundos uint16 y las consultas (estación más
+# cercana, huecos de cobertura, tiempo a la malla de riesgo) son O(1) por
+# celda: la celda sale de aritmética sobre los ejes, sin búsquedas.
+# Cada tabla OSRM se guarda por separado en la caché de feeds (disco, TTL de
+# 'osrm'): si algunas fallan, la matriz 'mixta' se guarda igual y el
+# siguiente ciclo solo vuelve a pedir las tablas que faltan.
+
+RESPONSE_TARGET_MIN = 8.0   # Meta de llegada del primer vehículo
+LOCAL_SPEED_KMH = 40.0      # Velocidad media urbana para la estimación local
+CIRCUITY = 1.3              # Rodeo de la red de calles respecto a la línea recta
+OSRM_TABLE_MAX = 100        # Coordenadas por solicitud del servidor público
+COVERAGE_RESOLUTION = 100
+UNREACHABLE = np.iinfo(np.uint16).max
+
+def station_table(df_infra):
+    """Estaciones 'Bomberos' de get_real_infrastructure, con índice 0..n-1."""
+    if df_infra is None or df_infra.empty:
+        return pd.DataFrame(columns=['lat', 'lon', 'nombre'])
+    stations = df_infra[df_infra['tipo'] == 'Bomberos']
+    return stations[['lat', 'lon', 'nombre']].reset_index(drop=True)
+
+def local_travel_times(st_lats, st_lons, lat_range, lon_range, speed_kmh=LOCAL_SPEED_KMH, circuity=CIRCUITY):
+    """
+    Segundos de cada estación a cada celda (float32, forma (n_estaciones, n_lat, n_lon))
+    por Dijkstra sobre la malla. 'speed_kmh' puede ser una malla (n_lat, n_lon).
+    """
+    n_lat, n_lon = len(lat_range), len(lon_range)
+    n_cells = n_lat * n_lon
+    lat_grid, lon_grid = np.meshgrid(lat_range, lon_range, indexing='ij')
+    speed = np.broadcast_to(np.asarray(speed_kmh, dtype=np.float64), (n_lat, n_lon))
+    cell = np.arange(n_cells).reshape(n_lat, n_lon)
+
+    rows, cols, costs = [], [], []
+    # Aristas hacia la derecha, abajo y las dos diagonales (el grafo es no dirigido)
+    for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        a = (slice(0, n_lat - di), slice(max(0, -dj), n_lon - max(0, dj)))
+        b = (slice(di, n_lat), slice(max(0, dj), n_lon - max(0, -dj)))
+        km = haversine_km(lat_grid[a], lon_grid[a], lat_grid[b], lon_grid[b])
+        hours = km * circuity / ((speed[a] + speed[b]) / 2)
+        rows.append(cell[a].ravel())
+        cols.append(cell[b].ravel())
+        costs.append(hours.ravel() * 3600)
+
+    # Cada estación es un nodo extra unido a su celda más cercana por el tramo real
+    st_lats, st_lons = np.asarray(st_lats, dtype=np.float64), np.asarray(st_lons, dtype=np.float64)
+    st_cell = _cell_index(st_lats, st_lons, lat_range, lon_range)
+    st_flat = st_cell[0] * n_lon + st_cell[1]
+    st_km = haversine_km(st_lats, st_lons, lat_grid.ravel()[st_flat], lon_grid.ravel()[st_flat])
+    rows.append(n_cells + np.arange(len(st_lats)))
+    cols.append(st_flat)
+    costs.append(st_km * circuity / speed.ravel()[st_flat] * 3600)
+
+    rows, cols, costs = np.concatenate(rows), np.concatenate(cols), np.concatenate(costs)
+    n_nodes = n_cells + len(st_lats)
+    # Costo mínimo positivo: csgraph descarta aristas de costo cero
+    graph = coo_matrix((np.maximum(costs, 1e-3), (rows, cols)), shape=(n_nodes, n_nodes)).tocsr()
+    seconds = dijkstra(graph, directed=False, indices=n_cells + np.arange(len(st_lats)))
+    return seconds[:, :n_cells].astype(np.float32).reshape(len(st_lats), n_lat, n_lon)
+
+def _table_or_none(response):
+    """JSON de la tabla solo si OSRM respondió 'Ok' (un error no se guarda en la caché)."""
+    data = response.json()
+    return data if data.get('code') == 'Ok' else None
+
+def _osrm_table_json(coords, n_sources):
+    """Una solicitud 'table' (fuentes = primeras n_sources coordenadas), desde la caché de feeds."""
+    path = "table/v1/driving/" + ";".join(f"{lon:.5f},{lat:.5f}" for lat, lon in coords)
+    params = {
+        'sources': ";".join(str(i) for i in range(n_sources)),
+        'destinations': ";".join(str(i) for i in range(n_sources, len(coords))),
+        'annotations': 'duration',
+    }
+    return get_feed('osrm', feed_key(path, params), http_fetcher('osrm', path, params, parse=_table_or_none))
+
+def osrm_travel_times(st_lats, st_lons, lat_range, lon_range, max_coords=OSRM_TABLE_MAX):
+    """
+    Segundos de cada estación a cada celda con la API 'table' de OSRM
+    (float64, forma (n_estaciones, n_lat, n_lon)); NaN donde no hubo respuesta.
+    """
+    stations = list(zip(np.asarray(st_lats, dtype=np.float64), np.asarray(st_lons, dtype=np.float64)))
+    lat_grid, lon_grid = np.meshgrid(lat_range, lon_range, indexing='ij')
+    cells = np.column_stack([lat_grid.ravel(), lon_grid.ravel()])
+    per_request = max_coords - len(stations)
+    if per_request < 1:
+        raise ValueError(f"Demasiadas estaciones para una tabla de {max_coords} coordenadas")
+
+    calls = {
+        start: (lambda chunk=cells[start:start + per_request]: _osrm_table_json(stations + [tuple(c) for c in chunk], len(stations)))
+        for start in range(0, len(cells), per_request)
+    }
+    seconds = np.full((len(stations), len(cells)), np.nan)
+    # Primera tabla como sonda: sin servicio no se encolan las demás (el límite es 1/s)
+    first = calls.pop(0)()
+    if not first:
+        return seconds.reshape(len(stations), len(lat_range), len(lon_range))
+    responses = fetch_concurrently(calls) if calls else {}
+    responses[0] = first
+    for start, data in responses.items():
+        if data and data.get('code') == 'Ok':
+            durations = np.array(data['durations'], dtype=np.float64)  # null -> nan
+            seconds[:, start:start + durations.shape[1]] = durations
+    return seconds.reshape(len(stations), len(lat_range), len(lon_range))
+
+def _cell_index(lats, lons, lat_range, lon_range):
+    """Fila y columna de la celda más cercana en una malla regular (linspace)."""
+    def axis(values, grid):
+        if len(grid) < 2:
+            return np.zeros(np.shape(values), dtype=np.intp)
+        step = (grid[-1] - grid[0]) / (len(grid) - 1)
+        return np.clip(np.rint((np.asarray(values, dtype=np.float64) - grid[0]) / step), 0, len(grid) - 1).astype(np.intp)
+    return axis(lats, lat_range), axis(lons, lon_range)
+
+class CoverageMatrix:
+    """
+    Matriz estaciones x celdas de tiempos de traslado (segundos uint16) con la
+    estación más cercana y los dos mejores tiempos de cada celda precalculados.
+    """
+
+    def __init__(self, stations, lat_range, lon_range, seconds, source='local'):
+        self.stations = stations.reset_index(drop=True)
+        self.lat_range = np.asarray(lat_range, dtype=np.float64)
+        self.lon_range = np.asarray(lon_range, dtype=np.float64)
+        self.source = source
+        seconds = np.asarray(seconds, dtype=np.float64)
+        self.seconds = np.where(np.isfinite(seconds), np.clip(np.rint(seconds), 0, UNREACHABLE - 1), UNREACHABLE).astype(np.uint16)
+        if len(self.stations):
+            order = np.argsort(self.seconds, axis=0, kind='stable')
+            self.nearest = order[0].astype(np.int16)
+            self.best = np.take_along_axis(self.seconds, order[:1], axis=0)[0]
+            # Segunda estación: respaldo cuando la primera está ocupada
+            self.second = np.take_along_axis(self.seconds, order[1:2], axis=0)[0] if len(self.stations) > 1 \
+                else np.full(self.best.shape, UNREACHABLE, dtype=np.uint16)
+        else:
+            shape = (len(self.lat_range), len(self.lon_range))
+            self.nearest = np.full(shape, -1, dtype=np.int16)
+            self.best = self.second = np.full(shape, UNREACHABLE, dtype=np.uint16)
+
+    @property
+    def shape(self):
+        return self.best.shape
+
+    def cell_index(self, lats, lons):
+        """(fila, columna) de cada punto, por aritmética sobre los ejes."""
+        return _cell_index(lats, lons, self.lat_range, self.lon_range)
+
+    @staticmethod
+    def _minutes(seconds):
+        return np.where(seconds == UNREACHABLE, np.nan, seconds / 60.0)
+
+    def travel_minutes(self, lats, lons, station=None):
+        """Minutos desde 'station' (índice) o desde la estación más cercana a cada punto."""
+        i, j = self.cell_index(lats, lons)
+        seconds = self.best[i, j] if station is None else self.seconds[station, i, j]
+        return self._minutes(seconds)
+
+    def nearest_responder(self, lats, lons):
+        """DataFrame con la estación que llega primero a cada punto, su tiempo y el de respaldo."""
+        i, j = self.cell_index(np.atleast_1d(lats), np.atleast_1d(lons))
+        idx = self.nearest[i, j].astype(np.intp)
+        names = self.stations['nombre'].to_numpy()[np.maximum(idx, 0)] if len(self.stations) else np.full(len(idx), None)
+        return pd.DataFrame({
+            'estacion': idx,
+            'nombre': np.where(idx >= 0, names, None),
+            'minutos': self._minutes(self.best[i, j]),
+            'respaldo_minutos': self._minutes(self.second[i, j]),
+        })
+
+    def coverage_ratio(self, target_min=RESPONSE_TARGET_MIN):
+        """Fracción de celdas a las que se llega dentro de la meta."""
+        return float((self.best <= target_min * 60).mean()) if self.best.size else 0.0
+
+    def coverage_gaps(self, target_min=RESPONSE_TARGET_MIN):
+        """Celdas fuera de la meta de respuesta: 'lat', 'lon', 'minutos', 'estacion'."""
+        i, j = np.nonzero(self.best > target_min * 60)
+        return pd.DataFrame({
+            'lat': self.lat_range[i],
+            'lon': self.lon_range[j],
+            'minutos': self._minutes(self.best[i, j]),
+            'estacion': self.nearest[i, j],
+        })
+
+    def risk_exposure(self, risk, risk_lat, risk_lon, target_min=RESPONSE_TARGET_MIN):
+        """
+        Cruza una malla de riesgo (n_lat, n_lon) con los tiempos de respuesta.
+        Retorna las celdas fuera de la meta ordenadas por riesgo x exceso de minutos.
+        """
+        risk = np.asarray(risk, dtype=np.float64)
+        lat_grid, lon_grid = np.meshgrid(risk_lat, risk_lon, indexing='ij')
+        if risk.shape == self.shape and np.allclose(risk_lat, self.lat_range) and np.allclose(risk_lon, self.lon_range):
+            best = self.best
+        else:
+            best = self.best[self.cell_index(lat_grid, lon_grid)]
+        minutes = self._minutes(best)
+        over = np.nan_to_num(minutes - target_min, nan=2 * target_min)
+        i, j = np.nonzero(over > 0)
+        exposure = pd.DataFrame({
+            'lat': lat_grid[i, j], 'lon': lon_grid[i, j],
+            'riesgo': risk[i, j], 'minutos': minutes[i, j],
+            'exposicion': risk[i, j] * over[i, j],
+        })
+        return exposure.sort_values('exposicion', ascending=False, ignore_index=True)
+
+def build_coverage(df_infra, lat_min, lat_max, lon_min, lon_max, resolution=COVERAGE_RESOLUTION, source='osrm'):
+    """
+    Matriz de cobertura de las estaciones de 'df_infra' sobre la malla.
+    Con source='osrm' las celdas sin respuesta se completan con la estimación local.
+    """
+    stations = station_table(df_infra)
+    lat_range, lon_range = build_grid_axes(lat_min, lat_max, lon_min, lon_max, resolution)
+    if stations.empty:
+        return CoverageMatrix(stations, lat_range, lon_range, np.empty((0, len(lat_range), len(lon_range))), source)
+    st_lats, st_lons = stations['lat'].to_numpy(), stations['lon'].to_numpy()
+    seconds = local_travel_times(st_lats, st_lons, lat_range, lon_range)
+    if source == 'osrm':
+        try:
+            routed = osrm_travel_times(st_lats, st_lons, lat_range, lon_range)
+            missing = np.isnan(routed)
+            if missing.all():
+                source = 'local'
+            elif missing.any():
+                source = 'mixta'  # Algunas tablas fallaron: esas celdas llevan la estimación local
+            seconds = np.where(missing, seconds, routed)
+        except Exception as e:
+            print(f"Error en tabla OSRM, se usa la estimación local: {e}")
+            source = 'local'
+    return CoverageMatrix(stations, lat_range, lon_range, seconds, source)
+
+def get_coverage(df_infra, lat_min, lat_max, lon_min, lon_max, resolution=COVERAGE_RESOLUTION, source='osrm'):
+    """
+    Igual que build_coverage, pero guardada en el almacén de modelos: solo se
+    recalcula si cambian las estaciones, la malla o la fuente. Una matriz
+    'mixta' (tablas OSRM fallidas) se guarda y se completa en la siguiente
+    llamada; las tablas ya obtenidas salen de la caché de feeds.
+    """
+    try:
+        stations = station_table(df_infra)
+        coords = stations[['lat', 'lon']].to_numpy(dtype=np.float64)
+        key = model_key("coverage", hashlib.sha256(coords.tobytes()).hexdigest(),
+                        {"bounds": [lat_min, lat_max, lon_min, lon_max], "resolution": resolution, "source": source})
+        stored = load_model(key)
+        if stored is not None and stored.source == source:
+            return stored
+        coverage = build_coverage(df_infra, lat_min, lat_max, lon_min, lon_max, resolution, source)
+        # Sin red (todo local) no se guarda: se reintenta en el siguiente ciclo
+        if coverage.source != 'local' or source == 'local' or stations.empty:
+            save_model(key, coverage)
+        return coverage if coverage.source != 'local' or stored is None else stored
+    except Exception as e:
+        print(f"Error calculando cobertura: {e}")
+        return None
@@ -1,7 +1,19 @@
+import hashlib
+import json
+import os
 import pandas as pd
-import requests
 import streamlit as st
-from io import StringIO
+from src.storage import CACHE_DIR, file_hash
+from src.spatial_index import nearest_facilities
+from src.feed_cache import feed_key, get_feed, http_fetcher
+from src.firms import ingest_firms
+from src.route_cache import get_route
+
+try:
+    import pyarrow  # noqa: F401  (motor de Parquet para la caché tipada)
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
 
 # --- GESTIÓN DE CLAVES (OpenWeather / NASA) ---
 try:
@@ -14,33 +26,137 @@ except ImportError:
         OPENWEATHER_KEY = ""
         NASA_KEY = ""
 
-def load_historical_data(csv_path):
-    """Carga el CSV real de incendios históricos."""
+# Mapeo de columnas del CSV original a nombres internos
+COLUMN_MAPPING = {
+    'Fecha': 'fecha', 'Dirección (Cruces)': 'direccion', 'Colonia / Sector': 'colonia',
+    'Lat': 'lat', 'Lon': 'lon', 'Tipo de Incendio': 'tipo_incidente',
+    'Causa Probable': 'causa', 'Daños': 'dano', 'Descripción / Contexto': 'descripcion',
+    'Fuente': 'fuente'
+}
+CATEGORICAL_COLUMNS = ['colonia', 'tipo_incidente', 'causa', 'dano']
+INGEST_DIR = os.path.join(CACHE_DIR, "ingest")
+
+def _parse_fechas(values):
+    """Fechas dd/mm/aaaa con formato explícito; solo lo que no coincide pasa por el parser flexible."""
+    fechas = pd.to_datetime(values, format='%d/%m/%Y', errors='coerce')
+    pending = fechas.isna() & values.notna()
+    if pending.any():
+        fechas[pending] = pd.to_datetime(values[pending], dayfirst=True, errors='coerce')
+    return fechas
+
+def clean_historical_frame(df):
+    """Renombra columnas y aplica tipos explícitos a un bloque crudo del CSV."""
+    df = df.rename(columns=COLUMN_MAPPING)
+    if 'fecha' in df:
+        df['fecha'] = _parse_fechas(df['fecha']).astype('datetime64[ns]')
+    # Convertir ANTES de descartar: así también se eliminan coordenadas no numéricas
+    df['lat'] = pd.to_numeric(df['lat'], errors='coerce').astype('float32')
+    df['lon'] = pd.to_numeric(df['lon'], errors='coerce').astype('float32')
+    df = df.dropna(subset=['lat', 'lon'])
+    for col in CATEGORICAL_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('category')
+    return df.reset_index(drop=True)
+
+def _ingest_cache_paths(csv_path):
+    base = os.path.join(INGEST_DIR, os.path.splitext(os.path.basename(csv_path))[0])
+    digest = hashlib.sha256(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:8]
+    return f"{base}-{digest}.parquet", f"{base}-{digest}.json"
+
+def _cached_parquet(csv_path):
+    """
+    Ruta del Parquet tipado del CSV; lo (re)genera si el CSV cambió.
+    Se compara primero mtime/tamaño y, si difieren, el hash del contenido
+    (un 'touch' sin cambios no obliga a reconvertir).
+    """
+    parquet_path, meta_path = _ingest_cache_paths(csv_path)
+    info = os.stat(csv_path)
+    meta = {}
+    if os.path.exists(parquet_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('mtime_ns') == info.st_mtime_ns and meta.get('size') == info.st_size:
+            return parquet_path
+
+    current_hash = file_hash(csv_path)
+    if meta.get('hash') != current_hash or not os.path.exists(parquet_path):
+        df = clean_historical_frame(pd.read_csv(csv_path, dtype=str))
+        os.makedirs(INGEST_DIR, exist_ok=True)
+        tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump({'mtime_ns': info.st_mtime_ns, 'size': info.st_size, 'hash': current_hash}, f)
+    return parquet_path
+
+def load_historical_data(csv_path, columns=None, use_cache=True):
+    """
+    Carga el CSV real de incendios históricos con tipos explícitos
+    (lat/lon float32, fecha datetime64, colonia/tipo/causa/daño categóricas).
+    La primera lectura convierte el CSV a una caché Parquet; las siguientes
+    leen solo las columnas pedidas en 'columns' (p. ej. ['lat', 'lon'] para el mapa).
+    """
     try:
-        df = pd.read_csv(csv_path)
-        # Mapeo y limpieza estándar
-        column_mapping = {
-            'Fecha': 'fecha', 'Dirección (Cruces)': 'direccion', 'Colonia / Sector': 'colonia',
-            'Lat': 'lat', 'Lon': 'lon', 'Tipo de Incendio': 'tipo_incidente',
-            'Causa Probable': 'causa', 'Daños': 'dano', 'Descripción / Contexto': 'descripcion',
-            'Fuente': 'fuente'
-        }
-        df.rename(columns=column_mapping, inplace=True)
-        df['fecha'] = pd.to_datetime(df['fecha'], dayfirst=True, errors='coerce')
-        df = df.dropna(subset=['lat', 'lon'])
-        df['lat'] = pd.to_numeric(df['lat'], errors='coerce')
-        df['lon'] = pd.to_numeric(df['lon'], errors='coerce')
-        return df
-    except:
+        if use_cache and HAS_PARQUET:
+            return pd.read_parquet(_cached_parquet(csv_path), columns=columns)
+        df = clean_historical_frame(pd.read_csv(csv_path, dtype=str))
+        return df[columns] if columns else df
+    except Exception as e:
+        print(f"Error cargando historial: {e}")
         return pd.DataFrame()
 
+def _archive_files(paths):
+    """Acepta un CSV, una carpeta (todos sus *.csv) o una lista de ambos."""
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.csv')))
+        else:
+            files.append(path)
+    return files
+
+def archive_version(paths):
+    """Versión de un archivo de historiales por (ruta, tamaño, mtime) de sus CSV, sin leerlos."""
+    stats = [(os.path.abspath(f), os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in _archive_files(paths)]
+    return hashlib.sha256(json.dumps(stats).encode('utf-8')).hexdigest()
+
+def iter_historical_chunks(paths, chunksize=100_000, columns=None):
+    """
+    Lee uno o varios CSV de historial (p. ej. exportaciones estatales de varios
+    años) en bloques de 'chunksize' filas, ya limpios y con columnas renombradas.
+    La memoria queda acotada por el tamaño del bloque, no por el archivo.
+    """
+    usecols = None
+    if columns:
+        # Solo se parsean las columnas pedidas (lat/lon siempre, para limpiar)
+        wanted = set(columns) | {'lat', 'lon'}
+        usecols = lambda name: COLUMN_MAPPING.get(name, name) in wanted
+    for path in _archive_files(paths):
+        try:
+            reader = pd.read_csv(path, dtype=str, chunksize=chunksize, usecols=usecols)
+            for chunk in reader:
+                chunk = clean_historical_frame(chunk)
+                yield chunk[columns] if columns else chunk
+        except Exception as e:
+            print(f"Error leyendo {path}: {e}")
+
 def get_weather_data(lat, lon):
     """Clima real desde OpenWeatherMap"""
     try:
         if not OPENWEATHER_KEY: return None
-        url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={OPENWEATHER_KEY}&units=metric&lang=es"
-        response = requests.get(url, timeout=5)
-        return response.json() if response.status_code == 200 else None
+        params = {'lat': lat, 'lon': lon, 'appid': OPENWEATHER_KEY, 'units': 'metric', 'lang': 'es'}
+        return get_feed('weather', feed_key(lat, lon), http_fetcher('openweather', 'weather', params))
+    except: return None
+
+def get_forecast_data(lat, lon):
+    """Pronóstico de 5 días en pasos de 3 horas (OpenWeatherMap), con caché de feed."""
+    try:
+        if not OPENWEATHER_KEY: return None
+        params = {'lat': lat, 'lon': lon, 'appid': OPENWEATHER_KEY, 'units': 'metric', 'lang': 'es'}
+        return get_feed('forecast', feed_key(lat, lon), http_fetcher('openweather', 'forecast', params))
     except: return None
 
 # --- NUEVO: INFRAESTRUCTURA REAL DESDE OPENSTREETMAP ---
@@ -50,8 +166,6 @@ def get_real_infrastructure(lat, lon, radius=8000):
     Consulta la API de Overpass (OpenStreetMap) para obtener infraestructura REAL
     en un radio de 'radius' metros alrededor de las coordenadas.
     """
-    api_url = "http://overpass-api.de/api/interpreter"
-    
     # Consulta en lenguaje Overpass QL
     # Buscamos: Gasolineras (fuel), Escuelas (school), Bomberos (fire_station), Hospitales (hospital)
     query = f"""
@@ -66,9 +180,9 @@ def get_real_infrastructure(lat, lon, radius=8000):
     """
     
     try:
-        response = requests.get(api_url, params={'data': query}, timeout=25)
-        if response.status_code == 200:
-            data = response.json().get('elements', [])
+        payload = get_feed('overpass', feed_key(lat, lon, radius), http_fetcher('overpass', params={'data': query}))
+        if payload is not None:
+            data = payload.get('elements', [])
             
             processed_data = []
             for item in data:
@@ -119,10 +233,9 @@ def get_air_quality(lat, lon):
     try:
         if not OPENWEATHER_KEY: return None
         # Endpoint de contaminación del aire
-        url = f"http://api.openweathermap.org/data/2.5/air_pollution?lat={lat}&lon={lon}&appid={OPENWEATHER_KEY}"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
+        params = {'lat': lat, 'lon': lon, 'appid': OPENWEATHER_KEY}
+        data = get_feed('air_quality', feed_key(lat, lon), http_fetcher('openweather', 'air_pollution', params))
+        if data:
             # OpenWeather devuelve: 1 (Bueno), 2 (Justo), 3 (Moderado), 4 (Pobre), 5 (Muy Pobre)
             aqi_val = data['list'][0]['main']['aqi']
             components = data['list'][0]['components'] # pm2_5, pm10, co, etc.
@@ -141,128 +254,42 @@ def get_air_quality(lat, lon):
         return None
     except: return None
 
-# --- AGREGAR AL FINAL DE src/data_loader.py ---
-
 def get_route_osrm(start_lat, start_lon, end_lat, end_lon):
     """
     Obtiene la ruta óptima de manejo entre dos puntos usando OSRM (Gratis).
-    Retorna: Geometría (lista de puntos), Duración (minutos), Distancia (km)
+    Retorna: Geometría ('path', arreglo float32 [lat, lon]), Duración (minutos), Distancia (km).
+    Las rutas se guardan por celda de origen y destino (src.route_cache);
+    para muchos pares a la vez usar route_cache.get_routes.
     """
-    # OSRM usa formato lon,lat
-    url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
-    
     try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            route = data['routes'][0]
-            
-            # Extraer datos
-            geometry = route['geometry']['coordinates'] # Ojo: OSRM devuelve [lon, lat]
-            duration_min = round(route['duration'] / 60, 1)
-            distance_km = round(route['distance'] / 1000, 2)
-            
-            # Convertir geometría a [lat, lon] para Folium
-            lat_lon_path = [[pt[1], pt[0]] for pt in geometry]
-            
-            return {
-                "path": lat_lon_path,
-                "duration": duration_min,
-                "distance": distance_km
-            }
-        return None
+        return get_route(start_lat, start_lon, end_lat, end_lon)
     except Exception as e:
         print(f"Error Routing: {e}")
         return None
 
 def find_nearest_station(incident_lat, incident_lon, df_infra):
-    """Encuentra la estación de bomberos más cercana de la lista de infraestructura."""
+    """
+    Encuentra la estación de bomberos más cercana de la lista de infraestructura.
+    Usa el índice espacial (distancia de gran círculo); la fila incluye 'dist_km'.
+    """
     if df_infra.empty: return None
-    
-    # Filtrar solo bomberos
-    bomberos = df_infra[df_infra['tipo'] == 'Bomberos'].copy()
-    if bomberos.empty: return None
-    
-    # Calcular distancia euclidiana simple para encontrar la más cercana
-    # (Para mayor precisión usaríamos Haversine, pero esto basta para selección rápida)
-    bomberos['dist'] = ((bomberos['lat'] - incident_lat)**2 + (bomberos['lon'] - incident_lon)**2)**0.5
-    nearest = bomberos.sort_values('dist').iloc[0]
-    
-    return nearest
+
+    nearest = nearest_facilities(incident_lat, incident_lon, df_infra, tipo='Bomberos', k=1)
+    if nearest.empty: return None
+
+    return nearest.drop(columns=['query_idx', 'rank']).iloc[0]
 
 def get_nasa_firms_data():
     """
-    Descarga el feed público de la NASA (FIRMS) de anomalías térmicas 
-    detectadas por satélite en las últimas 24 horas (Centroamérica y México).
+    Anomalías térmicas satelitales (NASA FIRMS, últimas 24 h) en el área de
+    Ciudad Juárez / El Paso. Cada consulta agrega las detecciones nuevas al
+    historial local (src.firms.HotspotStore).
     """
-    url = "https://firms.modaps.eosdis.nasa.gov/data/active_fire/suomi-npp-viirs-c2/csv/SUOMI_VIIRS_C2_Central_America_24h.csv"
-    
-    try:
-        # Descargar el CSV en vivo desde los servidores de la NASA
-        df_nasa = pd.read_csv(url)
-        
-        # Filtro de Bounding Box para la región de Ciudad Juárez / El Paso
-        # Ampliamos un poco el margen para ver si hay incendios acercándose por el desierto
-        lat_min, lat_max = 31.0, 32.2
-        lon_min, lon_max = -107.0, -106.0
-        
-        df_filtered = df_nasa[
-            (df_nasa['latitude'] >= lat_min) & (df_nasa['latitude'] <= lat_max) &
-            (df_nasa['longitude'] >= lon_min) & (df_nasa['longitude'] <= lon_max)
-        ]
-        
-        return df_filtered
-    except Exception as e:
-        print(f"Error de conexión con la NASA: {e}")
-        return pd.DataFrame()
-    # --- AGREGAR AL FINAL DE src/data_loader.py ---
-
-def get_nasa_firms_data():
-    """Descarga datos satelitales en vivo de la NASA (Anomalías térmicas 24h)."""
-    url = "https://firms.modaps.eosdis.nasa.gov/data/active_fire/suomi-npp-viirs-c2/csv/SUOMI_VIIRS_C2_Central_America_24h.csv"
     try:
-        df_nasa = pd.read_csv(url)
-        # Filtrar solo el área de Ciudad Juárez / El Paso
-        lat_min, lat_max = 31.0, 32.2
-        lon_min, lon_max = -107.0, -106.0
-        
-        df_filtered = df_nasa[
-            (df_nasa['latitude'] >= lat_min) & (df_nasa['latitude'] <= lat_max) &
-            (df_nasa['longitude'] >= lon_min) & (df_nasa['longitude'] <= lon_max)
-        ]
-        return df_filtered
+        current, new_rows = ingest_firms()
+        if not new_rows.empty:
+            print(f"FIRMS: {len(new_rows)} detecciones nuevas")
+        return current
     except Exception as e:
         print(f"Error NASA: {e}")
         return pd.DataFrame()
-
-        # --- AGREGAR AL FINAL DE src/data_loader.py ---
-import requests
-import math
-
-def find_nearest_station(lat, lon, df_infra):
-    """Encuentra la estación de bomberos más cercana a las coordenadas dadas."""
-    bomberos = df_infra[df_infra['tipo'] == 'Bomberos'].copy()
-    if bomberos.empty: return None
-    
-    # Cálculo de distancia básica (Pitágoras)
-    bomberos['dist'] = ((bomberos['lat'] - lat)**2 + (bomberos['lon'] - lon)**2)**0.5
-    nearest = bomberos.loc[bomberos['dist'].idxmin()]
-    return nearest
-
-def get_route_osrm(start_lat, start_lon, end_lat, end_lon):
-    """Consulta al servidor OSRM para obtener la ruta por calles."""
-    # OSRM pide primero Longitud y luego Latitud
-    url = f"http://router.project-osrm.org/route/v1/driving/{start_lon},{start_lat};{end_lon},{end_lat}?overview=full&geometries=geojson"
-    try:
-        res = requests.get(url).json()
-        if res.get('code') == 'Ok':
-            route = res['routes'][0]
-            geometry = route['geometry']['coordinates']
-            # Convertir [lon, lat] a [lat, lon] para Folium
-            path = [[p[1], p[0]] for p in geometry]
-            distance = round(route['distance'] / 1000, 2) # kilómetros
-            duration = round(route['duration'] / 60) # minutos
-            return {"path": path, "distance": distance, "duration": duration}
-    except Exception as e:
-        print(f"Error en ruteo: {e}")
-    return None
\ No newline at end of file
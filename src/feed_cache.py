@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from src.http_client import http_get
+from src.storage import CACHE_DIR
+
+# --- CACHÉ DE FEEDS (stale-while-revalidate) ---
+# Cada respuesta de un servicio externo se guarda en memoria y en disco con un
+# TTL por feed. Si el dato venció, se entrega el valor viejo de inmediato y se
+# refresca en segundo plano; solo se espera a la red cuando no hay nada guardado.
+# Las revalidaciones envían If-None-Match / If-Modified-Since cuando el
+# servicio devolvió ETag o Last-Modified.
+FEED_DIR = os.path.join(CACHE_DIR, "feeds")
+FEED_TTLS = {
+    "weather": 600,           # 10 min
+    "forecast": 1800,         # 30 min (OpenWeather publica cada 3 h)
+    "air_quality": 900,       # 15 min
+    "firms": 1800,            # 30 min
+    "overpass": 24 * 3600,    # 1 día
+    "osrm": 7 * 24 * 3600,    # 1 semana
+}
+DEFAULT_TTL = 600
+# Entradas por feed en memoria (LRU); el resto queda solo en disco. 'osrm' tiene
+# una llave por ruta o bloque de tabla, así que en memoria se guardan pocas.
+FEED_MEMORY_MAX = {"osrm": 16, "overpass": 8}
+DEFAULT_MEMORY_MAX = 64
+
+NOT_MODIFIED = object()
+
+# En procesos de fondo (worker.py) conviene refrescar de forma síncrona:
+# ahí nadie espera la respuesta y así el snapshot sale con datos frescos.
+BLOCKING_REFRESH = False
+
+_memory = {}  # feed -> OrderedDict(llave -> entrada)
+_refreshing = set()
+_lock = threading.Lock()
+_metrics = {}
+
+def _metric(feed, name, amount=1):
+    with _lock:
+        counters = _metrics.setdefault(feed, {
+            "hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0,
+            "not_modified": 0, "errors": 0, "wait_seconds": 0.0, "stale_seconds": 0.0,
+        })
+        counters[name] += amount
+
+def feed_metrics():
+    """
+    Métricas por feed: aciertos frescos, aciertos vencidos (servidos mientras se
+    refresca), fallos (el usuario esperó a la red), tiempo total de espera y
+    antigüedad acumulada de los datos vencidos servidos.
+    """
+    with _lock:
+        return {feed: dict(counters) for feed, counters in _metrics.items()}
+
+def _entry_path(feed, key):
+    return os.path.join(FEED_DIR, feed, f"{key}.pkl")
+
+def feed_key(*parts):
+    """Llave estable a partir de los parámetros de la consulta."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:24]
+
+def _remember(feed, key, entry):
+    with _lock:
+        entries = _memory.setdefault(feed, OrderedDict())
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > FEED_MEMORY_MAX.get(feed, DEFAULT_MEMORY_MAX):
+            entries.popitem(last=False)
+
+def _load_entry(feed, key):
+    with _lock:
+        entries = _memory.get(feed)
+        entry = entries.get(key) if entries is not None else None
+        if entry is not None:
+            entries.move_to_end(key)
+            return entry
+    try:
+        with open(_entry_path(feed, key), "rb") as f:
+            entry = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        return None
+    _remember(feed, key, entry)
+    return entry
+
+def _store_entry(feed, key, entry):
+    _remember(feed, key, entry)
+    path = _entry_path(feed, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error guardando caché de {feed}: {e}")
+
+def _refresh(feed, key, fetch, entry):
+    """Consulta el servicio (condicional si hay validadores) y actualiza la entrada."""
+    _metric(feed, "refreshes")
+    validators = entry.get("validators", {}) if entry else {}
+    value, new_validators = fetch(validators)
+    if value is NOT_MODIFIED and entry is not None:
+        _metric(feed, "not_modified")
+        entry = dict(entry, fetched_at=time.time(), validators=new_validators)
+    else:
+        entry = {"value": value, "fetched_at": time.time(), "validators": new_validators}
+    _store_entry(feed, key, entry)
+    return entry
+
+def _refresh_in_background(feed, key, fetch, entry):
+    with _lock:
+        if (feed, key) in _refreshing:
+            return
+        _refreshing.add((feed, key))
+
+    def _run():
+        try:
+            _refresh(feed, key, fetch, entry)
+        except Exception as e:
+            _metric(feed, "errors")
+            print(f"Error refrescando {feed}: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard((feed, key))
+
+    threading.Thread(target=_run, name=f"refresh-{feed}", daemon=True).start()
+
+def get_feed(feed, key, fetch, ttl=None, default=None):
+    """
+    Valor del feed para 'key' con política stale-while-revalidate.
+    'fetch(validators)' debe devolver (valor, validadores) o (NOT_MODIFIED, validadores).
+    Si no hay dato guardado y la consulta falla, devuelve 'default'.
+    """
+    ttl = FEED_TTLS.get(feed, DEFAULT_TTL) if ttl is None else ttl
+    entry = _load_entry(feed, key)
+    if entry is not None:
+        age = time.time() - entry["fetched_at"]
+        if age < ttl:
+            _metric(feed, "hits")
+        else:
+            _metric(feed, "stale_hits")
+            _metric(feed, "stale_seconds", age - ttl)
+            if not BLOCKING_REFRESH:
+                _refresh_in_background(feed, key, fetch, entry)
+                return entry["value"]
+            try:
+                entry = _refresh(feed, key, fetch, entry)
+            except Exception as e:
+                _metric(feed, "errors")
+                print(f"Error refrescando {feed}: {e}")
+        return entry["value"]
+
+    _metric(feed, "misses")
+    start = time.perf_counter()
+    try:
+        return _refresh(feed, key, fetch, None)["value"]
+    except Exception as e:
+        _metric(feed, "errors")
+        print(f"Error consultando {feed}: {e}")
+        return default
+    finally:
+        _metric(feed, "wait_seconds", time.perf_counter() - start)
+
+def http_fetcher(endpoint, path="", params=None, parse=None, stream=False):
+    """
+    Crea una función 'fetch' para get_feed sobre el cliente HTTP compartido.
+    Envía los validadores guardados como cabeceras condicionales y, con 304,
+    reutiliza el valor anterior. 'parse(response)' convierte la respuesta
+    (por defecto, JSON); si devuelve None se considera error y no se guarda.
+    Con 'stream' el cuerpo no se descarga completo: 'parse' lo lee por partes.
+    """
+    parse = parse or (lambda response: response.json())
+
+    def fetch(validators):
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = http_get(endpoint, path, params=params, headers=headers or None, stream=stream)
+        new_validators = {
+            "etag": response.headers.get("ETag") or validators.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or validators.get("last_modified"),
+        }
+        if response.status_code == 304:
+            response.close()
+            return NOT_MODIFIED, new_validators
+        response.raise_for_status()
+        value = parse(response)
+        if value is None:
+            raise ValueError(f"Respuesta inválida de {endpoint}")
+        return value, new_validators
+
+    return fetch
@@ -0,0 +1,147 @@
+import os
+import threading
+from io import BytesIO
+
+import pandas as pd
+
+from src.feed_cache import feed_key, get_feed, http_fetcher
+from src.storage import CACHE_DIR
+
+# --- INGESTA DE FIRMS (anomalías térmicas VIIRS) ---
+# El CSV público de 24 h cubre toda Centroamérica. Se lee en streaming y cada
+# línea se descarta por coordenadas antes de interpretar el resto de sus
+# campos, así que nunca se arma el DataFrame completo. Lo que cae en el área
+# se guarda en la caché de feeds (revalidación condicional) y se agrega a un
+# historial local sin duplicados, particionado por fecha de adquisición.
+
+FIRMS_CSV_PATH = "suomi-npp-viirs-c2/csv/SUOMI_VIIRS_C2_Central_America_24h.csv"
+FIRMS_BBOX = (31.0, 32.2, -107.0, -106.0)  # Ciudad Juárez / El Paso con margen hacia el desierto
+FIRMS_COLUMNS = ['latitude', 'longitude', 'bright_ti4', 'acq_date', 'acq_time', 'satellite',
+                 'confidence', 'frp', 'daynight']
+DEDUP_KEY = ['latitude', 'longitude', 'acq_date', 'acq_time', 'satellite']
+HOTSPOT_DIR = os.path.join(CACHE_DIR, "firms", "hotspots")
+
+_DTYPES = {'latitude': 'float64', 'longitude': 'float64', 'bright_ti4': 'float32', 'frp': 'float32',
+           'acq_date': 'str', 'acq_time': 'str', 'satellite': 'str', 'confidence': 'str', 'daynight': 'str'}
+
+def filter_firms_lines(lines, bbox=FIRMS_BBOX):
+    """
+    Recorre las líneas (bytes) de un CSV de FIRMS y conserva el encabezado y
+    las que caen en 'bbox'. Solo se convierten a número las dos primeras
+    columnas de cada línea.
+    """
+    lines = iter(lines)
+    header = next(lines, b'')
+    names = header.decode('utf-8').strip().split(',')
+    lat_i, lon_i = names.index('latitude'), names.index('longitude')
+    last = max(lat_i, lon_i) + 1
+    lat_min, lat_max, lon_min, lon_max = bbox
+    kept = [header]
+    for line in lines:
+        fields = line.split(b',', last)
+        try:
+            lat, lon = float(fields[lat_i]), float(fields[lon_i])
+        except (ValueError, IndexError):
+            continue
+        if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max:
+            kept.append(line)
+    return kept
+
+def parse_firms_lines(kept):
+    """Encabezado + líneas filtradas -> DataFrame solo con FIRMS_COLUMNS."""
+    header = kept[0].decode('utf-8').strip().split(',') if kept else []
+    columns = [c for c in FIRMS_COLUMNS if c in header]
+    if len(kept) <= 1:
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(BytesIO(b'\n'.join(kept)), usecols=columns,
+                       dtype={c: t for c, t in _DTYPES.items() if c in columns})
+
+def _parse_response(response, bbox):
+    try:
+        return parse_firms_lines(filter_firms_lines(response.iter_lines(chunk_size=1 << 16), bbox))
+    finally:
+        response.close()
+
+def fetch_firms_hotspots(bbox=FIRMS_BBOX):
+    """Anomalías de las últimas 24 h dentro de 'bbox' (caché de feeds). Lanza ConnectionError sin datos."""
+    df = get_feed('firms', feed_key(FIRMS_CSV_PATH, bbox),
+                  http_fetcher('firms', FIRMS_CSV_PATH, parse=lambda r: _parse_response(r, bbox), stream=True))
+    if df is None:
+        raise ConnectionError("FIRMS no disponible y sin copia en caché")
+    return df
+
+class HotspotStore:
+    """
+    Historial local de detecciones, un archivo por fecha de adquisición.
+    Agregar un lote solo lee y reescribe las particiones de las fechas que
+    trae (en la práctica, hoy y ayer), no el historial completo.
+    """
+
+    def __init__(self, directory=HOTSPOT_DIR):
+        self.directory = directory
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def _path(self, acq_date):
+        return os.path.join(self.directory, f"{acq_date}.pkl")
+
+    def _load(self, acq_date):
+        if acq_date not in self._partitions:
+            try:
+                self._partitions[acq_date] = pd.read_pickle(self._path(acq_date))
+            except (OSError, ValueError, EOFError):
+                self._partitions[acq_date] = None
+        return self._partitions[acq_date]
+
+    def append(self, df):
+        """Agrega las detecciones que no estén ya guardadas. Retorna solo las nuevas."""
+        if df is None or df.empty:
+            return pd.DataFrame(columns=getattr(df, 'columns', FIRMS_COLUMNS))
+        new_rows = []
+        with self._lock:
+            for acq_date, batch in df.groupby('acq_date', sort=False):
+                batch = batch.drop_duplicates(DEDUP_KEY)
+                current = self._load(acq_date)
+                if current is not None and not current.empty:
+                    seen = pd.MultiIndex.from_frame(current[DEDUP_KEY])
+                    batch = batch[~pd.MultiIndex.from_frame(batch[DEDUP_KEY]).isin(seen)]
+                if batch.empty:
+                    continue
+                merged = batch if current is None else pd.concat([current, batch], ignore_index=True)
+                self._write(acq_date, merged)
+                new_rows.append(batch)
+        return pd.concat(new_rows, ignore_index=True) if new_rows else df.iloc[:0]
+
+    def _write(self, acq_date, df):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(acq_date)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)  # Escritura atómica
+        self._partitions[acq_date] = df
+
+    def load(self, start=None, end=None):
+        """Detecciones guardadas entre dos fechas (inclusive, 'AAAA-MM-DD')."""
+        if not os.path.isdir(self.directory):
+            return pd.DataFrame(columns=FIRMS_COLUMNS)
+        dates = sorted(f[:-4] for f in os.listdir(self.directory) if f.endswith('.pkl'))
+        dates = [d for d in dates if (start is None or d >= str(start)) and (end is None or d <= str(end))]
+        frames = [self._load(d) for d in dates]
+        frames = [f for f in frames if f is not None]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FIRMS_COLUMNS)
+
+_store = None
+
+def get_hotspot_store():
+    global _store
+    if _store is None:
+        _store = HotspotStore()
+    return _store
+
+def ingest_firms(bbox=FIRMS_BBOX):
+    """
+    Actualiza el historial con el feed actual. Retorna (detecciones de 24 h en
+    el área, detecciones nuevas respecto al historial).
+    """
+    current = fetch_firms_hotspots(bbox)
+    return current, get_hotspot_store().append(current)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from src.data_loader import get_forecast_data
+from src.fwi_calculator import FWI_CATEGORIES, FWI_COLORS, calculate_fwi_array
+from src.http_client import fetch_concurrently
+
+# --- PRONÓSTICO Y LÍNEA DE TIEMPO DE RIESGO ---
+# El pronóstico de OpenWeather (5 días, pasos de 3 h) se consulta para varios
+# puntos de la ciudad en paralelo y se pasa por el FWI vectorizado. Para cada
+# hora queda el punto con mayor riesgo, que es el que interesa para asignar
+# personal y equipo.
+
+FORECAST_POINTS = {
+    'Centro': (31.7396, -106.4808),
+    'Riberas del Bravo': (31.6317, -106.3225),
+    'Sur': (31.6658, -106.4185),
+    'Oriente': (31.7100, -106.3900),
+    'Poniente': (31.6900, -106.4500),
+}
+
+LOCAL_TZ = 'America/Ciudad_Juarez'
+
+FORECAST_COLUMNS = ['punto', 'hora', 'temp', 'humidity', 'wind_kph', 'rain_mm', 'descripcion']
+
+def parse_forecast(payload, punto):
+    """Respuesta JSON de /forecast -> DataFrame con una fila por paso de 3 h."""
+    rows = [
+        (
+            punto,
+            item['dt'],
+            item['main']['temp'],
+            item['main']['humidity'],
+            item.get('wind', {}).get('speed', 0) * 3.6,
+            item.get('rain', {}).get('3h', 0.0),
+            (item.get('weather') or [{}])[0].get('description', ''),
+        )
+        for item in (payload or {}).get('list', [])
+    ]
+    frame = pd.DataFrame(rows, columns=FORECAST_COLUMNS)
+    frame['hora'] = pd.to_datetime(frame['hora'], unit='s', utc=True).dt.tz_convert(LOCAL_TZ)
+    return frame
+
+def get_forecast_frame(points=FORECAST_POINTS):
+    """Pronóstico de todos los puntos, consultados en paralelo (formato largo)."""
+    payloads = fetch_concurrently({
+        name: (lambda lat=lat, lon=lon: get_forecast_data(lat, lon)) for name, (lat, lon) in points.items()
+    })
+    frames = [parse_forecast(payload, name) for name, payload in payloads.items() if payload]
+    if not frames:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def forecast_risk_timeline(frame):
+    """
+    FWI de cada punto y hora; por hora se conserva el punto más crítico.
+    Retorna un DataFrame ordenado por 'hora' (hora local) con temp, humidity, wind_kph,
+    rain_mm, fwi, fwi_code, categoria, color y punto.
+    """
+    if frame.empty:
+        return pd.DataFrame(columns=['hora', 'punto', 'temp', 'humidity', 'wind_kph', 'rain_mm',
+                                     'fwi', 'fwi_code', 'categoria', 'color'])
+    score, code, color = calculate_fwi_array(frame['temp'], frame['humidity'], frame['wind_kph'])
+    scored = frame.assign(fwi=score, fwi_code=code, color_idx=color)
+    worst = scored.loc[scored.groupby('hora')['fwi'].idxmax()].sort_values('hora').reset_index(drop=True)
+    worst['categoria'] = np.asarray(FWI_CATEGORIES)[worst['fwi_code'].to_numpy()]
+    worst['color'] = np.asarray(FWI_COLORS)[worst.pop('color_idx').to_numpy()]
+    return worst[['hora', 'punto', 'temp', 'humidity', 'wind_kph', 'rain_mm', 'fwi', 'fwi_code', 'categoria', 'color']]
+
+def get_forecast_timeline(points=FORECAST_POINTS):
+    """Línea de tiempo de riesgo de los próximos 5 días (vacía si no hay pronóstico)."""
+    return forecast_risk_timeline(get_forecast_frame(points))
@@ -1,3 +1,5 @@
+import numpy as np
+
 def calculate_fwi(temp, humidity, wind_kph):
     """
     Calcula el Índice Meteorológico de Incendios (FWI) aproximado.
@@ -32,4 +34,171 @@ def calculate_fwi(temp, humidity, wind_kph):
     elif fwi_score < 60:
         return fwi_score, "MUY ALTO", "#F97316" # Naranja
     else:
-        return fwi_score, "EXTREMO", "#EF4444" # Rojo
\ No newline at end of file
+        return fwi_score, "EXTREMO", "#EF4444" # Rojo
+
+
+# --- VERSIÓN VECTORIZADA ---
+# Misma fórmula aproximada que calculate_fwi, pero sobre arreglos completos
+# (celdas de una malla, horas de un pronóstico, estaciones...).
+
+FWI_CATEGORIES = ("BAJO", "MODERADO", "ALTO", "MUY ALTO", "EXTREMO")
+FWI_COLORS = ("#10B981", "#3B82F6", "#F59E0B", "#F97316", "#EF4444")
+FWI_THRESHOLDS = (5, 15, 30, 60)
+# Clases de peligro del FWI canadiense (Natural Resources Canada): su escala
+# es más corta que la del puntaje simple, 30 ya es peligro extremo.
+CANADIAN_FWI_THRESHOLDS = (5, 10, 20, 30)
+_HUM_LIMITS = np.array([10, 30, 50], dtype=np.float32)
+_HUM_FACTORS = np.array([10, 6, 3, 1], dtype=np.float32)
+
+def categorize_fwi(score, scale='simple'):
+    """
+    Código de categoría (0 = BAJO ... 4 = EXTREMO) de cada valor FWI.
+    'scale' es 'simple' (calculate_fwi) o 'canadian' (FWISystem).
+    """
+    if scale not in ('simple', 'canadian'):
+        raise ValueError(f"Escala FWI desconocida: {scale}")
+    thresholds = CANADIAN_FWI_THRESHOLDS if scale == 'canadian' else FWI_THRESHOLDS
+    return np.searchsorted(thresholds, np.asarray(score), side='right').astype(np.int8)
+
+def calculate_fwi_array(temp, humidity, wind_kph):
+    """
+    calculate_fwi sobre arreglos (o Series) del mismo tamaño.
+    Retorna (score, código de categoría, índice de color): el índice de
+    color apunta a FWI_COLORS y coincide con el código de FWI_CATEGORIES.
+    """
+    temp = np.asarray(temp, dtype=np.float32)
+    humidity = np.asarray(humidity, dtype=np.float32)
+    wind_kph = np.asarray(wind_kph, dtype=np.float32)
+
+    hum_factor = _HUM_FACTORS[np.searchsorted(_HUM_LIMITS, humidity, side='right')]
+    wind_factor = 1 + wind_kph / 10
+    temp_factor = np.where(temp > 30, np.float32(2), np.float32(1))
+    score = hum_factor * wind_factor * temp_factor
+    code = categorize_fwi(score)
+    return score, code, code.copy()
+
+def fwi_frame(df, temp_col='temp', humidity_col='humidity', wind_col='wind_kph'):
+    """Agrega 'fwi', 'fwi_code' y 'fwi_color' a una copia de un DataFrame de observaciones."""
+    score, code, color = calculate_fwi_array(df[temp_col], df[humidity_col], df[wind_col])
+    out = df.copy()
+    out['fwi'] = score
+    out['fwi_code'] = code
+    out['fwi_color'] = np.asarray(FWI_COLORS)[color]
+    return out
+
+# --- SISTEMA CANADIENSE COMPLETO (Van Wagner, 1987) ---
+# Los códigos de humedad del combustible (FFMC, DMC, DC) dependen del día
+# anterior, así que se arrastran de un día al siguiente. Entradas de las
+# 12:00 hrs locales: temperatura (°C), humedad relativa (%), viento (km/h) y
+# lluvia acumulada en 24 h (mm). Todo se calcula por arreglos (un valor por
+# celda o estación).
+
+FFMC_START, DMC_START, DC_START = 85.0, 6.0, 15.0
+_DMC_DAY_LENGTH = np.array([6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0])
+_DC_DAY_LENGTH = np.array([-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6])
+
+def _ffmc(ffmc0, temp, rh, wind, rain):
+    mo = 147.2 * (101 - ffmc0) / (59.5 + ffmc0)
+    rf = rain - 0.5
+    wet = rain > 0.5
+    mo_rain = mo + 42.5 * rf * np.exp(-100 / (251 - mo)) * (1 - np.exp(-6.93 / np.where(wet, rf, 1)))
+    mo_rain = np.where(mo > 150, mo_rain + 0.0015 * (mo - 150) ** 2 * np.sqrt(np.maximum(rf, 0)), mo_rain)
+    mo = np.where(wet, np.minimum(mo_rain, 250), mo)
+
+    ed = 0.942 * rh ** 0.679 + 11 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
+    ew = 0.618 * rh ** 0.753 + 10 * np.exp((rh - 100) / 10) + 0.18 * (21.1 - temp) * (1 - np.exp(-0.115 * rh))
+    ko = 0.424 * (1 - (rh / 100) ** 1.7) + 0.0694 * np.sqrt(wind) * (1 - (rh / 100) ** 8)
+    kd = ko * 0.581 * np.exp(0.0365 * temp)
+    k1 = 0.424 * (1 - ((100 - rh) / 100) ** 1.7) + 0.0694 * np.sqrt(wind) * (1 - ((100 - rh) / 100) ** 8)
+    kw = k1 * 0.581 * np.exp(0.0365 * temp)
+    m = np.where(mo > ed, ed + (mo - ed) * 10 ** -kd, np.where(mo < ew, ew - (ew - mo) * 10 ** -kw, mo))
+    return np.clip(59.5 * (250 - m) / (147.2 + m), 0, 101)
+
+def _dmc(dmc0, temp, rh, rain, month):
+    rw = 0.92 * rain - 1.27
+    wmi = 20 + 280 / np.exp(0.023 * dmc0)
+    b = np.where(dmc0 <= 33, 100 / (0.5 + 0.3 * dmc0),
+                 np.where(dmc0 <= 65, 14 - 1.3 * np.log(np.maximum(dmc0, 1e-9)), 6.2 * np.log(np.maximum(dmc0, 1e-9)) - 17.2))
+    wmr = wmi + 1000 * rw / (48.77 + b * rw)
+    pr = np.where(rain > 1.5, 43.43 * (5.6348 - np.log(np.maximum(wmr - 20, 1e-9))), dmc0)
+    pr = np.maximum(pr, 0)
+    rk = 1.894 * (np.maximum(temp, -1.1) + 1.1) * (100 - rh) * _DMC_DAY_LENGTH[month - 1] * 1e-4
+    return pr + rk
+
+def _dc(dc0, temp, rain, month):
+    rw = 0.83 * rain - 1.27
+    smi = 800 * np.exp(-dc0 / 400)
+    dr = np.where(rain > 2.8, np.maximum(dc0 - 400 * np.log(1 + 3.937 * np.maximum(rw, 0) / smi), 0), dc0)
+    pe = np.maximum((0.36 * (np.maximum(temp, -2.8) + 2.8) + _DC_DAY_LENGTH[month - 1]) / 2, 0)
+    return dr + pe
+
+def _isi(ffmc, wind):
+    fm = 147.2 * (101 - ffmc) / (59.5 + ffmc)
+    return 0.208 * np.exp(0.05039 * wind) * 91.9 * np.exp(-0.1386 * fm) * (1 + fm ** 5.31 / 4.93e7)
+
+def _bui(dmc, dc):
+    total = dmc + 0.4 * dc
+    safe = np.where(total > 0, total, 1)
+    bui = np.where(dmc <= 0.4 * dc, 0.8 * dmc * dc / safe,
+                   dmc - (1 - 0.8 * dc / safe) * (0.92 + (0.0114 * dmc) ** 1.7))
+    return np.where(total > 0, np.maximum(bui, 0), 0)
+
+def _fwi(isi, bui):
+    fd = np.where(bui <= 80, 0.626 * bui ** 0.809 + 2, 1000 / (25 + 108.64 * np.exp(-0.023 * bui)))
+    b = 0.1 * isi * fd
+    return np.where(b > 1, np.exp(2.72 * (0.434 * np.log(np.maximum(b, 1))) ** 0.647), b)
+
+class FWISystem:
+    """
+    Sistema FWI con estado: guarda FFMC, DMC y DC de cada punto y los
+    actualiza con el clima de cada día (update). 'shape' es la forma de los
+    arreglos de entrada (p. ej. el número de celdas de una malla).
+    """
+
+    def __init__(self, shape=(), ffmc=FFMC_START, dmc=DMC_START, dc=DC_START):
+        self.ffmc = np.full(shape, ffmc, dtype=np.float64)
+        self.dmc = np.full(shape, dmc, dtype=np.float64)
+        self.dc = np.full(shape, dc, dtype=np.float64)
+
+    def update(self, temp, rh, wind_kph, rain_mm, month):
+        """
+        Avanza un día. Retorna un dict de arreglos: ffmc, dmc, dc, isi, bui,
+        fwi y code (categoría con las clases canadienses, ver FWI_CATEGORIES).
+        """
+        temp = np.asarray(temp, dtype=np.float64)
+        rh = np.clip(np.asarray(rh, dtype=np.float64), 0, 100)
+        wind = np.maximum(np.asarray(wind_kph, dtype=np.float64), 0)
+        rain = np.maximum(np.asarray(rain_mm, dtype=np.float64), 0)
+        month = np.asarray(month, dtype=np.int64)
+
+        with np.errstate(all='ignore'):  # Las ramas descartadas por np.where pueden dar inf/nan
+            self.ffmc = _ffmc(self.ffmc, temp, rh, wind, rain)
+            self.dmc = _dmc(self.dmc, temp, rh, rain, month)
+            self.dc = _dc(self.dc, temp, rain, month)
+            isi = _isi(self.ffmc, wind)
+            bui = _bui(self.dmc, self.dc)
+            fwi = _fwi(isi, bui)
+        return {
+            'ffmc': self.ffmc, 'dmc': self.dmc, 'dc': self.dc,
+            'isi': isi, 'bui': bui, 'fwi': fwi, 'code': categorize_fwi(fwi, scale='canadian'),
+        }
+
+def fwi_series(df, system=None, temp_col='temp', humidity_col='humidity', wind_col='wind_kph',
+               rain_col='rain_mm', date_col='fecha'):
+    """
+    FWI diario de una serie de observaciones (una fila por día, en orden).
+    Retorna una copia con las columnas ffmc, dmc, dc, isi, bui, fwi y fwi_code.
+    Con 'system' se continúa desde los códigos de un FWISystem existente.
+    """
+    system = system or FWISystem()
+    months = df[date_col].dt.month.to_numpy() if date_col in df else np.full(len(df), 7)
+    rain = df[rain_col].to_numpy() if rain_col in df else np.zeros(len(df))
+    rows = [
+        system.update(t, h, w, r, m)
+        for t, h, w, r, m in zip(df[temp_col].to_numpy(), df[humidity_col].to_numpy(), df[wind_col].to_numpy(), rain, months)
+    ]
+    out = df.copy()
+    for key in ('ffmc', 'dmc', 'dc', 'isi', 'bui', 'fwi'):
+        out[key] = [float(row[key]) for row in rows]
+    out['fwi_code'] = [int(row['code']) for row in rows]
+    return out
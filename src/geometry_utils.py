@@ -1,3 +1,5 @@
+import numpy as np
+
 def is_point_in_polygon(lat, lon, polygon_points):
     """
     Algoritmo 'Ray Casting' para determinar si una coordenada (lat, lon)
@@ -22,26 +24,84 @@ def is_point_in_polygon(lat, lon, polygon_points):
         
     return inside
 
+def points_in_polygon(lats, lons, polygon_points):
+    """
+    Versión vectorizada de is_point_in_polygon: prueba todos los puntos contra
+    un polígono a la vez (ray casting con NumPy). Primero descarta los puntos
+    fuera del rectángulo envolvente del polígono.
+    Retorna un arreglo booleano del tamaño de 'lats'.
+    """
+    x = np.asarray(lats, dtype=np.float64)
+    y = np.asarray(lons, dtype=np.float64)
+    poly = np.asarray(polygon_points, dtype=np.float64)
+    inside = np.zeros(x.shape, dtype=bool)
+    if poly.ndim != 2 or len(poly) < 3 or x.size == 0:
+        return inside
+
+    # Prefiltro por rectángulo envolvente
+    candidates = np.flatnonzero(
+        (x >= poly[:, 0].min()) & (x <= poly[:, 0].max()) &
+        (y >= poly[:, 1].min()) & (y <= poly[:, 1].max())
+    )
+    if candidates.size:
+        inside[candidates] = _ray_cast(x[candidates], y[candidates], poly)
+    return inside
+
+def _ray_cast(x, y, poly):
+    """Regla par-impar: se cuenta cuántas aristas cruza un rayo desde cada punto."""
+    inside = np.zeros(x.shape, dtype=bool)
+    p1x, p1y = poly[:, 0], poly[:, 1]
+    p2x, p2y = np.roll(p1x, -1), np.roll(p1y, -1)
+    for ax, ay, bx, by in zip(p1x, p1y, p2x, p2y):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        xinters = (y - ay) * (bx - ax) / (by - ay) + ax
+        inside ^= crosses & (x <= xinters)
+    return inside
+
+def impact_indices(fire_polygons, lats, lons):
+    """
+    Prueba muchos polígonos de fuego contra muchos activos en una sola llamada.
+    'fire_polygons' es una lista de polígonos o un arreglo (n_poligonos, n_vertices, 2).
+    Los puntos se ordenan una vez por latitud, así cada polígono solo revisa la
+    franja de su rectángulo envolvente (búsqueda binaria) en lugar de todos.
+    Retorna (poly_idx, point_idx): pares (polígono, activo) afectados.
+    """
+    x = np.asarray(lats, dtype=np.float64)
+    y = np.asarray(lons, dtype=np.float64)
+    order = np.argsort(x, kind='stable')
+    x_sorted = x[order]
+
+    poly_hits, point_hits = [], []
+    for p, polygon in enumerate(fire_polygons):
+        poly = np.asarray(polygon, dtype=np.float64)
+        if poly.ndim != 2 or len(poly) < 3:
+            continue
+        lo = np.searchsorted(x_sorted, poly[:, 0].min(), side='left')
+        hi = np.searchsorted(x_sorted, poly[:, 0].max(), side='right')
+        if lo == hi:
+            continue
+        band = order[lo:hi]
+        band = band[(y[band] >= poly[:, 1].min()) & (y[band] <= poly[:, 1].max())]
+        if band.size == 0:
+            continue
+        hits = band[_ray_cast(x[band], y[band], poly)]
+        poly_hits.append(np.full(hits.size, p, dtype=np.intp))
+        point_hits.append(np.sort(hits))
+
+    if not poly_hits:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(poly_hits), np.concatenate(point_hits)
+
 def analyze_impact(fire_polygon, df_infra):
     """
     Analiza qué infraestructuras caen dentro de la zona de fuego.
-    Retorna un DataFrame con los edificios afectados.
+    Retorna una lista de dicts con los edificios afectados.
     """
-    if df_infra.empty or not fire_polygon:
+    if df_infra.empty or not len(fire_polygon):
         return []
-    
-    afectados = []
-    
-    for _, row in df_infra.iterrows():
-        # Verificar si la coordenada del edificio está en el polígono
-        if is_point_in_polygon(row['lat'], row['lon'], fire_polygon):
-            afectados.append({
-                "nombre": row['nombre'],
-                "tipo": row['tipo'],
-                "lat": row['lat'],
-                "lon": row['lon'],
-                "color": row['color'],
-                "icon": row['icon']
-            })
-            
-    return afectados
\ No newline at end of file
+
+    inside = points_in_polygon(df_infra['lat'].to_numpy(), df_infra['lon'].to_numpy(), fire_polygon)
+    cols = ['nombre', 'tipo', 'lat', 'lon', 'color', 'icon']
+    return df_infra.loc[inside, cols].to_dict('records')
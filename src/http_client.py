@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- CLIENTE HTTP COMPARTIDO ---
+# Una sesión con pool de conexiones por servicio externo, con timeouts y
+# reintentos (con espera exponencial) propios de cada uno, y un límite de
+# solicitudes por segundo ('rate', con ráfagas de 'burst') donde el proveedor
+# lo exige: en cualquier minuto pasan a lo más burst + 60·rate solicitudes.
+# Las URLs base se pueden redirigir por variable de entorno, p. ej. a un
+# servidor local de pruebas.
+ENDPOINTS = {
+    "openweather": {
+        "base_url": os.environ.get("SAPRIA_OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5"),
+        "timeout": (3.05, 5), "retries": 2, "backoff": 0.3,
+        "rate": 59 / 60, "burst": 1,  # Plan gratuito: 60 llamadas/min (1 + 59 por minuto)
+    },
+    "overpass": {
+        "base_url": os.environ.get("SAPRIA_OVERPASS_URL", "http://overpass-api.de/api/interpreter"),
+        "timeout": (5, 25), "retries": 2, "backoff": 1.0,
+    },
+    "osrm": {
+        "base_url": os.environ.get("SAPRIA_OSRM_URL", "http://router.project-osrm.org"),
+        "timeout": (3.05, 5), "retries": 1, "backoff": 0.3,  # Ruteo interactivo: fallar rápido
+        "rate": 1.0, "burst": 1,  # Política del servidor público: 1 solicitud/s, sin ráfagas
+    },
+    "firms": {
+        "base_url": os.environ.get("SAPRIA_FIRMS_URL", "https://firms.modaps.eosdis.nasa.gov/data/active_fire"),
+        "timeout": (5, 30), "retries": 2, "backoff": 1.0,
+    },
+}
+POOL_SIZE = 10
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_limiters = {}
+
+class RateLimiter:
+    """Cubeta de fichas compartida entre hilos: 'rate' solicitudes/s con ráfagas de hasta 'burst'."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Toma una ficha; si no hay, espera lo necesario (sin bloquear a los demás hilos)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1  # Se reserva aunque quede en negativo: la espera cubre la deuda
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+def _limiter(endpoint):
+    config = ENDPOINTS[endpoint]
+    if "rate" not in config:
+        return None
+    with _sessions_lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = RateLimiter(config["rate"], config.get("burst", 1))
+        return _limiters[endpoint]
+
+def endpoint_url(endpoint, path=""):
+    """URL completa de 'path' dentro del servicio 'endpoint'."""
+    base = ENDPOINTS[endpoint]["base_url"].rstrip("/")
+    return f"{base}/{path.lstrip('/')}" if path else base
+
+def get_session(endpoint):
+    """Sesión reutilizable (keep-alive + pool) del servicio, con su política de reintentos."""
+    with _sessions_lock:
+        if endpoint not in _sessions:
+            config = ENDPOINTS[endpoint]
+            retry = Retry(
+                total=config["retries"], connect=config["retries"], read=config["retries"],
+                status=config["retries"], backoff_factor=config["backoff"],
+                status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["GET"]),
+                raise_on_status=False, respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[endpoint] = session
+        return _sessions[endpoint]
+
+def http_get(endpoint, path="", params=None, headers=None, timeout=None, stream=False):
+    """GET con la sesión, timeout, reintentos y límite de tasa del servicio. Propaga las excepciones de red."""
+    limiter = _limiter(endpoint)
+    if limiter is not None:
+        limiter.acquire()
+    return get_session(endpoint).get(
+        endpoint_url(endpoint, path), params=params, headers=headers,
+        timeout=timeout or ENDPOINTS[endpoint]["timeout"], stream=stream,
+    )
+
+def get_json(endpoint, path="", params=None, timeout=None):
+    """JSON de la respuesta, o None si falla la red o el código no es 200."""
+    try:
+        response = http_get(endpoint, path, params=params, timeout=timeout)
+        return response.json() if response.status_code == 200 else None
+    except Exception as e:
+        print(f"Error HTTP ({endpoint}): {e}")
+        return None
+
+async def gather_calls(calls):
+    """
+    Ejecuta funciones bloqueantes independientes de forma concurrente.
+    'calls' es un dict nombre -> función sin argumentos. Una función que
+    falla deja None en su resultado sin afectar a las demás.
+    """
+    names = list(calls)
+    results = await asyncio.gather(*(asyncio.to_thread(calls[n]) for n in names), return_exceptions=True)
+    output = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"Error en {name}: {result}")
+            result = None
+        output[name] = result
+    return output
+
+def fetch_concurrently(calls):
+    """
+    Versión síncrona de gather_calls para usarse desde Streamlit: la latencia
+    total es la de la llamada más lenta, no la suma de todas.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(gather_calls(calls))
+    # Ya hay un loop activo en este hilo: se usa un pool de hilos directamente
+    with ThreadPoolExecutor(max_workers=len(calls) or 1) as pool:
+        futures = {name: pool.submit(_safe_call, name, fn) for name, fn in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+def _safe_call(name, fn):
+    try:
+        return fn()
+    except Exception as e:
+        print(f"Error en {name}: {e}")
+        return None
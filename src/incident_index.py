@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+# --- ÍNDICE ESPACIO-TEMPORAL DE INCIDENTES ---
+# Los incidentes se agrupan por día y por celda geohash en varias precisiones.
+# Una consulta de rango de fechas (y opcionalmente de área) suma cubetas ya
+# contadas en lugar de recorrer el historial completo.
+#
+# Los geohash se manejan como enteros (bits intercalados lon/lat), así la
+# celda padre de un código es un simple corrimiento de bits:
+#   precisión 5 ~ 4.9 x 4.9 km, 6 ~ 1.2 x 0.6 km, 7 ~ 153 x 130 m (en Juárez).
+
+GEOHASH_LEVELS = (5, 6, 7)
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def _bit_split(precision):
+    bits = 5 * precision
+    return (bits + 1) // 2, bits // 2  # (bits de lon, bits de lat); se empieza por lon
+
+def geohash_encode(lats, lons, precision=7):
+    """Código geohash entero (5 bits por carácter) de cada punto. Vectorizado."""
+    lon_bits, lat_bits = _bit_split(precision)
+    lat_q = np.floor((np.asarray(lats, dtype=np.float64) + 90.0) / 180.0 * (1 << lat_bits)).astype(np.int64)
+    lon_q = np.floor((np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * (1 << lon_bits)).astype(np.int64)
+    lat_q = np.clip(lat_q, 0, (1 << lat_bits) - 1)
+    lon_q = np.clip(lon_q, 0, (1 << lon_bits) - 1)
+    code = np.zeros(lat_q.shape, dtype=np.int64)
+    for i in range(lon_bits):
+        code |= ((lon_q >> (lon_bits - 1 - i)) & 1) << (5 * precision - 1 - 2 * i)
+    for i in range(lat_bits):
+        code |= ((lat_q >> (lat_bits - 1 - i)) & 1) << (5 * precision - 2 - 2 * i)
+    return code
+
+def geohash_decode(codes, precision=7):
+    """Centro (lat, lon) y tamaño (dlat, dlon) en grados de cada celda."""
+    codes = np.asarray(codes, dtype=np.int64)
+    lon_bits, lat_bits = _bit_split(precision)
+    lat_q = np.zeros(codes.shape, dtype=np.int64)
+    lon_q = np.zeros(codes.shape, dtype=np.int64)
+    for i in range(lon_bits):
+        lon_q = (lon_q << 1) | ((codes >> (5 * precision - 1 - 2 * i)) & 1)
+    for i in range(lat_bits):
+        lat_q = (lat_q << 1) | ((codes >> (5 * precision - 2 - 2 * i)) & 1)
+    dlat = 180.0 / (1 << lat_bits)
+    dlon = 360.0 / (1 << lon_bits)
+    return (lat_q + 0.5) * dlat - 90.0, (lon_q + 0.5) * dlon - 180.0, dlat, dlon
+
+def geohash_to_str(code, precision=7):
+    """Texto geohash de un código entero (para mostrar o depurar)."""
+    return ''.join(_BASE32[(int(code) >> (5 * (precision - 1 - i))) & 31] for i in range(precision))
+
+def _days(fechas):
+    """Días desde 1970-01-01 (int32) y máscara de fechas válidas."""
+    values = pd.to_datetime(fechas, errors='coerce').to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(values)
+    return values.astype(np.int64).astype(np.int32), valid
+
+def _day_number(date):
+    return int(np.datetime64(pd.Timestamp(date).date(), 'D').astype(np.int64))
+
+class _LevelBuckets:
+    """Cubetas (día, celda) -> conteo de una precisión, ordenadas por día."""
+
+    def __init__(self, precision, day, code, count):
+        self.precision = precision
+        self.day = day
+        self.count = count
+        cells, self.cell_id = np.unique(code, return_inverse=True)
+        self.cell_id = self.cell_id.astype(np.int32)
+        self.cells = cells
+        lat, lon, self.dlat, self.dlon = geohash_decode(cells, precision)
+        self.cell_lat = lat
+        self.cell_lon = lon
+
+    def day_slice(self, start_day, end_day):
+        lo, hi = np.searchsorted(self.day, [start_day, end_day + 1])
+        return slice(lo, hi)
+
+class IncidentIndex:
+    """
+    Índice de incidentes por día y celda geohash en varias precisiones.
+    Se construye una vez por versión de datos; la memoria depende del número
+    de cubetas (día, celda) con incidentes, no del número de filas.
+    """
+
+    def __init__(self, df, levels=GEOHASH_LEVELS):
+        self.levels = tuple(sorted(levels))
+        finest = self.levels[-1]
+        day, valid = _days(df['fecha']) if not df.empty else (np.empty(0, np.int32), np.empty(0, bool))
+        lats = df['lat'].to_numpy(dtype=np.float64) if not df.empty else np.empty(0)
+        lons = df['lon'].to_numpy(dtype=np.float64) if not df.empty else np.empty(0)
+        valid &= np.isfinite(lats) & np.isfinite(lons)
+
+        # Filas ordenadas por día: un rango de fechas es un rango contiguo de posiciones
+        by_day = np.argsort(day[valid], kind='stable')
+        self._row_order = np.flatnonzero(valid)[by_day]
+        self._row_days = day[self._row_order]
+        self.total = int(valid.sum())
+
+        day, code = day[valid].astype(np.int64), geohash_encode(lats[valid], lons[valid], finest)
+        self._row_codes = code[by_day]  # Celda (precisión más fina) de cada fila, en orden cronológico
+        self._row_cell_ids = {}
+        shift = 5 * finest
+        keys, counts = np.unique((day << shift) | code, return_counts=True)
+        self._levels = {}
+        for precision in reversed(self.levels):
+            level_shift = 5 * (finest - precision)
+            if level_shift:
+                # La celda padre es el código sin sus últimos bits; se suman las hijas del mismo día
+                keys, inverse = np.unique(keys >> level_shift << level_shift, return_inverse=True)
+                counts = np.bincount(inverse, weights=counts).astype(np.int64)
+            level_day = (keys >> shift).astype(np.int32)
+            level_code = (keys & ((1 << shift) - 1)) >> level_shift
+            self._levels[precision] = _LevelBuckets(precision, level_day, level_code, counts)
+
+        if self.total:
+            self.first_day = pd.Timestamp(int(self._row_days[0]), unit='D')
+            self.last_day = pd.Timestamp(int(self._row_days[-1]), unit='D')
+        else:
+            self.first_day = self.last_day = None
+
+    def _range(self, start, end):
+        start_day = _day_number(start) if start is not None else np.iinfo(np.int32).min
+        end_day = _day_number(end) if end is not None else np.iinfo(np.int32).max - 1
+        return start_day, end_day
+
+    def _level(self, precision):
+        return self._levels[precision if precision is not None else self.levels[len(self.levels) // 2]]
+
+    def count(self, start=None, end=None, bbox=None, precision=None):
+        """
+        Incidentes entre 'start' y 'end' (inclusive). 'bbox' = (lat_min, lat_max,
+        lon_min, lon_max) filtra por el centro de la celda en la precisión dada.
+        """
+        start_day, end_day = self._range(start, end)
+        if bbox is None:
+            lo, hi = np.searchsorted(self._row_days, [start_day, end_day + 1])
+            return int(hi - lo)
+        level = self._level(precision)
+        window = level.day_slice(start_day, end_day)
+        cell_id = level.cell_id[window]
+        lat, lon = level.cell_lat[cell_id], level.cell_lon[cell_id]
+        inside = (lat >= bbox[0]) & (lat <= bbox[1]) & (lon >= bbox[2]) & (lon <= bbox[3])
+        return int(level.count[window][inside].sum())
+
+    def cell_counts(self, start=None, end=None, precision=None):
+        """DataFrame de celdas con incidentes en el rango: 'lat', 'lon' (centro), 'geohash' y 'count'."""
+        level = self._level(precision)
+        window = level.day_slice(*self._range(start, end))
+        totals = np.bincount(level.cell_id[window], weights=level.count[window], minlength=len(level.cells))
+        present = np.flatnonzero(totals)
+        return pd.DataFrame({
+            'lat': level.cell_lat[present],
+            'lon': level.cell_lon[present],
+            'geohash': level.cells[present],
+            'count': totals[present].astype(np.int64),
+        })
+
+    def cell_size_m(self, precision=None):
+        """Tamaño aproximado (alto, ancho) en metros de las celdas de una precisión."""
+        level = self._level(precision)
+        lat = float(np.median(level.cell_lat)) if len(level.cells) else 0.0
+        return level.dlat * 111_320, level.dlon * 111_320 * np.cos(np.radians(lat))
+
+    def daily_counts(self, start=None, end=None):
+        """Serie de incidentes por día en el rango (solo días con incidentes)."""
+        start_day, end_day = self._range(start, end)
+        lo, hi = np.searchsorted(self._row_days, [start_day, end_day + 1])
+        days, counts = np.unique(self._row_days[lo:hi], return_counts=True)
+        return pd.Series(counts, index=pd.to_datetime(days.astype(np.int64), unit='D'), name='incidentes')
+
+    def rows_between(self, start=None, end=None):
+        """Posiciones (para df.iloc) de los incidentes en el rango de fechas, en orden cronológico."""
+        start_day, end_day = self._range(start, end)
+        lo, hi = np.searchsorted(self._row_days, [start_day, end_day + 1])
+        return self._row_order[lo:hi]
+
+    def rows_cells(self, start=None, end=None, precision=None):
+        """
+        Posiciones (para df.iloc) de los incidentes en el rango y el índice de su
+        celda en cell_codes(precision). Los índices por fila se calculan una vez por precisión.
+        """
+        start_day, end_day = self._range(start, end)
+        lo, hi = np.searchsorted(self._row_days, [start_day, end_day + 1])
+        level = self._level(precision)
+        if level.precision not in self._row_cell_ids:
+            shift = 5 * (self.levels[-1] - level.precision)
+            self._row_cell_ids[level.precision] = np.searchsorted(level.cells, self._row_codes >> shift).astype(np.int32)
+        return self._row_order[lo:hi], self._row_cell_ids[level.precision][lo:hi]
+
+    def cell_codes(self, precision=None):
+        """Códigos geohash (ordenados) de todas las celdas con incidentes en una precisión."""
+        return self._level(precision).cells
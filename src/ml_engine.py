@@ -1,39 +1,52 @@
-from sklearn.cluster import KMeans
-import pandas as pd
+from src.clustering import DBSCAN_EPS_KM, find_risk_clusters, fit_zone_state, update_zone_state, zones_from_cells
+from src.model_store import get_or_train, get_or_update
 
-def get_risk_clusters(df, num_clusters=5):
+def get_risk_clusters(df, num_clusters=None, data_version=None, method='kmeans', start=None, end=None,
+                      eps_km=DBSCAN_EPS_KM, index=None):
     """
-    Utiliza Inteligencia Artificial (K-Means Clustering) para encontrar 
-    los epicentros matemáticos de riesgo basados en el historial.
+    Encuentra los epicentros de riesgo del historial (ver src.clustering):
+    'kmeans' (con num_clusters=None elige k automáticamente), 'dbscan' o
+    'hdbscan', opcionalmente solo con los incidentes entre 'start' y 'end'.
+    Si se indica 'data_version' (hash del dataset), las zonas se reutilizan
+    desde el almacén en disco en lugar de recalcularse.
     """
-    if df.empty or len(df) < num_clusters:
+    if len(df) < 2:
         return []
-    
-    # Extraer solo las coordenadas válidas
-    coords = df[['lat', 'lon']].dropna()
-    
-    # Entrenar el modelo de Machine Learning
-    kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init=10)
-    kmeans.fit(coords)
-    
-    # Obtener los epicentros (centroides)
-    centers = kmeans.cluster_centers_
-    
-    clusters = []
-    for i, center in enumerate(centers):
-        # Contar cuántos incidentes históricos "pertenecen" a este epicentro
-        count = sum(kmeans.labels_ == i)
-        clusters.append({
-            "id": i + 1,
-            "lat": center[0], 
-            "lon": center[1], 
-            "weight": count,
-            "peligro": "CRÍTICO" if count > (len(df)/num_clusters)*1.2 else "ALTO"
-        })
-        
-    # Ordenar del más peligroso al menos
-    clusters = sorted(clusters, key=lambda x: x['weight'], reverse=True)
-    return clusters
+
+    def _fit():
+        return find_risk_clusters(df, method, num_clusters, start, end, index=index, eps_km=eps_km)
+
+    if data_version:
+        params = {'method': method, 'n_clusters': num_clusters, 'eps_km': eps_km, 'start': start, 'end': end}
+        return get_or_train('risk_zones', data_version, params, _fit)
+    return _fit()
+
+def get_risk_clusters_from_cells(cells, num_clusters=None, method='kmeans'):
+    """
+    Epicentros a partir de conteos por celda (IncidentAggregates.cell_counts),
+    ponderando cada celda por su número de incidentes. Permite calcular las
+    zonas de riesgo sobre historiales que no caben en memoria.
+    """
+    if cells.empty:
+        return []
+    return zones_from_cells(cells, method, num_clusters)
+
+def get_risk_clusters_incremental(df, csv_path, num_clusters=None, index=None):
+    """
+    Igual que get_risk_clusters (k-means), pero cuando al CSV solo se le
+    agregan filas actualiza los centroides guardados en lugar de reagrupar.
+    """
+    if len(df) < 2:
+        return []
+
+    state = get_or_update(
+        'risk_zones_incremental', csv_path, {'n_clusters': num_clusters},
+        train_fn=lambda: fit_zone_state(df, num_clusters, index=index),
+        update_fn=lambda st_: update_zone_state(st_, df)
+    )
+    if state is None:
+        return []
+    return find_risk_clusters(df, index=index, zone_state=state)
 
 def generate_ai_briefing(weather, fwi_cat, anomalias_nasa, epicentros):
     """Genera un reporte de texto automatizado estilo militar."""
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+
+import joblib
+
+from src.storage import CACHE_DIR, file_hash, file_prefix_hash
+
+# --- ALMACÉN DE MODELOS EN DISCO ---
+# Cada modelo entrenado se guarda con una llave que combina el hash del
+# contenido de los datos y los hiperparámetros. Si nada cambió, se carga
+# el artefacto (memory-mapped) en lugar de reentrenar.
+MODEL_DIR = os.path.join(CACHE_DIR, "models")
+MAX_VERSIONS = 4  # Versiones conservadas por modelo (LRU)
+
+_loaded = {}
+
+def model_key(name, data_hash, params):
+    """Llave estable: nombre del modelo + hash de (datos, hiperparámetros)."""
+    payload = json.dumps({"data": data_hash, "params": params}, sort_keys=True, default=str)
+    return f"{name}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+def _artifact_path(key, model_dir):
+    return os.path.join(model_dir, f"{key}.joblib")
+
+def load_model(key, model_dir=MODEL_DIR, mmap=True):
+    """
+    Carga un artefacto guardado. Retorna None si no existe.
+    Con 'mmap' los arreglos se mapean de solo lectura; los estados que se
+    van a modificar (entrenamiento incremental) deben cargarse con mmap=False.
+    """
+    path = _artifact_path(key, model_dir)
+    if not os.path.exists(path):
+        _loaded.pop(path, None)
+        return None
+    if path not in _loaded:
+        try:
+            _loaded[path] = joblib.load(path, mmap_mode="r" if mmap else None)
+        except Exception as e:
+            print(f"Error cargando modelo {key}: {e}")
+            return None
+    os.utime(path)  # Marcar como usado recientemente (LRU)
+    return _loaded[path]
+
+def save_model(key, obj, model_dir=MODEL_DIR, max_versions=MAX_VERSIONS):
+    """Guarda el artefacto sin compresión (requisito para mmap) y aplica la política LRU."""
+    os.makedirs(model_dir, exist_ok=True)
+    path = _artifact_path(key, model_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)  # Escritura atómica
+    _loaded[path] = obj
+    evict_old_versions(key.rsplit("-", 1)[0], model_dir, max_versions)
+
+def evict_old_versions(name, model_dir=MODEL_DIR, max_versions=MAX_VERSIONS):
+    """Elimina las versiones de 'name' usadas hace más tiempo, dejando 'max_versions'."""
+    if not os.path.isdir(model_dir):
+        return
+    versions = [
+        os.path.join(model_dir, f) for f in os.listdir(model_dir)
+        if f.endswith(".joblib") and f.rsplit("-", 1)[0] == name
+    ]
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for path in versions[max_versions:]:
+        _loaded.pop(path, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def get_or_train(name, data_hash, params, train_fn, model_dir=MODEL_DIR):
+    """
+    Devuelve el modelo guardado para (datos, hiperparámetros) o lo entrena
+    con 'train_fn()' y lo persiste si no existe.
+    """
+    key = model_key(name, data_hash, params)
+    obj = load_model(key, model_dir)
+    if obj is None:
+        obj = train_fn()
+        save_model(key, obj, model_dir)
+    return obj
+
+def get_or_update(name, data_path, params, train_fn, update_fn, model_dir=MODEL_DIR):
+    """
+    Variante incremental de get_or_train. Se guarda un solo estado por
+    (modelo, hiperparámetros) junto con el tamaño y hash de los datos con los
+    que se entrenó:
+      - Si el archivo no cambió, se devuelve el estado guardado.
+      - Si solo creció (el contenido anterior es prefijo del actual), se llama
+        'update_fn(estado)' para aprender únicamente lo nuevo.
+      - En cualquier otro caso se reentrena completo con 'train_fn()'.
+    Las funciones deben devolver un dict (o None si no hay datos).
+    """
+    key = model_key(name, "incremental", params)
+    state = load_model(key, model_dir, mmap=False)
+    current_hash = file_hash(data_path)
+    if state is not None and state.get("data_hash") == current_hash:
+        return state
+
+    size = os.path.getsize(data_path)
+    appended = (
+        state is not None
+        and 0 < state.get("data_size", 0) < size
+        and file_prefix_hash(data_path, state["data_size"]) == state["data_hash"]
+    )
+    state = update_fn(state) if appended else train_fn()
+    if state is None:
+        return None
+
+    state["data_size"] = size
+    state["data_hash"] = current_hash
+    save_model(key, state, model_dir)
+    return state
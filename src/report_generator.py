@@ -1,5 +1,5 @@
 from fpdf import FPDF
-import tempfile
+from collections import OrderedDict
 from datetime import datetime
 
 # COLORES CORPORATIVOS
@@ -8,6 +8,10 @@ GOLD = (250, 204, 21)        # #FACC15
 WHITE = (255, 255, 255)
 TEXT_GRAY = (100, 100, 100)
 
+# Caché de reportes ya generados (por contenido), para no rehacer el PDF
+REPORT_CACHE_SIZE = 16
+_report_cache = OrderedDict()
+
 class PDF(FPDF):
     def header(self):
         # Fondo Encabezado
@@ -58,7 +62,13 @@ class PDF(FPDF):
         self.set_text_color(*OXFORD_GRAY)
         self.cell(80, 10, str(value), 0, 0)
 
+def _pdf_bytes(pdf):
+    """Contenido del PDF en memoria (compatible con pyfpdf y fpdf2)."""
+    out = pdf.output(dest='S')
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
 def generate_pdf_report(weather, fwi_cat, nasa_count, epicentros, total_historico):
+    """Genera el reporte en memoria y retorna los bytes del PDF (sin archivos temporales)."""
     pdf = PDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -67,7 +77,7 @@ def generate_pdf_report(weather, fwi_cat, nasa_count, epicentros, total_historic
     temp = f"{weather['main']['temp']} C" if weather else "--"
     hum = f"{weather['main']['humidity']} %" if weather else "--"
     wind_spd = f"{weather['wind']['speed']*3.6:.1f} km/h" if weather else "--" # Convertimos m/s a km/h
-    wind_deg = f"{weather['wind']['deg']} Grados" if weather else "--"
+    wind_deg = f"{weather['wind'].get('deg', 0)} Grados" if weather else "--"
 
     # --- SECCIÓN 1: RESUMEN METEOROLÓGICO Y RIESGO ---
     pdf.chapter_title('ESTADO DE ALERTA EN TIEMPO REAL')
@@ -135,7 +145,90 @@ def generate_pdf_report(weather, fwi_cat, nasa_count, epicentros, total_historic
 
     pdf.ln(10)
 
-    # Output
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf.output(temp_file.name)
-    return temp_file.name
\ No newline at end of file
+    return _pdf_bytes(pdf)
+
+def _report_key(weather, fwi_cat, nasa_count, epicentros, total_historico):
+    """Solo los datos que aparecen en el reporte."""
+    clima = None
+    if weather:
+        clima = (weather['main']['temp'], weather['main']['humidity'], weather['wind']['speed'], weather['wind'].get('deg', 0))
+    zonas = tuple((ep['id'], int(ep['weight']), ep['peligro']) for ep in (epicentros or [])[:5])
+    return clima, fwi_cat, int(nasa_count), zonas, int(total_historico)
+
+def get_pdf_report(weather, fwi_cat, nasa_count, epicentros, total_historico):
+    """
+    Bytes del reporte, reutilizando el último PDF generado con los mismos datos.
+    La fecha de emisión corresponde a la primera generación con esos datos.
+    """
+    key = _report_key(weather, fwi_cat, nasa_count, epicentros, total_historico)
+    if key in _report_cache:
+        _report_cache.move_to_end(key)
+        return _report_cache[key]
+    data = generate_pdf_report(weather, fwi_cat, nasa_count, epicentros, total_historico)
+    _report_cache[key] = data
+    if len(_report_cache) > REPORT_CACHE_SIZE:
+        _report_cache.popitem(last=False)
+    return data
+
+
+# --- REPORTES POR ZONA (entrega de turno) ---
+
+def _latin1(text):
+    """Las fuentes base de FPDF solo admiten latin-1."""
+    return str(text).encode('latin-1', 'replace').decode('latin-1')
+
+def _count_table(pdf, header, rows):
+    pdf.set_fill_color(*OXFORD_GRAY)
+    pdf.set_text_color(*GOLD)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(140, 8, header, 1, 0, 'C', True)
+    pdf.cell(50, 8, 'EVENTOS', 1, 1, 'C', True)
+    pdf.set_text_color(50, 50, 50)
+    pdf.set_font('Arial', '', 10)
+    for label, count in rows:
+        pdf.cell(140, 8, _latin1(label)[:70], 1, 0, 'L')
+        pdf.cell(50, 8, str(count), 1, 1, 'C')
+    if not rows:
+        pdf.cell(190, 8, 'Sin registros.', 1, 1, 'C')
+
+def render_zone_page(pdf, spec):
+    """
+    Agrega al documento la página de una zona (colonia o epicentro).
+    'spec' es un dict simple (ver src.batch_reports.build_zone_specs).
+    """
+    pdf.add_page()
+    pdf.chapter_title(_latin1(f"REPORTE DE ZONA: {spec['titulo']}".upper())[:60])
+
+    pdf.set_font('Arial', '', 10)
+    pdf.set_text_color(*TEXT_GRAY)
+    pdf.cell(0, 8, f"Fecha de Emision: {spec['emitido']}", 0, 1)
+    pdf.ln(3)
+
+    y_start = pdf.get_y()
+    pdf.metric_card("INCIDENTES EN LA ZONA", spec['total'], 10, y_start)
+    pdf.metric_card("ULTIMO INCIDENTE", spec['ultimo'], 105, y_start)
+    y_start += 30
+    pdf.metric_card("INDICE DE RIESGO FWI", _latin1(spec['fwi_cat']), 10, y_start)
+    pdf.metric_card("ANOMALIAS NASA (24H)", spec['nasa_count'], 105, y_start)
+    pdf.set_xy(10, y_start + 35)
+
+    pdf.chapter_title('CAUSAS PRINCIPALES')
+    _count_table(pdf, 'CAUSA PROBABLE', spec['causas'])
+    pdf.ln(6)
+    pdf.chapter_title('TIPOS DE INCENDIO')
+    _count_table(pdf, 'TIPO', spec['tipos'])
+
+def generate_zone_report(spec):
+    """Reporte de una sola zona como bytes de PDF."""
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    render_zone_page(pdf, spec)
+    return _pdf_bytes(pdf)
+
+def generate_zone_reports_merged(specs):
+    """Todas las zonas en un solo documento (una página por zona, una sola configuración)."""
+    pdf = PDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    for spec in specs:
+        render_zone_page(pdf, spec)
+    return _pdf_bytes(pdf)
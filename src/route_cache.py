@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from src.feed_cache import FEED_TTLS
+from src.http_client import get_json
+from src.incident_index import geohash_decode, geohash_encode
+from src.storage import CACHE_DIR
+
+# --- CACHÉ PERSISTENTE DE RUTAS (OSRM) ---
+# Las rutas se guardan por celda geohash de origen y de destino (precisión 7,
+# ~150 m): una estación y cualquier punto de la misma celda comparten la
+# ruta, que se consulta entre los centros de ambas celdas. La geometría se
+# pide y se guarda como polilínea codificada (6 veces menos que GeoJSON) y se
+# decodifica vectorizada a float32 [lat, lon] solo al pasar a memoria. El
+# disco (SQLite) aplica LRU por número de
+# rutas y vence las rutas con el TTL del feed 'osrm'; delante hay un LRU en
+# memoria. get_routes resuelve muchas rutas a la vez: quita duplicados, lee
+# las guardadas en una sola consulta y pide las faltantes en paralelo.
+
+ROUTE_DB = os.path.join(CACHE_DIR, "routes.sqlite")
+ROUTE_SNAP_PRECISION = 7
+ROUTE_CACHE_MAX = 20_000     # Rutas en disco (~2 KB c/u con geometría completa)
+ROUTE_MEMORY_MAX = 2048      # Rutas decodificadas en memoria
+ROUTE_WORKERS = 8
+
+def encode_polyline(coords, precision=5):
+    """Polilínea codificada (formato de Google/OSRM) de un arreglo (n, 2) [lat, lon]."""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return ""
+    values = np.rint(coords * 10 ** precision).astype(np.int64)
+    deltas = np.diff(values, axis=0, prepend=0).ravel()
+    zigzag = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    out = []
+    for value in zigzag.tolist():
+        while value >= 0x20:
+            out.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        out.append(chr(value + 63))
+    return "".join(out)
+
+def decode_polyline(text, precision=5):
+    """Arreglo float32 (n, 2) [lat, lon] de una polilínea codificada, sin bucles de Python."""
+    chunks = np.frombuffer(text.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if not len(chunks):
+        return np.empty((0, 2), dtype=np.float32)
+    # Cada valor termina en el primer carácter sin el bit de continuación (0x20)
+    ends = (chunks & 0x20) == 0
+    starts = np.flatnonzero(np.r_[True, ends[:-1]])
+    position = np.arange(len(chunks)) - np.repeat(starts, np.diff(np.r_[starts, len(chunks)]))
+    values = np.add.reduceat((chunks & 0x1f) << (5 * position), starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    return (np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** precision).astype(np.float32)
+
+def snap_key(lat, lon, precision=ROUTE_SNAP_PRECISION):
+    """Código geohash entero de la celda de cada punto."""
+    return geohash_encode(np.atleast_1d(lat), np.atleast_1d(lon), precision)
+
+def _cell_center(code, precision=ROUTE_SNAP_PRECISION):
+    lat, lon, _, _ = geohash_decode(np.array([code]), precision)
+    return float(lat[0]), float(lon[0])
+
+def fetch_route(origin, destination):
+    """Ruta OSRM entre dos celdas (centro a centro). Retorna dict con 'polyline', 'duration' (s) y 'distance' (m), o None."""
+    (o_lat, o_lon), (d_lat, d_lon) = _cell_center(origin), _cell_center(destination)
+    # OSRM usa formato lon,lat
+    path = f"route/v1/driving/{o_lon:.6f},{o_lat:.6f};{d_lon:.6f},{d_lat:.6f}"
+    data = get_json('osrm', path, {'overview': 'full', 'geometries': 'polyline'})
+    if not data or data.get('code') != 'Ok' or not data.get('routes'):
+        return None
+    route = data['routes'][0]
+    return {"polyline": route['geometry'], "duration": float(route['duration']), "distance": float(route['distance'])}
+
+class RouteCache:
+    """Rutas por (celda origen, celda destino) en SQLite con LRU, y un LRU decodificado en memoria."""
+
+    def __init__(self, path=ROUTE_DB, max_entries=ROUTE_CACHE_MAX, memory_entries=ROUTE_MEMORY_MAX,
+                 ttl=FEED_TTLS["osrm"], fetch=fetch_route):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.fetch = fetch
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS routes (origin INTEGER, destination INTEGER, polyline TEXT, "
+                "duration REAL, distance REAL, fetched_at REAL, used_at REAL, PRIMARY KEY (origin, destination))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS routes_used ON routes (used_at)")
+        return self._db
+
+    def _remember(self, key, route):
+        self._memory[key] = route
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _decode(polyline, duration, distance):
+        return {"path": decode_polyline(polyline), "duration": duration, "distance": distance}
+
+    def _read(self, keys):
+        """Rutas vigentes en disco para 'keys'; marca su uso (LRU) en la misma transacción."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            db = self._conn()
+            for i in range(0, len(keys), 400):  # Límite de parámetros de SQLite
+                part = keys[i:i + 400]
+                where = " OR ".join(["(origin = ? AND destination = ?)"] * len(part))
+                rows = db.execute(f"SELECT origin, destination, polyline, duration, distance, fetched_at FROM routes WHERE {where}",
+                                  [v for key in part for v in key]).fetchall()
+                for origin, destination, polyline, duration, distance, fetched_at in rows:
+                    if now - fetched_at < self.ttl:
+                        found[(origin, destination)] = self._decode(polyline, duration, distance)
+            if found:
+                db.executemany("UPDATE routes SET used_at = ? WHERE origin = ? AND destination = ?",
+                               [(now, o, d) for o, d in found])
+                db.commit()
+        return found
+
+    def _write(self, fetched):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.executemany("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(o, d, r["polyline"], r["duration"], r["distance"], now, now) for (o, d), r in fetched.items()])
+            excess = db.execute("SELECT COUNT(*) FROM routes").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute("DELETE FROM routes WHERE rowid IN (SELECT rowid FROM routes ORDER BY used_at LIMIT ?)", (excess,))
+            db.commit()
+
+    def get_many(self, keys, workers=ROUTE_WORKERS):
+        """Ruta (o None) de cada llave (origen, destino); las repetidas se consultan una sola vez."""
+        unique = list(dict.fromkeys(keys))
+        result = {}
+        with self._lock:
+            for key in unique:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    result[key] = self._memory[key]
+        pending = [key for key in unique if key not in result]
+        if pending:
+            stored = self._read(pending)
+            with self._lock:
+                for key, route in stored.items():
+                    self._remember(key, route)
+            result.update(stored)
+            pending = [key for key in pending if key not in stored]
+        if pending:
+            result.update(self._fetch_missing(pending, workers))
+        return [result.get(key) for key in keys]
+
+    def _fetch_missing(self, keys, workers):
+        """Consulta OSRM en paralelo; si otro hilo ya pidió la misma ruta, se espera su resultado."""
+        own, waiting = {}, {}
+        with self._lock:
+            for key in keys:
+                if key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    own[key] = self._inflight[key] = Future()
+        fetched = {}
+        try:
+            if own:
+                with ThreadPoolExecutor(max_workers=max(1, min(workers, len(own)))) as pool:
+                    for key, raw in zip(own, pool.map(lambda k: self._safe_fetch(*k), own)):
+                        if raw is not None:
+                            fetched[key] = raw
+                if fetched:
+                    self._write(fetched)
+        finally:
+            routes = {key: self._decode(r["polyline"], r["duration"], r["distance"]) for key, r in fetched.items()}
+            with self._lock:
+                for key, future in own.items():
+                    self._inflight.pop(key, None)
+                    if key in routes:
+                        self._remember(key, routes[key])
+                    future.set_result(routes.get(key))
+        routes.update({key: future.result() for key, future in waiting.items()})
+        return routes
+
+    def _safe_fetch(self, origin, destination):
+        try:
+            return self.fetch(origin, destination)
+        except Exception as e:
+            print(f"Error en ruteo: {e}")
+            return None
+
+_cache = None
+
+def get_route_cache():
+    global _cache
+    if _cache is None:
+        _cache = RouteCache()
+    return _cache
+
+def _as_result(route):
+    if route is None:
+        return None
+    return {"path": route["path"], "duration": round(route["duration"] / 60, 1), "distance": round(route["distance"] / 1000, 2)}
+
+def get_routes(pairs, cache=None, workers=ROUTE_WORKERS):
+    """
+    Rutas de muchos pares (lat_origen, lon_origen, lat_destino, lon_destino).
+    Retorna una lista alineada con 'pairs': dict con 'path' (float32 (n, 2)
+    [lat, lon]), 'duration' (min) y 'distance' (km), o None si no hubo ruta.
+    """
+    if not len(pairs):
+        return []
+    pairs = np.asarray(pairs, dtype=np.float64).reshape(-1, 4)
+    origins = snap_key(pairs[:, 0], pairs[:, 1])
+    destinations = snap_key(pairs[:, 2], pairs[:, 3])
+    routes = (cache or get_route_cache()).get_many(list(zip(origins.tolist(), destinations.tolist())), workers)
+    return [_as_result(route) for route in routes]
+
+def get_route(start_lat, start_lon, end_lat, end_lon, cache=None):
+    """Ruta de un solo par (ver get_routes)."""
+    return get_routes([(start_lat, start_lon, end_lat, end_lon)], cache)[0]
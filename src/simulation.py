@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 def get_fire_ellipse(lat, lon, wind_deg, wind_speed_kmh, hours=1):
     """
@@ -52,4 +53,292 @@ def get_fire_ellipse(lat, lon, wind_deg, wind_speed_kmh, hours=1):
         
         points.append([center_lat + delta_lat, center_lon + delta_lon])
         
-    return points
\ No newline at end of file
+    return points
+
+# --- MOTOR DE PROPAGACIÓN EN LOTE ---
+# Misma elipse que get_fire_ellipse, pero para muchos focos, muchos pasos de
+# tiempo y viento variable en una sola operación de NumPy.
+
+def simulate_spread(lats, lons, wind_deg, wind_speed_kmh, hours, steps=36,
+                    spread_factor=0.1, merge=False):
+    """
+    Simula la propagación de 'n_fires' focos en 'n_steps' instantes.
+
+    - lats, lons: arreglos (n_fires,) con los puntos de ignición.
+    - wind_deg, wind_speed_kmh: escalares, (n_fires,) o (n_fires, n_steps)
+      si el viento cambia en cada paso.
+    - hours: instantes en horas desde la ignición, p. ej. np.arange(1, 25).
+
+    El avance acumulado es spread_factor * Σ(viento · Δt), de modo que con
+    viento constante coincide exactamente con get_fire_ellipse.
+    Retorna un arreglo (n_fires, n_steps, steps, 2) de [lat, lon]; con
+    merge=True retorna además los perímetros fusionados de merge_perimeters.
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    hours = np.atleast_1d(np.asarray(hours, dtype=np.float64))
+    n_fires, n_steps = lats.size, hours.size
+
+    wind_deg = _per_fire_step(wind_deg, n_fires, n_steps)
+    wind_speed = _per_fire_step(wind_speed_kmh, n_fires, n_steps)
+
+    # Longitud del eje mayor acumulando el avance de cada intervalo
+    dt = np.diff(hours, prepend=0.0)
+    major = np.cumsum(wind_speed * dt, axis=1) * spread_factor  # (n_fires, n_steps)
+    minor = major * 0.4
+
+    theta = np.radians(np.arange(steps) * (360 / steps))  # (steps,)
+    x = (major[..., None] / 2) * np.cos(theta) + (major[..., None] / 2)
+    y = (minor[..., None] / 2) * np.sin(theta)
+
+    rotation = np.radians(wind_deg - 90)[..., None]
+    x_rot = x * np.cos(rotation) - y * np.sin(rotation)
+    y_rot = x * np.sin(rotation) + y * np.cos(rotation)
+
+    perimeters = np.empty((n_fires, n_steps, steps, 2), dtype=np.float64)
+    perimeters[..., 0] = lats[:, None, None] + y_rot / 111.0
+    perimeters[..., 1] = lons[:, None, None] + x_rot / (111.0 * np.cos(np.radians(lats)))[:, None, None]
+
+    if merge:
+        return perimeters, merge_perimeters(perimeters)
+    return perimeters
+
+def _per_fire_step(value, n_fires, n_steps):
+    """Expande un escalar, (n_fires,) o (n_fires, n_steps) a (n_fires, n_steps)."""
+    value = np.asarray(value, dtype=np.float64)
+    if value.ndim == 1:
+        value = value[:, None]
+    return np.broadcast_to(value, (n_fires, n_steps))
+
+def expand_wind_scenarios(lats, lons, wind_scenarios):
+    """
+    Repite cada foco para cada escenario de viento [(grados, km/h), ...].
+    Retorna (lats, lons, wind_deg, wind_speed, scenario_idx) listos para
+    simulate_spread; el resultado se puede remodelar a (n_escenarios, n_focos, ...).
+    """
+    lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+    lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    scenarios = np.asarray(wind_scenarios, dtype=np.float64).reshape(-1, 2)
+    n_scen = len(scenarios)
+    return (
+        np.tile(lats, n_scen),
+        np.tile(lons, n_scen),
+        np.repeat(scenarios[:, 0], lats.size),
+        np.repeat(scenarios[:, 1], lats.size),
+        np.repeat(np.arange(n_scen), lats.size),
+    )
+
+def merge_perimeters(perimeters):
+    """
+    Fusiona los perímetros que se traslapan en cada paso de tiempo.
+    Dos perímetros se consideran traslapados si sus rectángulos envolventes
+    se cruzan y algún vértice de uno cae dentro del otro; los grupos se forman
+    por transitividad y su contorno es la envolvente convexa de los vértices.
+    Retorna una lista (un elemento por paso) de listas de dicts
+    {'fires': índices de focos, 'polygon': arreglo (m, 2)}.
+    """
+    from src.geometry_utils import points_in_polygon
+
+    n_fires, n_steps = perimeters.shape[:2]
+    merged = []
+    for t in range(n_steps):
+        polys = perimeters[:, t]
+        lo, hi = polys.min(axis=1), polys.max(axis=1)
+        overlap = np.all((lo[:, None, :] <= hi[None, :, :]) & (lo[None, :, :] <= hi[:, None, :]), axis=2)
+
+        parent = np.arange(n_fires)
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in zip(*np.nonzero(np.triu(overlap, k=1))):
+            if find(a) == find(b):
+                continue
+            if (points_in_polygon(polys[a, :, 0], polys[a, :, 1], polys[b]).any() or
+                    points_in_polygon(polys[b, :, 0], polys[b, :, 1], polys[a]).any()):
+                parent[find(a)] = find(b)
+
+        roots = np.array([find(i) for i in range(n_fires)])
+        groups = []
+        for root in np.unique(roots):
+            members = np.flatnonzero(roots == root)
+            polygon = polys[members[0]] if members.size == 1 else _convex_hull(polys[members].reshape(-1, 2))
+            groups.append({'fires': members, 'polygon': polygon})
+        merged.append(groups)
+    return merged
+
+def _convex_hull(points):
+    """Envolvente convexa (cadena monótona de Andrew)."""
+    pts = np.unique(points, axis=0)
+    if len(pts) < 3:
+        return pts
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in pts[::-1]:
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return np.array(lower[:-1] + upper[:-1])
+
+
+# --- AUTÓMATA CELULAR (MODO RÁSTER) ---
+# Segundo modo de simulación sobre una malla con los mismos límites que
+# predict_risk_grid. La probabilidad de que una celda se encienda depende del
+# viento (modelo de Alexandridis et al.), del FWI, del riesgo del modelo de IA,
+# del combustible disponible y de lo que ya se quemó.
+
+UNBURNED, BURNING, BURNED = 0, 1, 2
+
+# Vecindad de Moore: (filas, columnas) desde la celda que arde hacia la vecina.
+# Las filas crecen hacia el norte (latitud ascendente, como build_grid_axes).
+_NEIGHBORS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+def _shift(a, dr, dc):
+    """out[i, j] = a[i - dr, j - dc], con ceros fuera de la malla."""
+    out = np.zeros_like(a)
+    h, w = a.shape
+    out[max(dr, 0):h + min(dr, 0), max(dc, 0):w + min(dc, 0)] = a[max(-dr, 0):h - max(dr, 0), max(-dc, 0):w - max(dc, 0)]
+    return out
+
+def _resample_nearest(grid, shape):
+    """Ajusta una malla 2D (p. ej. la de riesgo IA) a otra resolución por vecino más cercano."""
+    grid = np.asarray(grid, dtype=np.float32)
+    if grid.shape == shape:
+        return grid
+    rows = np.round(np.linspace(0, grid.shape[0] - 1, shape[0])).astype(np.intp)
+    cols = np.round(np.linspace(0, grid.shape[1] - 1, shape[1])).astype(np.intp)
+    return grid[np.ix_(rows, cols)]
+
+class FireAutomaton:
+    """
+    Autómata celular de propagación. Estados: UNBURNED, BURNING, BURNED.
+    Cada paso es una actualización vectorizada con 8 desplazamientos de la
+    malla, restringida a la ventana que rodea al frente activo.
+    'risk_grid' puede ser 2D o la malla (horas, filas, columnas) de
+    predict_risk_grid; en ese caso se usa el máximo por celda del horizonte.
+    """
+
+    def __init__(self, bounds, resolution=1000, wind_speed_ms=0.0, wind_deg=0.0, fwi_score=15.0,
+                 risk_grid=None, fuel=None, burned=None, base_prob=0.58, seed=None):
+        from src.ai_model import build_grid_axes
+
+        self.bounds = bounds
+        self.lat, self.lon = build_grid_axes(*bounds, resolution=resolution)
+        shape = (self.lat.size, self.lon.size)
+        self.state = np.zeros(shape, dtype=np.uint8)
+        if burned is not None:
+            self.state[_resample_nearest(burned, shape) > 0] = BURNED
+        self.steps = 0
+        self._rng = np.random.default_rng(seed)
+
+        # Probabilidad base por celda: combustible, FWI y riesgo IA
+        p = np.full(shape, base_prob, dtype=np.float32)
+        if fuel is not None:
+            p *= _resample_nearest(fuel, shape)
+        fwi = np.asarray(fwi_score, dtype=np.float32)
+        p *= 0.5 + np.clip(_resample_nearest(fwi, shape) if fwi.ndim == 2 else fwi, 0.0, 60.0) / 60.0
+        if risk_grid is not None:
+            risk = np.asarray(risk_grid, dtype=np.float32)
+            p *= 0.5 + _resample_nearest(risk.max(axis=0) if risk.ndim == 3 else risk, shape)
+        self._p = np.clip(p, 0.0, 1.0)
+
+        # Tamaño de celda en km (la malla no es cuadrada en km)
+        lat_min, lat_max, lon_min, lon_max = bounds
+        self.cell_km = (
+            (lat_max - lat_min) / max(shape[0] - 1, 1) * 111.0,
+            (lon_max - lon_min) / max(shape[1] - 1, 1) * 111.0 * math.cos(math.radians((lat_min + lat_max) / 2)),
+        )
+
+        # Factor de viento por dirección: p_w = exp(c1·V)·exp(c2·V·(cosθ - 1))
+        # Dirección de avance con la misma convención que get_fire_ellipse.
+        # Con mallas de viento (weather_grid) el factor es distinto en cada celda.
+        speed = np.asarray(wind_speed_ms, dtype=np.float32)
+        deg = np.asarray(wind_deg, dtype=np.float32)
+        per_cell = speed.ndim == 2 or deg.ndim == 2
+        if per_cell:
+            speed = _resample_nearest(np.broadcast_to(speed, deg.shape) if speed.ndim < 2 else speed, shape)
+            deg = _resample_nearest(np.broadcast_to(deg, speed.shape) if deg.ndim < 2 else deg, shape)
+        rot = np.radians(deg - 90)
+        spread_east, spread_north = np.cos(rot), np.sin(rot)
+        self._wind_factors = []
+        for dr, dc in _NEIGHBORS:
+            north, east = dr * self.cell_km[0], dc * self.cell_km[1]
+            cos_theta = (east * spread_east + north * spread_north) / math.hypot(east, north)
+            factor = np.exp(0.045 * speed) * np.exp(0.131 * speed * (cos_theta - 1))
+            self._wind_factors.append(factor.astype(np.float32) if per_cell else float(factor))
+
+    @classmethod
+    def from_weather(cls, bounds, weather, fwi_score, risk_grid=None, **kwargs):
+        """Construye el autómata con el viento de get_weather_data (m/s y grados)."""
+        wind = weather.get('wind', {}) if weather else {}
+        return cls(bounds, wind_speed_ms=wind.get('speed', 0.0), wind_deg=wind.get('deg', 0.0),
+                   fwi_score=fwi_score, risk_grid=risk_grid, **kwargs)
+
+    @classmethod
+    def from_weather_grid(cls, bounds, grids, risk_grid=None, **kwargs):
+        """Construye el autómata con viento y FWI por celda (salida de weather_grid.get_weather_grid)."""
+        return cls(bounds, wind_speed_ms=grids['wind_ms'], wind_deg=grids['wind_deg'],
+                   fwi_score=grids['fwi'], risk_grid=risk_grid, **kwargs)
+
+    def cell_of(self, lats, lons):
+        """Índices (fila, columna) de la celda más cercana a cada coordenada."""
+        def axis(values, grid):
+            if grid.size < 2:
+                return np.zeros(np.shape(values), dtype=np.intp)
+            step = (grid[-1] - grid[0]) / (grid.size - 1)
+            return np.clip(np.rint((np.asarray(values, dtype=np.float64) - grid[0]) / step), 0, grid.size - 1).astype(np.intp)
+        return axis(lats, self.lat), axis(lons, self.lon)
+
+    def ignite(self, lats, lons):
+        """Enciende las celdas de los puntos dados (si aún tienen combustible)."""
+        rows, cols = self.cell_of(lats, lons)
+        unburned = self.state[rows, cols] == UNBURNED
+        self.state[rows[unburned], cols[unburned]] = BURNING
+        return self
+
+    def step(self, n_steps=1):
+        """Avanza 'n_steps' pasos. Cada celda arde un paso y queda quemada."""
+        h, w = self.state.shape
+        for _ in range(n_steps):
+            burning = self.state == BURNING
+            rows = np.flatnonzero(burning.any(axis=1))
+            if rows.size == 0:
+                break
+            cols = np.flatnonzero(burning[rows[0]:rows[-1] + 1].any(axis=0))
+            r0, r1 = max(rows[0] - 1, 0), min(rows[-1] + 2, h)
+            c0, c1 = max(cols[0] - 1, 0), min(cols[-1] + 2, w)
+
+            state = self.state[r0:r1, c0:c1]
+            front = burning[r0:r1, c0:c1]
+            p = self._p[r0:r1, c0:c1]
+
+            # Probabilidad de NO encenderse: producto sobre vecinas en llamas
+            survive = np.ones(state.shape, dtype=np.float32)
+            for (dr, dc), pw in zip(_NEIGHBORS, self._wind_factors):
+                if not np.isscalar(pw):
+                    pw = pw[r0:r1, c0:c1]
+                survive *= np.where(_shift(front, dr, dc), 1.0 - np.minimum(p * pw, 1.0), 1.0).astype(np.float32)
+
+            ignite = (state == UNBURNED) & (self._rng.random(state.shape, dtype=np.float32) >= survive)
+            state[front] = BURNED
+            state[ignite] = BURNING
+            self.steps += 1
+        return self
+
+    @property
+    def burning(self):
+        return self.state == BURNING
+
+    @property
+    def burned_area_km2(self):
+        """Área afectada (en llamas o quemada)."""
+        return float(np.count_nonzero(self.state)) * self.cell_km[0] * self.cell_km[1]
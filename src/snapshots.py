@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+
+import joblib
+
+from src.storage import CACHE_DIR
+
+# --- SNAPSHOTS PRECALCULADOS ---
+# worker.py escribe aquí los datos ya procesados (clima, FIRMS, epicentros,
+# mallas de riesgo) y el tablero solo los lee, sin tocar APIs ni entrenar.
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshots")
+
+_memo = {}
+
+def _snapshot_path(name):
+    return os.path.join(SNAPSHOT_DIR, f"{name}.joblib")
+
+def write_snapshot(name, payload):
+    """Escribe el snapshot de forma atómica (los lectores nunca ven un archivo a medias)."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = _snapshot_path(name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    joblib.dump({"generated_at": time.time(), "payload": payload}, tmp_path)
+    os.replace(tmp_path, path)
+
+def read_snapshot(name, max_age=None):
+    """
+    Último snapshot publicado como dict {'generated_at', 'payload'}, o None si no
+    existe (o si es más viejo que 'max_age' segundos). Se relee solo cuando el
+    archivo cambia, así que en cada rerun cuesta un 'stat'.
+    """
+    path = _snapshot_path(name)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _memo.get(path)
+    if cached is None or cached[0] != mtime:
+        try:
+            cached = (mtime, joblib.load(path))
+        except Exception as e:
+            print(f"Error leyendo snapshot {name}: {e}")
+            return None
+        _memo[path] = cached
+    snapshot = cached[1]
+    if max_age is not None and time.time() - snapshot["generated_at"] > max_age:
+        return None
+    return snapshot
@@ -0,0 +1,102 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+# --- ÍNDICE ESPACIAL (BallTree con distancia haversine) ---
+# Se construye una vez por snapshot de infraestructura y responde consultas
+# de k vecinos y de radio para miles de puntos en una sola llamada, con
+# distancias de gran círculo reales (no grados euclidianos).
+
+EARTH_RADIUS_KM = 6371.0088
+
+_index_memo = {}
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia de gran círculo en km (vectorizada, acepta escalares o arreglos)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def _to_radians(lats, lons):
+    return np.radians(np.column_stack([
+        np.atleast_1d(np.asarray(lats, dtype=np.float64)),
+        np.atleast_1d(np.asarray(lons, dtype=np.float64))
+    ]))
+
+class SpatialIndex:
+    """Índice de puntos (lat, lon) para consultas de vecinos más cercanos."""
+
+    def __init__(self, lats, lons, leaf_size=40):
+        self.size = len(lats)
+        self._tree = BallTree(_to_radians(lats, lons), leaf_size=leaf_size, metric='haversine') if self.size else None
+
+    def nearest(self, lats, lons, k=1):
+        """
+        Los 'k' puntos indexados más cercanos a cada consulta.
+        Retorna (dist_km, idx), ambos de forma (n_consultas, k).
+        """
+        k = min(k, self.size)
+        if self._tree is None or k == 0:
+            n = len(np.atleast_1d(lats))
+            return np.empty((n, 0)), np.empty((n, 0), dtype=np.intp)
+        dist, idx = self._tree.query(_to_radians(lats, lons), k=k)
+        return dist * EARTH_RADIUS_KM, idx
+
+    def within_radius(self, lats, lons, radius_km, sort_results=True):
+        """
+        Todos los puntos indexados a menos de 'radius_km' de cada consulta.
+        Retorna (idx, dist_km): arreglos de objetos, uno por consulta.
+        """
+        n = len(np.atleast_1d(lats))
+        if self._tree is None:
+            empty = np.empty(n, dtype=object)
+            for i in range(n):
+                empty[i] = np.empty(0, dtype=np.intp)
+            return empty, empty.copy()
+        idx, dist = self._tree.query_radius(
+            _to_radians(lats, lons), r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True, sort_results=sort_results
+        )
+        return idx, dist * EARTH_RADIUS_KM
+
+    def count_within_radius(self, lats, lons, radius_km):
+        """Número de puntos indexados a menos de 'radius_km' de cada consulta."""
+        if self._tree is None:
+            return np.zeros(len(np.atleast_1d(lats)), dtype=np.intp)
+        return self._tree.query_radius(_to_radians(lats, lons), r=radius_km / EARTH_RADIUS_KM, count_only=True)
+
+def build_infra_index(df_infra, tipo=None):
+    """
+    Índice de la infraestructura (opcionalmente solo un 'tipo', p. ej. 'Bomberos').
+    Retorna (índice, sub-DataFrame alineado con los índices del árbol).
+    Se memoriza por contenido, así que el árbol se construye una vez por snapshot.
+    """
+    subset = df_infra if tipo is None or df_infra.empty else df_infra[df_infra['tipo'] == tipo]
+    subset = subset.reset_index(drop=True)
+    if subset.empty:
+        return SpatialIndex([], []), subset
+
+    coords = subset[['lat', 'lon']].to_numpy(dtype=np.float64)
+    memo_key = (tipo, hashlib.sha1(coords.tobytes()).hexdigest())
+    if memo_key not in _index_memo:
+        if len(_index_memo) > 32:
+            _index_memo.clear()
+        _index_memo[memo_key] = SpatialIndex(coords[:, 0], coords[:, 1])
+    return _index_memo[memo_key], subset
+
+def nearest_facilities(lats, lons, df_infra, tipo='Bomberos', k=1):
+    """
+    Las 'k' instalaciones de 'tipo' más cercanas a cada punto, en una sola llamada.
+    Retorna un DataFrame largo con 'query_idx', 'rank', 'dist_km' y las columnas de la instalación.
+    """
+    index, subset = build_infra_index(df_infra, tipo)
+    dist, idx = index.nearest(lats, lons, k=k)
+    if idx.size == 0:
+        return pd.DataFrame()
+    result = subset.iloc[idx.ravel()].reset_index(drop=True)
+    result.insert(0, 'query_idx', np.repeat(np.arange(idx.shape[0]), idx.shape[1]))
+    result.insert(1, 'rank', np.tile(np.arange(1, idx.shape[1] + 1), idx.shape[0]))
+    result['dist_km'] = dist.ravel()
+    return result
@@ -0,0 +1,36 @@
+import hashlib
+import os
+
+# --- ALMACENAMIENTO LOCAL ---
+# Directorio raíz de artefactos generados (modelos, cachés de datos y feeds).
+CACHE_DIR = os.environ.get("SAPRIA_CACHE_DIR", "cache")
+
+_hash_memo = {}
+
+def file_hash(path):
+    """
+    Hash SHA-256 del contenido de un archivo.
+    Se memoriza por (ruta, mtime, tamaño) para no releer el archivo en cada rerun.
+    """
+    info = os.stat(path)
+    memo_key = (os.path.abspath(path), info.st_mtime_ns, info.st_size)
+    if memo_key not in _hash_memo:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _hash_memo[memo_key] = h.hexdigest()
+    return _hash_memo[memo_key]
+
+def file_prefix_hash(path, n_bytes):
+    """Hash SHA-256 de los primeros 'n_bytes' del archivo (para detectar que solo se agregaron filas)."""
+    h = hashlib.sha256()
+    remaining = n_bytes
+    with open(path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest()
@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import get_weather_data
+from src.fwi_calculator import calculate_fwi_array
+
+# --- MALLA METEOROLÓGICA ---
+# Se consulta el clima en una retícula de puntos de la zona (en paralelo,
+# con el límite de tasa y la caché de feeds de OpenWeather) y se interpola
+# por distancia inversa (IDW) a la misma malla que predict_risk_grid. Así el
+# riesgo y la propagación pueden usar viento, humedad y temperatura por celda.
+
+WEATHER_LATTICE = (3, 3)  # Puntos de muestreo (filas_lat, columnas_lon)
+SAMPLE_WORKERS = 4
+IDW_POWER = 2
+_KM_PER_DEG = 111.32
+_MAX_BLOCK = 1 << 20  # Elementos (celdas x muestras) por bloque de interpolación
+
+def lattice_points(lat_min, lat_max, lon_min, lon_max, shape=WEATHER_LATTICE):
+    """Coordenadas (lats, lons) de una retícula regular que cubre el área, incluidos los bordes."""
+    lats, lons = np.meshgrid(np.linspace(lat_min, lat_max, shape[0]), np.linspace(lon_min, lon_max, shape[1]), indexing='ij')
+    return lats.ravel(), lons.ravel()
+
+def _observation(lat, lon):
+    weather = get_weather_data(lat, lon)
+    if not weather or 'main' not in weather:
+        return None
+    wind = weather.get('wind', {})
+    return {
+        'lat': lat, 'lon': lon,
+        'temp': weather['main'].get('temp'), 'humidity': weather['main'].get('humidity'),
+        'wind_ms': wind.get('speed', 0.0), 'wind_deg': wind.get('deg', 0.0),
+    }
+
+def sample_weather(lats, lons, max_workers=SAMPLE_WORKERS):
+    """
+    Clima de cada punto, consultado en paralelo con a lo más 'max_workers'
+    solicitudes simultáneas. Retorna un DataFrame (solo los puntos con datos).
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        rows = list(pool.map(lambda p: _safe_observation(*p), zip(np.asarray(lats, float).tolist(), np.asarray(lons, float).tolist())))
+    rows = [row for row in rows if row is not None]
+    return pd.DataFrame(rows, columns=['lat', 'lon', 'temp', 'humidity', 'wind_ms', 'wind_deg']).dropna()
+
+def _safe_observation(lat, lon):
+    try:
+        return _observation(lat, lon)
+    except Exception as e:
+        print(f"Error de clima en ({lat:.4f}, {lon:.4f}): {e}")
+        return None
+
+def idw_interpolate(sample_lats, sample_lons, values, lat_axis, lon_axis, power=IDW_POWER):
+    """
+    Interpola 'values' (n_muestras, n_variables) a la malla lat_axis x lon_axis.
+    Distancias equirectangulares en km; una celda que coincide con una
+    muestra toma su valor. Retorna (n_lat, n_lon, n_variables) en float32.
+    """
+    sample_lats = np.asarray(sample_lats, dtype=np.float64)
+    sample_lons = np.asarray(sample_lons, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(sample_lats), -1)
+    lat_axis = np.asarray(lat_axis, dtype=np.float64)
+    lon_axis = np.asarray(lon_axis, dtype=np.float64)
+
+    cos_lat = np.cos(np.radians(sample_lats.mean()))
+    dx = (lon_axis[:, None] - sample_lons[None, :]) * _KM_PER_DEG * cos_lat  # (n_lon, n_muestras)
+    out = np.empty((lat_axis.size, lon_axis.size, values.shape[1]), dtype=np.float32)
+    rows_per_block = max(1, _MAX_BLOCK // max(lon_axis.size * sample_lats.size, 1))
+    for r0 in range(0, lat_axis.size, rows_per_block):
+        dy = (lat_axis[r0:r0 + rows_per_block, None, None] - sample_lats[None, None, :]) * _KM_PER_DEG
+        dist = np.sqrt(dy ** 2 + dx[None, :, :] ** 2)  # (filas, n_lon, n_muestras)
+        weights = 1.0 / np.maximum(dist, 1e-3) ** power
+        weights /= weights.sum(axis=-1, keepdims=True)
+        out[r0:r0 + rows_per_block] = weights @ values
+    return out
+
+def interpolate_weather_grid(samples, lat_axis, lon_axis, power=IDW_POWER):
+    """
+    Mallas 2D de temp, humidity, wind_ms, wind_kph, wind_deg, fwi y fwi_code.
+    La dirección del viento se interpola por componentes (u, v) para no
+    promediar mal ángulos como 350° y 10°; la rapidez se interpola aparte.
+    """
+    rad = np.radians(samples['wind_deg'].to_numpy(dtype=np.float64))
+    u, v = -np.sin(rad), -np.cos(rad)
+    values = np.column_stack([samples['temp'], samples['humidity'], samples['wind_ms'], u, v])
+    grid = idw_interpolate(samples['lat'], samples['lon'], values, lat_axis, lon_axis, power)
+
+    temp, humidity, wind_ms = grid[..., 0], np.clip(grid[..., 1], 0, 100), np.maximum(grid[..., 2], 0)
+    wind_deg = (np.degrees(np.arctan2(-grid[..., 3], -grid[..., 4])) % 360).astype(np.float32)
+    fwi, fwi_code, _ = calculate_fwi_array(temp, humidity, wind_ms * 3.6)
+    return {
+        'temp': temp, 'humidity': humidity, 'wind_ms': wind_ms, 'wind_kph': wind_ms * 3.6,
+        'wind_deg': wind_deg, 'fwi': fwi, 'fwi_code': fwi_code,
+    }
+
+def get_weather_grid(lat_min, lat_max, lon_min, lon_max, resolution=40, lattice=WEATHER_LATTICE,
+                     max_workers=SAMPLE_WORKERS, power=IDW_POWER):
+    """
+    Muestrea la retícula y la interpola a la malla de build_grid_axes (la de
+    predict_risk_grid con la misma 'resolution'). Retorna (mallas, meta); las
+    mallas son None si no se obtuvo ninguna muestra.
+    """
+    from src.ai_model import build_grid_axes
+
+    lat_axis, lon_axis = build_grid_axes(lat_min, lat_max, lon_min, lon_max, resolution=resolution)
+    samples = sample_weather(*lattice_points(lat_min, lat_max, lon_min, lon_max, lattice), max_workers=max_workers)
+    meta = {'lat': lat_axis, 'lon': lon_axis, 'bounds': (lat_min, lat_max, lon_min, lon_max), 'samples': samples}
+    if samples.empty:
+        return None, meta
+    return interpolate_weather_grid(samples, lat_axis, lon_axis, power), meta
@@ -0,0 +1,124 @@
+"""
+Proceso de fondo de SAPRIA-FO.
+
+Consulta FIRMS, el clima y el pronóstico periódicamente, actualiza los modelos cuando cambia
+el historial, cruza las anomalías con los incidentes, precalcula la malla de riesgo de las
+próximas horas y los tiempos de respuesta de las estaciones, y publica un snapshot que el
+tablero (app.py) solo lee. Así la latencia de la página no depende de las APIs externas ni
+del entrenamiento.
+
+Uso: python worker.py [--interval 300] [--once]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from src import feed_cache
+from src.ai_model import get_fire_model_incremental, predict_risk_grid
+from src.correlation import HotspotCorrelator, hotspot_alerts
+from src.coverage import get_coverage
+from src.data_loader import get_nasa_firms_data, get_real_infrastructure, get_weather_data, load_historical_data
+from src.forecast import get_forecast_timeline
+from src.fwi_calculator import calculate_fwi
+from src.http_client import fetch_concurrently
+from src.ml_engine import get_risk_clusters_incremental
+from src.snapshots import write_snapshot
+from src.storage import file_hash
+from src.weather_grid import get_weather_grid
+
+CSV_PATH = "incendios.csv"
+JUAREZ_LAT, JUAREZ_LON = 31.7389, -106.4856
+GRID_RESOLUTION = 100
+GRID_HOURS = 24
+INFRA_RADIUS_M = 15000
+
+_correlator = (None, None)  # (versión de datos, HotspotCorrelator)
+
+def get_correlator(df, data_version):
+    """Correlador del historial; el KDTree se reconstruye solo cuando cambia la versión de datos."""
+    global _correlator
+    if _correlator[0] != data_version:
+        _correlator = (data_version, HotspotCorrelator(df))
+    return _correlator[1]
+
+def run_cycle(csv_path=CSV_PATH):
+    """Un ciclo completo: feeds, modelos, malla de riesgo y snapshot."""
+    started = time.perf_counter()
+    data_version = file_hash(csv_path)
+
+    feeds = fetch_concurrently({
+        "df": lambda: load_historical_data(csv_path),
+        "weather": lambda: get_weather_data(JUAREZ_LAT, JUAREZ_LON),
+        "nasa": get_nasa_firms_data,
+        "forecast": get_forecast_timeline,
+        "infra": lambda: get_real_infrastructure(JUAREZ_LAT, JUAREZ_LON, radius=INFRA_RADIUS_M),
+    })
+    df = feeds["df"] if feeds["df"] is not None else pd.DataFrame()
+    weather = feeds["weather"]
+    df_nasa = feeds["nasa"] if feeds["nasa"] is not None else pd.DataFrame()
+
+    # Los modelos solo se reentrenan si cambió el historial; si solo creció, se actualizan con las filas nuevas
+    epicentros = get_risk_clusters_incremental(df, csv_path)
+    model, accuracy = get_fire_model_incremental(csv_path)
+    # Detecciones cruzadas con incidentes y epicentros (las no reportadas primero)
+    alerts = hotspot_alerts(get_correlator(df, data_version), df_nasa, epicentros)
+
+    risk, risk_meta, weather_grid, coverage, exposure = None, None, None, None, None
+    if not df.empty:
+        bounds = (float(df['lat'].min()), float(df['lat'].max()), float(df['lon'].min()), float(df['lon'].max()))
+        if model is not None:
+            start = pd.Timestamp.now().floor('h')
+            slices = list(pd.date_range(start, periods=GRID_HOURS, freq='h'))
+            risk, risk_meta = predict_risk_grid(model, *bounds, resolution=GRID_RESOLUTION, time_slices=slices)
+        # Clima por celda en la misma malla que el riesgo (viento/FWI para la propagación)
+        weather_grid, _ = get_weather_grid(*bounds, resolution=GRID_RESOLUTION)
+        # Tiempos de respuesta por estación en la misma malla (se recalculan solo si cambian las estaciones)
+        coverage = get_coverage(feeds["infra"], *bounds, resolution=GRID_RESOLUTION)
+        if coverage is not None and risk is not None:
+            exposure = coverage.risk_exposure(risk.max(axis=0), risk_meta['lat'], risk_meta['lon']).head(200)
+
+    sim_wind = weather['wind']['speed'] * 3.6 if weather else 20
+    sim_temp = weather['main']['temp'] if weather else 30
+    sim_hum = weather['main']['humidity'] if weather else 20
+
+    write_snapshot("dashboard", {
+        "data_version": data_version,
+        "weather": weather,
+        "df_nasa": df_nasa,
+        "epicentros": epicentros,
+        "fwi": calculate_fwi(sim_temp, sim_hum, sim_wind),
+        "forecast": feeds["forecast"],
+        "hotspot_alerts": alerts,
+        "model_accuracy": accuracy,
+        "risk_grid": risk,
+        "risk_meta": risk_meta,
+        "weather_grid": weather_grid,
+        "coverage": coverage,
+        "coverage_exposure": exposure,
+        "feed_metrics": feed_cache.feed_metrics(),
+    })
+    print(f"[{pd.Timestamp.now():%Y-%m-%d %H:%M:%S}] Snapshot publicado en {time.perf_counter() - started:.1f}s "
+          f"({len(df)} incidentes, {len(df_nasa)} anomalías NASA)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta en segundo plano de SAPRIA-FO")
+    parser.add_argument("--interval", type=int, default=300, help="Segundos entre ciclos")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--once", action="store_true", help="Ejecuta un solo ciclo y termina")
+    args = parser.parse_args()
+
+    # Aquí sí se espera a la red: el snapshot debe salir con datos frescos
+    feed_cache.BLOCKING_REFRESH = True
+
+    while True:
+        try:
+            run_cycle(args.csv)
+        except Exception as e:
+            print(f"Error en ciclo del worker: {e}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()